@@ -0,0 +1,2 @@
+"""Micro-benchmarks for openimagingdatamodel; run each one from the repository root with
+`python -m benchmarks.<name>`."""
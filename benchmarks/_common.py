@@ -0,0 +1,53 @@
+"""Shared fixtures and timing helpers for the benchmarks."""
+
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Final, Iterator
+
+from openimagingdatamodel.cde_set.set import CDESet
+
+REPO_ROOT: Final[Path] = Path(__file__).parents[1]
+PULMONARY_NODULE_SET_FILE: Final[Path] = REPO_ROOT / "notebooks" / "RDES195_pulmonary_nodule.cde.json"
+SAMPLE_OBSERVATION_FILE: Final[Path] = (
+    REPO_ROOT / "openimagingdatamodel" / "observation" / "data" / "sample_observation.json"
+)
+
+PULMONARY_NODULE_ROW: Final[dict[str, Any]] = {
+    "Presence": "present",
+    "Composition": "solid",
+    "Size": 12.0,
+    "Location": "left lower lobe",
+    "Morphology": "lobulated",
+}
+
+
+def load_pulmonary_nodule_set() -> CDESet:
+    return CDESet.model_validate_json(PULMONARY_NODULE_SET_FILE.read_text())
+
+
+def synthetic_set_json(count: int, /) -> Iterator[bytes]:
+    """Yield the JSON of `count` copies of the pulmonary nodule set, each with its own set, element and value IDs."""
+    template = load_pulmonary_nodule_set().model_dump(exclude_none=True)
+    for n in range(count):
+        data = json.loads(json.dumps(template))
+        data["id"] = f"RDES{100_000 + n}"
+        for i, element in enumerate(data["elements"]):
+            element["id"] = f"RDE{(100_000 + n) * 10 + i}"
+            for j, value in enumerate(element.get("value_set", {}).get("values", [])):
+                value["code"] = f"{element['id']}.{j}"
+        yield json.dumps(data).encode()
+
+
+def best_of(func: Callable[[], Any], /, repeat: int = 5) -> float:
+    """Return the best wall-clock time in seconds of several calls to `func`."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label: str, seconds: float, count: int, /, unit: str = "obs") -> None:
+    print(f"{label:<40} {seconds * 1e6 / count:9.2f} us/{unit} {count / seconds:12,.0f} {unit}/s")
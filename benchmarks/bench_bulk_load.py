@@ -0,0 +1,55 @@
+"""Overhead of error-tolerant loading: `load_observations` versus a bare `model_validate_json` loop."""
+
+import argparse
+import os
+import tempfile
+from collections import deque
+
+from openimagingdatamodel.observation.ndjson import NDJSONWriter, load_observations
+from openimagingdatamodel.observation.observation import Observation
+
+from ._common import PULMONARY_NODULE_ROW, best_of, load_pulmonary_nodule_set, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=50_000, help="records in the file")
+    parser.add_argument("--bad-rate", type=float, default=0.001, help="fraction of records that are invalid")
+    args = parser.parse_args()
+
+    cde_set = load_pulmonary_nodule_set()
+    bad_every = int(1 / args.bad_rate) if args.bad_rate else 0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        clean_path = os.path.join(tmp_dir, "clean.ndjson")
+        dirty_path = os.path.join(tmp_dir, "dirty.ndjson")
+        with NDJSONWriter(clean_path) as writer:
+            for _ in range(args.count):
+                writer.write_values(cde_set, PULMONARY_NODULE_ROW)
+        with open(clean_path, "rb") as src, open(dirty_path, "wb") as dst:
+            for i, line in enumerate(src):
+                dst.write(
+                    line.replace(b'"status":"preliminary"', b'"status":"bogus"')
+                    if bad_every and i % bad_every == 0
+                    else line
+                )
+
+        def bare() -> None:
+            with open(clean_path, "rb") as f:
+                for line in f:
+                    Observation.model_validate_json(line)
+
+        quarantine = os.path.join(tmp_dir, "quarantine.ndjson")
+        loaders = []
+
+        def tolerant() -> None:
+            # A loader makes one pass, so each run gets a new one; records are consumed without being kept
+            loaders.append(load_observations(dirty_path, quarantine=quarantine))
+            deque(loaders[-1], maxlen=0)
+
+        report("model_validate_json loop (clean file)", best_of(bare, repeat=3), args.count, unit="rec")
+        report(f"load_observations ({args.bad_rate:.1%} bad)", best_of(tolerant, repeat=3), args.count, unit="rec")
+        print(f"Last run: {loaders[-1].report}")
+
+
+if __name__ == "__main__":
+    main()
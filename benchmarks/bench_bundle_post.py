@@ -0,0 +1,92 @@
+"""Send Observations to a local mock FHIR server as transaction Bundles: building each Bundle as a dict of dumped
+Observations and posting it on a new connection, versus streaming entries with `BundleWriter` to a `BundlePoster`."""
+
+import argparse
+import json
+import threading
+import time
+import tracemalloc
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from openimagingdatamodel.observation.bundle import BundlePoster, BundleWriter
+from openimagingdatamodel.observation.observation_factory import ObservationFactory
+
+from ._common import PULMONARY_NODULE_ROW, load_pulmonary_nodule_set, report
+
+RESPONSE = b'{"resourceType":"Bundle","type":"transaction-response"}'
+
+
+class Receiver(BaseHTTPRequestHandler):
+    """Reads each Bundle and answers 200 with keep-alive."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # send headers and body without waiting for an ACK, like a real server
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/fhir+json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+def post_dicts(url: str, observations, max_entries: int) -> None:
+    """What BundleWriter replaces: dump every Observation into a dict and post with urllib."""
+    entries = [
+        {
+            "fullUrl": f"urn:uuid:{o.id_}",
+            "resource": o.model_dump(mode="json", by_alias=True, exclude_none=True),
+            "request": {"method": "PUT", "url": f"Observation/{o.id_}"},
+        }
+        for o in observations
+    ]
+    for start in range(0, len(entries), max_entries):
+        bundle = {"resourceType": "Bundle", "type": "transaction", "entry": entries[start : start + max_entries]}
+        request = urllib.request.Request(
+            url, data=json.dumps(bundle).encode(), headers={"Content-Type": "application/fhir+json"}
+        )
+        with urllib.request.urlopen(request) as response:
+            response.read()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=50_000, help="Observations to send")
+    parser.add_argument("--max-entries", type=int, default=100, help="entries per Bundle")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Receiver)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/fhir"
+    cde_set = load_pulmonary_nodule_set()
+    observations = list(ObservationFactory.create_observations(cde_set, [PULMONARY_NODULE_ROW] * args.count))
+
+    def stream(observations) -> None:
+        with BundlePoster(url, idempotent=True) as poster, BundleWriter(poster, max_entries=args.max_entries) as writer:
+            writer.write_many(observations)
+        summary[:] = [writer.bundles, writer.bytes_written / 1e6, poster.connections]
+
+    summary: list = []
+
+    for label, send in [
+        ("dicts + urllib, new connection each", lambda: post_dicts(url, observations, args.max_entries)),
+        ("BundleWriter + BundlePoster", lambda: stream(observations)),
+    ]:
+        start = time.perf_counter()
+        send()
+        report(label, time.perf_counter() - start, args.count)
+        tracemalloc.start()
+        send()
+        print(f"  peak traced memory {tracemalloc.get_traced_memory()[1] / 1e6:,.1f} MB")
+        tracemalloc.stop()
+    print(f"  {summary[0]} Bundles, {summary[1]:,.1f} MB, {summary[2]} connection(s) for the last run")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Search a synthetic catalog: a linear scan of set and element names and definitions versus `CatalogSearchIndex`."""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from openimagingdatamodel.cde_set.search import CatalogSearchIndex
+from openimagingdatamodel.cde_set.set import CDESet
+from openimagingdatamodel.cde_set.set_factory import SetFactory
+
+from ._common import best_of, report
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "vo", "si", "de", "pa", "gu", "fe", "zo", "bi"]
+COMMON = ["nodule", "mass", "lesion", "size", "presence", "location", "enhancement", "margin", "density", "cyst"]
+
+
+def make_vocabulary(count: int, rng: random.Random) -> list[str]:
+    return list({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(count)})
+
+
+def make_sets(count: int, vocabulary: list[str], rng: random.Random) -> list[CDESet]:
+    # Words are drawn with a long tail, like real clinical vocabulary, plus a few very common words
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    def phrase(length: int) -> str:
+        words = rng.choices(vocabulary, weights, k=length)
+        if rng.random() < 0.3:
+            words.append(rng.choice(COMMON))
+        return " ".join(words)
+
+    sets = []
+    for _ in range(count):
+        cde_set = SetFactory.create_set(phrase(2)[:50], description=phrase(6)[:100])
+        for _ in range(4):
+            element = SetFactory.create_value_set_element(
+                phrase(2), [phrase(1) for _ in range(4)], definition=phrase(8)
+            )
+            cde_set.elements.append(element)
+        sets.append(cde_set)
+    return sets
+
+
+def linear_scan(sets: list[CDESet], query: str) -> list[tuple[int, str]]:
+    words = query.casefold().split()
+    hits = []
+    for cde_set in sets:
+        texts = [(cde_set.id, f"{cde_set.name} {cde_set.description}")]
+        texts += [(element.id, f"{element.name} {element.definition}") for element in cde_set.elements]
+        for key, text in texts:
+            text = text.casefold()
+            if (score := sum(word in text for word in words)) > 0:
+                hits.append((score, key))
+    hits.sort(reverse=True)
+    return hits[:10]
+
+
+def search_time(index: CatalogSearchIndex, query: str, prefix: bool) -> float:
+    start = time.perf_counter()
+    index.search(query, prefix=prefix)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-s", "--sets", type=int, default=10_000, help="sets in the catalog")
+    parser.add_argument("-q", "--queries", type=int, default=1000, help="queries per run")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = make_vocabulary(20_000, rng)
+    sets = make_sets(args.sets, vocabulary, rng)
+    start = time.perf_counter()
+    index = CatalogSearchIndex(sets)
+    build_time = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "catalog.search"
+        index.save(path)
+        start = time.perf_counter()
+        CatalogSearchIndex.load(path)
+        load_time = time.perf_counter() - start
+        size = path.stat().st_size
+    print(f"{args.sets:,} sets: {index.info()}")
+    print(f"build {build_time:.2f} s, load {load_time:.2f} s, {size / 1e6:.1f} MB on disk")
+
+    queries = [
+        " ".join(rng.choice([*rng.sample(vocabulary[:2000], 2), rng.choice(COMMON)]) for _ in range(2))
+        for _ in range(args.queries)
+    ]
+    prefixes = [rng.choice(vocabulary)[:3] for _ in range(args.queries)]
+
+    scan_queries = queries[:20]
+    scan_time = best_of(lambda: [linear_scan(sets, query) for query in scan_queries], repeat=1)
+    report("linear scan", scan_time, len(scan_queries), unit="query")
+    for label, batch, prefix in [
+        ("CatalogSearchIndex.search", queries, False),
+        ("  prefix of last word", queries, True),
+        ("  3-letter prefix only", prefixes, True),
+    ]:
+        for query in batch:
+            index.search(query, prefix=prefix)
+        latencies = sorted(search_time(index, query, prefix) for query in batch)
+        report(label, sum(latencies), len(batch), unit="query")
+        median, p90, p99 = (latencies[int(len(latencies) * q)] * 1e3 for q in (0.5, 0.9, 0.99))
+        print(f"{'':<40} median {median:.3f} ms, p90 {p90:.3f} ms, p99 {p99:.3f} ms")
+
+    start = time.perf_counter()
+    for cde_set in sets[:100]:
+        index.remove_set(cde_set.id)
+        index.add_set(cde_set)
+    report("remove and re-add a set", time.perf_counter() - start, 100, unit="set")
+    # The first searches after a change re-sort the postings of the words they use
+    start = time.perf_counter()
+    for query in queries[:100]:
+        index.add_set(sets[0])
+        index.search(query)
+    report("search after each change", time.perf_counter() - start, 100, unit="query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Cold start of a worker process: parsing a directory of CDE Set JSON files versus opening a catalog snapshot."""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from openimagingdatamodel.cde_set.set import CDESet
+from openimagingdatamodel.cde_set.snapshot import CDECatalogSnapshot
+
+from ._common import REPO_ROOT, synthetic_set_json
+
+SNAPSHOT_NAME = "catalog.cdesnap"
+
+
+def make_catalog(directory: str, count: int) -> None:
+    for n, data in enumerate(synthetic_set_json(count)):
+        Path(directory, f"RDES{100_000 + n}.cde.json").write_bytes(data)
+
+
+def resident_kb() -> int:
+    """Current resident set size; ru_maxrss can't be used because a child starts with its parent's peak."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def child(mode: str, directory: str, lookups: int) -> None:
+    """Start up the way a worker would, then report time taken and resident memory as JSON."""
+    start = time.perf_counter()
+    if mode == "json":
+        sets = {}
+        for name in os.listdir(directory):
+            if name.endswith(".cde.json"):
+                with open(os.path.join(directory, name), "rb") as f:
+                    cde_set = CDESet.model_validate_json(f.read())
+                sets[cde_set.id] = cde_set
+        looked_up = [sets[set_id] for set_id in sorted(sets)[:lookups]]
+    else:
+        snapshot = CDECatalogSnapshot(os.path.join(directory, SNAPSHOT_NAME))
+        looked_up = [snapshot.get_set(set_id) for set_id in snapshot.set_ids[:lookups]]
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"seconds": elapsed, "rss_kb": resident_kb(), "sets": len(looked_up)}))
+
+
+def run_child(mode: str, directory: str, lookups: int) -> dict:
+    args = [sys.executable, "-m", "benchmarks.bench_catalog_snapshot", "--child", mode, "--dir", directory]
+    output = subprocess.run(
+        [*args, "--lookups", str(lookups)], cwd=REPO_ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=2_000, help="sets in the catalog")
+    parser.add_argument("--lookups", type=int, default=20, help="sets each worker uses after starting")
+    parser.add_argument("--child", choices=["json", "snapshot"], help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.dir, args.lookups)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        make_catalog(tmp_dir, args.count)
+        start = time.perf_counter()
+        sets = [CDESet.model_validate_json((Path(tmp_dir) / name).read_bytes()) for name in os.listdir(tmp_dir)]
+        CDECatalogSnapshot.write(os.path.join(tmp_dir, SNAPSHOT_NAME), sets)
+        print(f"Compiled {args.count:,} sets in {time.perf_counter() - start:.2f} s")
+        del sets
+        json_size = sum(os.path.getsize(os.path.join(tmp_dir, n)) for n in os.listdir(tmp_dir) if n.endswith(".json"))
+        snapshot_size = os.path.getsize(os.path.join(tmp_dir, SNAPSHOT_NAME))
+        print(f"JSON files {json_size / 1e6:,.1f} MB, snapshot {snapshot_size / 1e6:,.1f} MB")
+
+        results = {mode: run_child(mode, tmp_dir, args.lookups) for mode in ("json", "snapshot")}
+        for mode, result in results.items():
+            print(f"{mode:<10} start {result['seconds'] * 1e3:9.1f} ms   RSS {result['rss_kb'] / 1e3:8.1f} MB")
+        print(f"Cold start speedup: {results['json']['seconds'] / results['snapshot']['seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Memory held by a synthetic catalog as `CDESet` models versus `CompactCDESet`s."""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from openimagingdatamodel.cde_set.compact import CompactCDESet
+from openimagingdatamodel.cde_set.set import CDESet
+
+from ._common import report, synthetic_set_json
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=5_000, help="sets in the catalog")
+    args = parser.parse_args()
+    # Each set gets its own JSON so nothing is shared between the parsed models to begin with
+    documents = list(synthetic_set_json(args.count))
+
+    gc.collect()
+    tracemalloc.start()
+    sets = [CDESet.model_validate_json(doc) for doc in documents]
+    model_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    compact = [CompactCDESet.from_model(s) for s in sets]
+    report("CompactCDESet.from_model", time.perf_counter() - start, args.count, unit="set")
+    start = time.perf_counter()
+    for c in compact[:1000]:
+        c.to_model()
+    report("CompactCDESet.to_model", time.perf_counter() - start, min(args.count, 1000), unit="set")
+    del sets, compact
+    gc.collect()
+
+    tracemalloc.start()
+    compact = [CompactCDESet.from_model(CDESet.model_validate_json(doc)) for doc in documents]
+    gc.collect()
+    compact_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"CDESet         {model_bytes / 1e6:8.1f} MB  {model_bytes / args.count / 1e3:6.1f} kB/set")
+    print(f"CompactCDESet  {compact_bytes / 1e6:8.1f} MB  {compact_bytes / args.count / 1e3:6.1f} kB/set")
+    print(f"Reduction: {model_bytes / compact_bytes:.1f}x ({len(compact):,} sets)")
+
+
+if __name__ == "__main__":
+    main()
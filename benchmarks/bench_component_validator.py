@@ -0,0 +1,65 @@
+"""Validate extracted component values: row by row in Python versus `ComponentValidator` on rows and on columns."""
+
+import argparse
+import contextlib
+import random
+
+import numpy as np
+from openimagingdatamodel.cde_set.element import FloatElement, ValueSetElement
+from openimagingdatamodel.observation.validator import ComponentValidator
+
+from ._common import best_of, load_pulmonary_nodule_set, report
+
+COMPOSITIONS = ["solid", "Ground Glass", "part-solid", "cavitary"]
+
+
+def make_rows(count: int) -> list[dict]:
+    rng = random.Random(0)
+    return [
+        {"Size": rng.uniform(-5, 100), "Composition": rng.choice(COMPOSITIONS), "Presence": "present"}
+        for _ in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=200_000, help="rows per run")
+    args = parser.parse_args()
+
+    cde_set = load_pulmonary_nodule_set()
+    size = cde_set.get_element("Size")
+    assert isinstance(size, FloatElement)
+    size.float_value.min, size.float_value.max = 0.0, 80.0
+    validator = ComponentValidator(cde_set)
+    rows = make_rows(args.count)
+    columns = {
+        "Size": np.array([row["Size"] for row in rows]),
+        "Composition": [row["Composition"] for row in rows],
+        "Presence": [row["Presence"] for row in rows],
+    }
+    values = args.count * len(columns)
+
+    def row_by_row() -> None:
+        for row in rows:
+            for name, value in row.items():
+                element = cde_set.get_element(name)
+                if isinstance(element, ValueSetElement):
+                    with contextlib.suppress(ValueError):
+                        element.get_value(value)
+                elif isinstance(element, FloatElement):
+                    limits = element.float_value
+                    _ = limits.min is not None and float(value) < limits.min
+                    _ = limits.max is not None and float(value) > limits.max
+
+    python_time = best_of(row_by_row, repeat=3)
+    rows_time = best_of(lambda: validator.validate(rows), repeat=3)
+    columns_time = best_of(lambda: validator.validate(columns), repeat=3)
+    report("row by row (get_element/get_value)", python_time, values, unit="value")
+    report("ComponentValidator rows", rows_time, values, unit="value")
+    report("ComponentValidator columns", columns_time, values, unit="value")
+    errors = validator.validate(columns).error_counts()
+    print(f"Errors: {errors}; columns speedup {python_time / columns_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Compare `ObservationFactory.create_observations` with calling `create_observation` in a loop."""
+
+import argparse
+
+from openimagingdatamodel.observation.observation_factory import ObservationFactory
+
+from ._common import PULMONARY_NODULE_ROW, best_of, load_pulmonary_nodule_set, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=10_000, help="observations per run")
+    args = parser.parse_args()
+
+    cde_set = load_pulmonary_nodule_set()
+    rows = [PULMONARY_NODULE_ROW] * args.count
+
+    def single() -> None:
+        for row in rows:
+            ObservationFactory.create_observation(cde_set, component_values=row)
+
+    def batch() -> None:
+        for _ in ObservationFactory.create_observations(cde_set, rows):
+            pass
+
+    single_time = best_of(single)
+    batch_time = best_of(batch)
+    report("create_observation (loop)", single_time, args.count)
+    report("create_observations (batch)", batch_time, args.count)
+    print(f"speedup: {single_time / batch_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
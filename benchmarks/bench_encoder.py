@@ -0,0 +1,42 @@
+"""Compare `ObservationEncoder.encode_json` with building and dumping Observations through the factory."""
+
+import argparse
+
+from openimagingdatamodel.observation.encoder import ObservationEncoder
+from openimagingdatamodel.observation.observation_factory import ObservationFactory
+
+from ._common import PULMONARY_NODULE_ROW, best_of, load_pulmonary_nodule_set, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=10_000, help="observations per run")
+    args = parser.parse_args()
+
+    cde_set = load_pulmonary_nodule_set()
+    encoder = ObservationEncoder(cde_set)
+
+    def factory_json() -> None:
+        for _ in range(args.count):
+            ObservationFactory.create_observation(cde_set, component_values=PULMONARY_NODULE_ROW).model_dump_json(
+                by_alias=True, exclude_none=True
+            )
+
+    def encoder_json() -> None:
+        for _ in range(args.count):
+            encoder.encode_json(PULMONARY_NODULE_ROW)
+
+    def encoder_objects() -> None:
+        for _ in range(args.count):
+            encoder.encode(PULMONARY_NODULE_ROW)
+
+    factory_time = best_of(factory_json)
+    encoder_time = best_of(encoder_json)
+    report("create_observation + model_dump_json", factory_time, args.count)
+    report("ObservationEncoder.encode_json", encoder_time, args.count)
+    report("ObservationEncoder.encode", best_of(encoder_objects), args.count)
+    print(f"JSON speedup: {factory_time / encoder_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Throughput of each IdAllocator for provisional IDs, Observation IDs and DICOM UIDs."""
+
+import argparse
+
+from openimagingdatamodel.id_allocator import (
+    DeterministicIdAllocator,
+    EntropyIdAllocator,
+    IdAllocator,
+    SequenceIdAllocator,
+)
+
+from ._common import best_of, report
+
+ALLOCATORS: dict[str, IdAllocator] = {
+    "legacy": IdAllocator(),
+    "entropy": EntropyIdAllocator(),
+    "sequence": SequenceIdAllocator(width=10),
+    "deterministic": DeterministicIdAllocator(),
+}
+
+
+def bench(mode: str, allocator: IdAllocator, count: int) -> None:
+    names = [f"Element {n}" for n in range(count)]
+    contents = [f"content {n}".encode() for n in range(count)]
+    seconds = best_of(lambda: [allocator.provisional_id("element", name) for name in names], repeat=3)
+    report(f"{mode} provisional_id", seconds, count, unit="id")
+    seconds = best_of(lambda: [allocator.observation_id("finding", c) for c in contents], repeat=3)
+    report(f"{mode} observation_id", seconds, count, unit="id")
+    seconds = best_of(lambda: [allocator.dicom_uid(c) for c in contents], repeat=3)
+    report(f"{mode} dicom_uid", seconds, count, unit="id")
+    if isinstance(allocator, EntropyIdAllocator):
+        seconds = best_of(lambda: allocator.observation_ids("finding", count), repeat=3)
+        report(f"{mode} observation_ids (one draw)", seconds, count, unit="id")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=100_000, help="IDs of each kind per run")
+    args = parser.parse_args()
+
+    for mode, allocator in ALLOCATORS.items():
+        bench(mode, allocator, args.count)
+        print()
+
+
+if __name__ == "__main__":
+    main()
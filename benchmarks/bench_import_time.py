@@ -0,0 +1,44 @@
+"""Cold start: importing each entry point, then validating its first model, in a fresh interpreter."""
+
+import argparse
+import json
+import subprocess
+import sys
+
+from ._common import PULMONARY_NODULE_SET_FILE, REPO_ROOT, SAMPLE_OBSERVATION_FILE
+
+# Entry point -> (class to validate with, file to validate)
+ENTRY_POINTS = {
+    "openimagingdatamodel.observation.observation": ("Observation", SAMPLE_OBSERVATION_FILE),
+    "openimagingdatamodel.cde_set.set": ("CDESet", PULMONARY_NODULE_SET_FILE),
+}
+
+CHILD_CODE = """
+import json, sys, time
+start = time.perf_counter()
+module = __import__(sys.argv[1], fromlist=["_"])
+imported = time.perf_counter()
+getattr(module, sys.argv[2]).model_validate_json(open(sys.argv[3], "rb").read())
+print(json.dumps({"import": imported - start, "first": time.perf_counter() - imported}))
+"""
+
+
+def cold_start(module: str, cls: str, path: str) -> dict[str, float]:
+    args = [sys.executable, "-c", CHILD_CODE, module, cls, str(path)]
+    return json.loads(subprocess.run(args, cwd=REPO_ROOT, check=True, capture_output=True, text=True).stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="fresh interpreters per entry point")
+    args = parser.parse_args()
+
+    for module, (cls, path) in ENTRY_POINTS.items():
+        runs = [cold_start(module, cls, path) for _ in range(args.repeat)]
+        import_ms = min(run["import"] for run in runs) * 1e3
+        first_ms = min(run["first"] for run in runs) * 1e3
+        print(f"{module:<48} import {import_ms:7.1f} ms   first validation {first_ms:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
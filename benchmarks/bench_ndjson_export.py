@@ -0,0 +1,45 @@
+"""Export Observations as NDJSON: direct encoding from raw inputs versus dumping Observation models."""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+from openimagingdatamodel.observation.ndjson import NDJSONWriter
+from openimagingdatamodel.observation.observation_factory import ObservationFactory
+
+from ._common import PULMONARY_NODULE_ROW, load_pulmonary_nodule_set, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=1_000_000, help="records written from raw inputs")
+    parser.add_argument("--model-count", type=int, default=20_000, help="records written from Observation models")
+    parser.add_argument("--gzip", action="store_true", help="compress the output")
+    args = parser.parse_args()
+
+    cde_set = load_pulmonary_nodule_set()
+    suffix = ".ndjson.gz" if args.gzip else ".ndjson"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "Observation" + suffix)
+
+        start = time.perf_counter()
+        with NDJSONWriter(path) as writer:
+            for _ in range(args.count):
+                writer.write_values(cde_set, PULMONARY_NODULE_ROW)
+        raw_time = time.perf_counter() - start
+        size = os.path.getsize(path)
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        report("NDJSONWriter.write_values", raw_time, args.count, unit="rec")
+        print(f"  {size / 1e6:,.1f} MB written, max RSS {max_rss / 1e3:,.1f} MB")
+
+        observations = ObservationFactory.create_observations(cde_set, [PULMONARY_NODULE_ROW] * args.model_count)
+        start = time.perf_counter()
+        with NDJSONWriter(path) as writer:
+            writer.write_many(observations)
+        report("create_observations + NDJSONWriter.write", time.perf_counter() - start, args.model_count, unit="rec")
+
+
+if __name__ == "__main__":
+    main()
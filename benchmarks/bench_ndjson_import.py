@@ -0,0 +1,39 @@
+"""Read Observations from NDJSON: routing fields only versus full `Observation.model_validate_json` per line."""
+
+import argparse
+import os
+import tempfile
+
+from openimagingdatamodel.observation.ndjson import NDJSONWriter, iter_observations
+from openimagingdatamodel.observation.observation import Observation
+
+from ._common import PULMONARY_NODULE_ROW, best_of, load_pulmonary_nodule_set, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=50_000, help="records in the file")
+    args = parser.parse_args()
+
+    cde_set = load_pulmonary_nodule_set()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "Observation.ndjson")
+        with NDJSONWriter(path) as writer:
+            for _ in range(args.count):
+                writer.write_values(cde_set, PULMONARY_NODULE_ROW)
+
+        def full() -> None:
+            with open(path, "rb") as f:
+                for line in f:
+                    Observation.model_validate_json(line)
+
+        def routing_fields() -> None:
+            for record in iter_observations(path, fields=("id", "code")):
+                record.code  # noqa: B018
+
+        report("Observation.model_validate_json", best_of(full, repeat=3), args.count, unit="rec")
+        report("iter_observations(fields=id, code)", best_of(routing_fields, repeat=3), args.count, unit="rec")
+
+
+if __name__ == "__main__":
+    main()
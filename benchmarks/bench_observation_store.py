@@ -0,0 +1,105 @@
+"""Memory and query time of an `ObservationStore` versus a list of `Observation` objects filtered in Python."""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from collections import Counter
+
+from openimagingdatamodel.observation.columnar import ObservationStore
+from openimagingdatamodel.observation.observation import Observation, Reference
+from openimagingdatamodel.observation.observation_factory import ObservationFactory
+
+from ._common import load_pulmonary_nodule_set, report
+
+LOCATIONS = ["left upper lobe", "left lower lobe", "lingula", "right upper lobe", "middle lobe", "right lower lobe"]
+COMPOSITIONS = ["solid", "ground glass", "part-solid"]
+
+
+def make_observations(count: int, subjects: int, seed: int = 0) -> list[Observation]:
+    cde_set = load_pulmonary_nodule_set()
+    rng = random.Random(seed)
+    return [
+        ObservationFactory.create_observation(
+            cde_set,
+            id=f"obs{n}",
+            subject=Reference(reference=f"Patient/{rng.randrange(subjects)}"),
+            component_values={
+                "Location": rng.choice(LOCATIONS),
+                "Composition": rng.choice(COMPOSITIONS),
+                "Size": round(rng.uniform(2, 30), 1),
+            },
+        )
+        for n in range(count)
+    ]
+
+
+def allocated(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def component_value(observation: Observation, code: str):
+    for component in observation.components:
+        if component.code.codings[0].code == code:
+            concept = getattr(component, "value_codeable_concept", None)
+            return concept.codings[0].code if concept else component.value_string  # type: ignore[union-attr]
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=100_000, help="Observations to load")
+    args = parser.parse_args()
+    subjects = max(args.count // 5, 1)
+
+    observations, objects_size = allocated(lambda: make_observations(args.count, subjects))
+    start = time.perf_counter()
+    ObservationStore(observations)
+    report("ObservationStore.add", time.perf_counter() - start, args.count)
+    store, store_size = allocated(lambda: ObservationStore(observations))
+    print(f"memory: Observation objects {objects_size / args.count:,.0f} B/obs")
+    print(f"        ObservationStore {store_size / args.count:,.0f} B/obs ({store.info()})")
+
+    location, composition = "RDE1304.2", "RDE1301.2"
+    start = time.perf_counter()
+    expected = [
+        o.id_
+        for o in observations
+        if component_value(o, "RDE1304") == location
+        and component_value(o, "RDE1301") == composition
+        and 10 <= float(component_value(o, "RDE1302")) <= 20
+    ]
+    report("filter: Python loop over objects", time.perf_counter() - start, 1, unit="query")
+    store.filter(values={"RDE1304": location})  # build the indexes once
+    store.filter(values={"RDE1301": composition, "RDE1302": (10, 20)})
+    start = time.perf_counter()
+    for _ in range(100):
+        rows = store.filter(values={"RDE1304": location, "RDE1301": composition, "RDE1302": (10, 20)})
+    report("filter: ObservationStore", time.perf_counter() - start, 100, unit="query")
+    assert store.ids(rows) == expected
+
+    start = time.perf_counter()
+    counts = Counter(component_value(o, "RDE1304") for o in observations if o.subject.reference.endswith("7"))
+    report("group by: Python loop over objects", time.perf_counter() - start, 1, unit="query")
+    wanted = [f"Patient/{n}" for n in range(subjects) if str(n).endswith("7")]
+    start = time.perf_counter()
+    for _ in range(10):
+        grouped = store.group_by("RDE1304", rows=store.filter(wanted))
+    report("group by: ObservationStore", time.perf_counter() - start, 10, unit="query")
+    assert grouped == dict(counts)
+
+    subject = observations[0].subject.reference
+    start = time.perf_counter()
+    for _ in range(1000):
+        store.filter(subject)
+    report("one subject's rows", time.perf_counter() - start, 1000, unit="query")
+
+
+if __name__ == "__main__":
+    main()
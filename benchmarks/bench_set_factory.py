@@ -0,0 +1,37 @@
+"""Convert a library of FindingModels to CDE Sets: serial loop versus `create_sets_from_finding_models`."""
+
+import argparse
+import os
+import time
+
+from openimagingdatamodel.cde_set.finding_model import FindingModel
+from openimagingdatamodel.cde_set.set_factory import SetFactory
+
+from ._common import REPO_ROOT, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=5_000, help="finding models to convert")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="worker processes")
+    args = parser.parse_args()
+
+    model = FindingModel.model_validate_json(
+        (REPO_ROOT / "notebooks" / "pulmonary_nodule_finding_model.json").read_text()
+    )
+    models = [model] * args.count
+
+    start = time.perf_counter()
+    for m in models:
+        SetFactory.create_set_from_finding_model(m)
+    report("create_set_from_finding_model (loop)", time.perf_counter() - start, args.count, unit="set")
+
+    for workers in sorted({1, args.workers}):
+        start = time.perf_counter()
+        for _ in SetFactory.create_sets_from_finding_models(models, workers=workers):
+            pass
+        report(f"create_sets_from_finding_models (w={workers})", time.perf_counter() - start, args.count, unit="set")
+
+
+if __name__ == "__main__":
+    main()
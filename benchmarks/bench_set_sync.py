@@ -0,0 +1,47 @@
+"""Bring a library of published sets up to date after a few FindingModel edits: regenerate every set and re-apply
+the ID mapping, versus `sync_set_with_finding_model`."""
+
+import argparse
+import json
+import random
+import time
+
+from openimagingdatamodel.cde_set.finding_model import FindingModel
+from openimagingdatamodel.cde_set.set_factory import SetFactory
+
+from ._common import REPO_ROOT, load_pulmonary_nodule_set, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=5_000, help="sets in the library")
+    parser.add_argument("--edited", type=float, default=0.01, help="fraction of models edited")
+    args = parser.parse_args()
+
+    data = json.loads((REPO_ROOT / "notebooks" / "pulmonary_nodule_finding_model.json").read_text())
+    mapping = json.loads((REPO_ROOT / "notebooks" / "pulmonary_nodule_id_mapping.json").read_text())
+    models = [FindingModel.model_validate(data) for _ in range(args.count)]
+    rng = random.Random(0)
+    edited = set(rng.sample(range(args.count), int(args.count * args.edited)))
+    for i in edited:
+        models[i].description += " (revised)"
+        models[i].attributes[0].description = "Revised composition"
+
+    start = time.perf_counter()
+    for model in models:
+        cde_set = SetFactory.create_set_from_finding_model(model)
+        SetFactory.update_set_ids_from_dict(cde_set, mapping)
+    report("regenerate + update_set_ids_from_dict", time.perf_counter() - start, args.count, unit="set")
+
+    library = [load_pulmonary_nodule_set() for _ in range(args.count)]
+    start = time.perf_counter()
+    diffs = [
+        SetFactory.sync_set_with_finding_model(cde_set, model) for cde_set, model in zip(library, models, strict=True)
+    ]
+    report("sync_set_with_finding_model", time.perf_counter() - start, args.count, unit="set")
+    changed = [diff for diff in diffs if diff.changed]
+    print(f"  {len(changed)} sets changed, {sum(len(d.modified_elements) for d in changed)} elements modified")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Heap held by a batch of Observations with new codes for each versus shared immutable codes."""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from openimagingdatamodel.observation.observation_factory import ObservationFactory
+
+from ._common import PULMONARY_NODULE_ROW, load_pulmonary_nodule_set, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=100_000, help="observations held in memory")
+    args = parser.parse_args()
+
+    cde_set = load_pulmonary_nodule_set()
+    rows = [PULMONARY_NODULE_ROW] * args.count
+    results = {}
+    for shared_codes in (False, True):
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        observations = list(ObservationFactory.create_observations(cde_set, rows, shared_codes=shared_codes))
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        results[shared_codes] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        # Timed with tracemalloc running, so only useful for comparing the two modes
+        report(f"create_observations (shared_codes={shared_codes})", elapsed, args.count)
+        del observations
+
+    for shared_codes, heap in results.items():
+        label = "shared codes" if shared_codes else "new codes"
+        print(f"{label:<14} {heap / 1e6:8.1f} MB  {heap / args.count:8.0f} B/obs")
+    print(f"Reduction: {results[False] / results[True]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Bulk-load Observations into a `SQLiteStore` and time indexed queries against a linear scan of the JSON.
+
+The default of 10M Observations needs around 10 GB of disk and a while to load; use `-n` for a smaller run.
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator
+
+from openimagingdatamodel.observation.observation import Observation, Reference
+from openimagingdatamodel.observation.observation_factory import ObservationFactory
+from openimagingdatamodel.store import SQLiteStore
+
+from ._common import load_pulmonary_nodule_set, report
+
+LOCATIONS = ["left upper lobe", "left lower lobe", "lingula", "right upper lobe", "middle lobe", "right lower lobe"]
+COMPOSITIONS = ["solid", "ground glass", "part-solid"]
+
+
+def make_observations(count: int, subjects: int, seed: int = 0) -> Iterator[Observation]:
+    """Yield `count` Observations, reusing a few templates with a new ID, subject and size each time."""
+    cde_set = load_pulmonary_nodule_set()
+    rng = random.Random(seed)
+    templates = [
+        ObservationFactory.create_observation(
+            cde_set, component_values={"Location": location, "Composition": composition, "Size": 10.0}
+        )
+        for location in LOCATIONS
+        for composition in COMPOSITIONS
+    ]
+    for n in range(count):
+        observation = rng.choice(templates)
+        observation.id_ = f"obs{n}"
+        observation.subject = Reference(reference=f"Patient/{rng.randrange(subjects)}")
+        observation.components[-1].value_string = f"{rng.uniform(2, 30):.1f}"  # type: ignore[union-attr]
+        yield observation
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=10_000_000, help="Observations to load")
+    parser.add_argument("--subjects", type=int, default=None, help="distinct subjects (default count / 5)")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--dir", default=None, help="directory for the database (default: a temporary one)")
+    args = parser.parse_args()
+    subjects = args.subjects or max(args.count // 5, 1)
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        path = Path(tmp) / "bench.sqlite"
+        with SQLiteStore(path) as store:
+            store.add_set(load_pulmonary_nodule_set())
+            start = time.perf_counter()
+            store.add_observations(make_observations(args.count, subjects), batch_size=args.batch_size)
+            store.optimize()
+            load_time = time.perf_counter() - start
+            report("bulk insert", load_time, args.count)
+            print(f"{store.info()}; {path.stat().st_size / 1e6:,.0f} MB")
+
+            rng = random.Random(1)
+            queries = [(f"Patient/{rng.randrange(subjects)}", {"RDE1304": rng.choice(LOCATIONS)}) for _ in range(1000)]
+            start = time.perf_counter()
+            found = sum(len(list(store.find_observations(subject, values=values))) for subject, values in queries)
+            report("subject + location", time.perf_counter() - start, len(queries), unit="query")
+            print(f"  {found} Observations found; plan: {store.query_plan(*queries[0][:1], values=queries[0][1])}")
+
+            start = time.perf_counter()
+            counts = [
+                store.count_observations(values={"RDE1304": location, "RDE1301": "part-solid", "RDE1302": (20, 30)})
+                for location in LOCATIONS
+            ]
+            report("count location + composition + size", time.perf_counter() - start, len(LOCATIONS), unit="query")
+            print(f"  counts: {counts}")
+
+            # What the request replaces: read every Observation's JSON and filter in Python
+            subject, values = queries[0]
+            start = time.perf_counter()
+            scan_limit = min(args.count, 200_000)
+            for observation in make_observations(scan_limit, subjects):
+                data = json.loads(observation.model_dump_json(by_alias=True, exclude_none=True))
+                _ = data["subject"]["reference"] == subject
+            scan_time = (time.perf_counter() - start) * args.count / scan_limit
+            report("linear scan of JSON (extrapolated)", scan_time, 1, unit="query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Validation time with the discriminated Component/CDEElement unions versus the equivalent plain unions."""
+
+import argparse
+from typing import Union
+
+from openimagingdatamodel.cde_set.element import BooleanElement, FloatElement, IntegerElement, ValueSetElement
+from openimagingdatamodel.cde_set.set import CDESet
+from openimagingdatamodel.observation.observation import (
+    BooleanComponent,
+    CodeableConceptComponent,
+    IntegerComponent,
+    Observation,
+    StringComponent,
+)
+from pydantic import Field
+
+from ._common import PULMONARY_NODULE_SET_FILE, SAMPLE_OBSERVATION_FILE, best_of, report
+
+
+class PlainUnionObservation(Observation):
+    components: list[CodeableConceptComponent | StringComponent | IntegerComponent | BooleanComponent] = Field(
+        default_factory=list, alias="component"
+    )
+
+
+class PlainUnionCDESet(CDESet):
+    elements: list[Union[ValueSetElement, FloatElement, IntegerElement, BooleanElement]] = Field(default_factory=list)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=5_000, help="validations per run")
+    args = parser.parse_args()
+
+    cases = [
+        ("sample observation", SAMPLE_OBSERVATION_FILE.read_bytes(), PlainUnionObservation, Observation),
+        ("RDES195 CDE set", PULMONARY_NODULE_SET_FILE.read_bytes(), PlainUnionCDESet, CDESet),
+    ]
+    for label, data, plain_model, model in cases:
+        plain_time = best_of(lambda m=plain_model, d=data: [m.model_validate_json(d) for _ in range(args.count)])
+        tagged_time = best_of(lambda m=model, d=data: [m.model_validate_json(d) for _ in range(args.count)])
+        report(f"{label}: plain union", plain_time, args.count, unit="doc")
+        report(f"{label}: discriminated union", tagged_time, args.count, unit="doc")
+        print(f"  speedup: {plain_time / tagged_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
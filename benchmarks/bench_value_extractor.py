@@ -0,0 +1,99 @@
+"""Find CDE values in synthetic report text: one regex per term in a loop versus `ValueExtractor`."""
+
+import argparse
+import random
+import re
+import tempfile
+import time
+
+from openimagingdatamodel.cde_set.extractor import ValueExtractor
+from openimagingdatamodel.cde_set.set import CDESet
+from openimagingdatamodel.cde_set.set_factory import SetFactory
+
+from ._common import best_of, report
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "vo", "si", "de", "pa", "gu", "fe"]
+FILLER = ["the", "patient", "was", "imaged", "with", "contrast", "and", "there", "is", "no", "acute", "change"]
+
+
+def make_word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def make_sets(count: int, rng: random.Random) -> list[CDESet]:
+    sets = []
+    for n in range(count):
+        cde_set = SetFactory.create_set(f"finding {make_word(rng)} {n}")
+        for _ in range(4):
+            values = [" ".join(make_word(rng) for _ in range(rng.randint(1, 2))) for _ in range(5)]
+            cde_set.elements.append(SetFactory.create_value_set_element(make_word(rng), values))
+        cde_set.elements.append(SetFactory.create_float_element(f"{make_word(rng)} size", unit="mm"))
+        sets.append(cde_set)
+    return sets
+
+
+def make_reports(sets: list[CDESet], count: int, rng: random.Random) -> list[str]:
+    reports = []
+    for _ in range(count):
+        sentences = []
+        for _ in range(6):
+            element = rng.choice(rng.choice(sets).elements)
+            words = rng.sample(FILLER, 6)
+            if hasattr(element, "value_set"):
+                words += [element.name, rng.choice(element.value_set.values).name]
+            else:
+                words += [element.name, f"{rng.uniform(1, 30):.1f} mm"]
+            sentences.append(" ".join(words).capitalize() + ".")
+        reports.append(" ".join(sentences))
+    return reports
+
+
+def regex_terms(sets: list[CDESet]) -> list[re.Pattern[str]]:
+    terms = set()
+    for cde_set in sets:
+        for element in cde_set.elements:
+            terms.add(element.name)
+            for value in getattr(getattr(element, "value_set", None), "values", ()):
+                terms.update(term for term in (value.name, value.value) if term)
+    return [re.compile(r"\b" + re.escape(term) + r"\b", re.IGNORECASE) for term in terms]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-s", "--sets", type=int, nargs="+", default=[10, 100, 1000], help="catalog sizes")
+    parser.add_argument("-n", "--reports", type=int, default=1000, help="reports per run")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for set_count in args.sets:
+        sets = make_sets(set_count, rng)
+        reports = make_reports(sets, args.reports, rng)
+        start = time.perf_counter()
+        extractor = ValueExtractor(sets)
+        build_time = time.perf_counter() - start
+        with tempfile.TemporaryDirectory() as cache_dir:
+            ValueExtractor.cached(sets, cache_dir)
+            start = time.perf_counter()
+            ValueExtractor.cached(sets, cache_dir)
+            load_time = time.perf_counter() - start
+        patterns = regex_terms(sets)
+
+        def regex_loop(patterns: list[re.Pattern[str]] = patterns, reports: list[str] = reports) -> None:
+            for text in reports:
+                for pattern in patterns:
+                    pattern.findall(text)
+
+        def automaton(extractor: ValueExtractor = extractor, reports: list[str] = reports) -> None:
+            for text in reports:
+                extractor.find(text)
+
+        print(f"{set_count:,} sets: {extractor.info()}; build {build_time:.3f} s, load from cache {load_time:.3f} s")
+        regex_time = best_of(regex_loop, repeat=3)
+        automaton_time = best_of(automaton, repeat=3)
+        report(f"  regex per term ({len(patterns):,} terms)", regex_time, args.reports, unit="report")
+        report("  ValueExtractor.find", automaton_time, args.reports, unit="report")
+        print(f"  speedup {regex_time / automaton_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,47 @@
-from .cde_set import CDEElement as CDEElement
-from .cde_set import CDESet as CDESet
-from .observation import Observation as Observation
+"""Open Imaging Data Model: CDE Sets and the FHIR Observations made from them.
+
+Names are imported on first use (PEP 562), so importing the package, or just one of its subpackages,
+doesn't build the models of the others.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from .cde_set import CDEElement as CDEElement
+    from .cde_set import CDESet as CDESet
+    from .observation import Observation as Observation
+
+
+def _lazy_loader(
+    namespace: dict[str, Any], lazy: dict[str, str]
+) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """Make the module `__getattr__` and `__dir__` of a package whose names in `lazy` (name -> submodule
+    that defines it) are imported on first use; `namespace` is the package's `globals()`."""
+    package = namespace["__name__"]
+
+    def __getattr__(name: str) -> Any:
+        if name not in lazy:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(lazy[name], package), name)
+        namespace[name] = value
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted({*namespace, *lazy})
+
+    return __getattr__, __dir__
+
+
+# Name -> submodule that defines it
+_LAZY: dict[str, str] = {
+    "CDEElement": ".cde_set.element",
+    "CDESet": ".cde_set.set",
+    "Observation": ".observation.observation",
+}
+
+__all__ = ["CDEElement", "CDESet", "Observation"]
+
+__getattr__, __dir__ = _lazy_loader(globals(), _LAZY)
@@ -1,6 +1,44 @@
-from .element import CDEElement as CDEElement
-from .finding_model import FindingModel as FindingModel
-from .set import CDESet as CDESet
-from .set_factory import SetFactory as SetFactory
+from __future__ import annotations
 
-__all__ = ["CDESet", "CDEElement", "FindingModel", "SetFactory"]
+from typing import TYPE_CHECKING
+
+from .. import _lazy_loader
+
+if TYPE_CHECKING:
+    from .compact import CompactCDESet as CompactCDESet
+    from .element import CDEElement as CDEElement
+    from .finding_model import FindingModel as FindingModel
+    from .index import CDEIndex as CDEIndex
+    from .registry import CDESetRegistry as CDESetRegistry
+    from .search import CatalogSearchIndex as CatalogSearchIndex
+    from .set import CDESet as CDESet
+    from .set_factory import SetFactory as SetFactory
+    from .snapshot import CDECatalogSnapshot as CDECatalogSnapshot
+
+# Imported on first use (PEP 562); see the package __init__
+_LAZY: dict[str, str] = {
+    "CDECatalogSnapshot": ".snapshot",
+    "CompactCDESet": ".compact",
+    "CDESet": ".set",
+    "CDEElement": ".element",
+    "CDEIndex": ".index",
+    "CDESetRegistry": ".registry",
+    "CatalogSearchIndex": ".search",
+    "FindingModel": ".finding_model",
+    "SetFactory": ".set_factory",
+}
+
+__all__ = [
+    "CDECatalogSnapshot",
+    "CompactCDESet",
+    "CDESet",
+    "CDEElement",
+    "CDEIndex",
+    "CDESetRegistry",
+    "CatalogSearchIndex",
+    "FindingModel",
+    "SetFactory",
+]
+
+
+__getattr__, __dir__ = _lazy_loader(globals(), _LAZY)
@@ -0,0 +1,54 @@
+"""Load many CDE Sets from JSON, keeping going past bad ones (see `openimagingdatamodel.quarantine`)."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from openimagingdatamodel.quarantine import BulkLoader, QuarantineWriter, RawRecord, iter_ndjson_lines
+
+from .registry import DEFAULT_PATTERN
+from .set import CDESet
+
+
+def iter_set_records(
+    sources: Iterable[str | os.PathLike[str]], /, pattern: str = DEFAULT_PATTERN
+) -> Iterator[RawRecord]:
+    """Read CDE Set JSON as raw records, without parsing it.
+
+    Each source is a directory (its files matching `pattern` are read, in name order), a JSON file
+    holding one set, or an NDJSON file (`.ndjson`, optionally gzip-compressed as `.ndjson.gz`) with
+    one set per line.
+    """
+    for source in sources:
+        path = Path(source)
+        files = sorted(path.glob(pattern)) if path.is_dir() else [path]
+        for file in files:
+            name = os.fspath(file)
+            if name.endswith((".ndjson", ".ndjson.gz")):
+                yield from (RawRecord(name, offset, line) for offset, line in iter_ndjson_lines(name))
+            else:
+                yield RawRecord(name, 0, file.read_bytes())
+
+
+def load_sets(
+    sources: Iterable[str | os.PathLike[str]],
+    /,
+    quarantine: str | os.PathLike[str] | QuarantineWriter | None = None,
+    check: Callable[[CDESet], Any] | None = None,
+    pattern: str = DEFAULT_PATTERN,
+    max_errors: int = 1000,
+) -> BulkLoader[CDESet]:
+    """Get a loader that yields the valid CDE Sets from `sources` (see `iter_set_records`).
+
+    Sets that fail validation, or for which `check` raises a `ValueError`, are skipped, recorded in the
+    loader's `report` (a `LoadReport`) and, if `quarantine` is given, written to that NDJSON file.
+    """
+    return BulkLoader(
+        iter_set_records(sources, pattern=pattern),
+        CDESet.model_validate_json,
+        check=check,
+        quarantine=quarantine,
+        max_errors=max_errors,
+    )
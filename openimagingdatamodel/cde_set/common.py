@@ -1,10 +1,11 @@
 from typing import Annotated, Literal
 
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 
 
 # Change Specialty to Specialties
 class Specialty(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     abbreviation: Literal[
         "AB", "BR", "CA", "CH", "ER", "GI", "GU", "HN", "IR", "MI", "MK", "NR", "OB", "OI", "OT", "PD", "QI", "RS", "VA"
     ]
@@ -35,6 +36,7 @@ SPECIALTY_NAMES = {
 
 
 class Version(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     number: int  # TODO: Minimum 1
     date: str  # TODO: Add date format
 
@@ -49,16 +51,19 @@ SchemaVersion = Annotated[
 
 
 class Status(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     date: str  # TODO: Add date format
     name: Literal["Proposed", "Published", "Retired"]
 
 
 class Event(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     date: str  # TODO: Add date format
     status: Status
 
 
 class Organization(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     name: str
     url: HttpUrl | None = None
     abbreviation: str | None = None
@@ -67,6 +72,7 @@ class Organization(BaseModel):
 
 
 class Person(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     name: str
     email: str  # TODO: Add email format
     affiliation: str | None = None
@@ -77,11 +83,13 @@ class Person(BaseModel):
 
 
 class Contributors(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     people: list[Person] = Field(default_factory=list)
     organizations: list[Organization] = Field(default_factory=list)
 
 
 class Reference(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     citation: str = Field(
         description="Required - Provide a bibliographic citation, including all the author names (no et Al)"
     )
@@ -91,6 +99,7 @@ class Reference(BaseModel):
 
 
 class IndexCode(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     system: Literal["RADLEX", "SNOMEDCT", "LOINC", "ACRCOMMON"] | None = None
     code: str | None = None
     display: str | None = None
@@ -98,11 +107,13 @@ class IndexCode(BaseModel):
 
 
 class BodyPart(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     name: str
     index_codes: list[IndexCode] | None = None
 
 
 class Image(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     url: HttpUrl
     height: int | None = None
     width: int | None = None
@@ -0,0 +1,385 @@
+"""Read-only, memory-compact versions of CDE Sets for holding large catalogs in memory."""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Literal
+
+from .element import (
+    BooleanElement,
+    CDEElement,
+    FloatElement,
+    IntegerElement,
+    ValueSetElement,
+    ValueSetValue,
+    element_tag,
+)
+from .set import CDESet
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+    from .common import Event, IndexCode, Specialty, Status, Version
+
+ElementKind = Literal["value_set", "float_value", "integer_value", "boolean_value"]
+
+# Only a handful of distinct versions, statuses, codes and ranges appear across a catalog, so one shared
+# instance of each is handed out; the caches are bounded in case a catalog has unusually many
+_FLYWEIGHT_CACHE_SIZE = 8192
+
+
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if value is not None else None
+
+
+def _copy_models(models: list[Any] | None) -> tuple[Any, ...] | None:
+    return tuple(m.model_copy(deep=True) for m in models) if models is not None else None
+
+
+def _dump_models(models: tuple[BaseModel, ...] | None) -> list[dict[str, Any]] | None:
+    return [m.model_dump() for m in models] if models is not None else None
+
+
+@dataclass(frozen=True, slots=True)
+class CompactVersion:
+    number: int
+    date: str
+
+    @staticmethod
+    @lru_cache(maxsize=_FLYWEIGHT_CACHE_SIZE)
+    def get(number: int, date: str) -> CompactVersion:
+        return CompactVersion(number, sys.intern(date))
+
+    @staticmethod
+    def from_model(version: Version) -> CompactVersion:
+        return CompactVersion.get(version.number, version.date)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"number": self.number, "date": self.date}
+
+
+@dataclass(frozen=True, slots=True)
+class CompactStatus:
+    date: str
+    name: Literal["Proposed", "Published", "Retired"]
+
+    @staticmethod
+    @lru_cache(maxsize=_FLYWEIGHT_CACHE_SIZE)
+    def get(date: str, name: Literal["Proposed", "Published", "Retired"]) -> CompactStatus:
+        return CompactStatus(sys.intern(date), sys.intern(name))  # type: ignore[arg-type]
+
+    @staticmethod
+    def from_model(status: Status) -> CompactStatus:
+        return CompactStatus.get(status.date, status.name)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"date": self.date, "name": self.name}
+
+
+@dataclass(frozen=True, slots=True)
+class CompactEvent:
+    date: str
+    status: CompactStatus
+
+    @staticmethod
+    @lru_cache(maxsize=_FLYWEIGHT_CACHE_SIZE)
+    def get(date: str, status: CompactStatus) -> CompactEvent:
+        return CompactEvent(sys.intern(date), status)
+
+    @staticmethod
+    def from_model(event: Event) -> CompactEvent:
+        return CompactEvent.get(event.date, CompactStatus.from_model(event.status))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"date": self.date, "status": self.status.to_dict()}
+
+
+@dataclass(frozen=True, slots=True)
+class CompactSpecialty:
+    abbreviation: str
+    name: str
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get(abbreviation: str, name: str) -> CompactSpecialty:
+        return CompactSpecialty(sys.intern(abbreviation), sys.intern(name))
+
+    @staticmethod
+    def from_model(specialty: Specialty) -> CompactSpecialty:
+        return CompactSpecialty.get(specialty.abbreviation, specialty.name)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"abbreviation": self.abbreviation, "name": self.name}
+
+
+@dataclass(frozen=True, slots=True)
+class CompactIndexCode:
+    system: str | None = None
+    code: str | None = None
+    display: str | None = None
+    url: str | None = None
+
+    @staticmethod
+    @lru_cache(maxsize=_FLYWEIGHT_CACHE_SIZE)
+    def get(system: str | None, code: str | None, display: str | None, url: str | None) -> CompactIndexCode:
+        return CompactIndexCode(_intern(system), _intern(code), _intern(display), _intern(url))
+
+    @staticmethod
+    def from_model(index_code: IndexCode) -> CompactIndexCode:
+        url = str(index_code.url) if index_code.url is not None else None
+        return CompactIndexCode.get(index_code.system, index_code.code, index_code.display, url)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"system": self.system, "code": self.code, "display": self.display, "url": self.url}
+
+
+@dataclass(frozen=True, slots=True)
+class CompactRange:
+    """The `float_value`/`integer_value` of a numeric element."""
+
+    min: float | None = None
+    max: float | None = None
+    step: float | None = None
+    unit: str | None = None
+
+    @staticmethod
+    @lru_cache(maxsize=_FLYWEIGHT_CACHE_SIZE, typed=True)  # Keep integer and float ranges apart
+    def get(min: float | None, max: float | None, step: float | None, unit: str | None) -> CompactRange:
+        return CompactRange(min, max, step, _intern(unit))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"min": self.min, "max": self.max, "step": self.step, "unit": self.unit}
+
+
+def _index_codes(index_codes: list[IndexCode] | None) -> tuple[CompactIndexCode, ...] | None:
+    return tuple(CompactIndexCode.from_model(ic) for ic in index_codes) if index_codes is not None else None
+
+
+def _index_code_dicts(index_codes: tuple[CompactIndexCode, ...] | None) -> list[dict[str, Any]] | None:
+    return [ic.to_dict() for ic in index_codes] if index_codes is not None else None
+
+
+def _events(history: list[Event] | None) -> tuple[CompactEvent, ...] | None:
+    return tuple(CompactEvent.from_model(e) for e in history) if history is not None else None
+
+
+def _event_dicts(history: tuple[CompactEvent, ...] | None) -> list[dict[str, Any]] | None:
+    return [e.to_dict() for e in history] if history is not None else None
+
+
+def _specialties(specialties: list[Specialty] | None) -> tuple[CompactSpecialty, ...] | None:
+    return tuple(CompactSpecialty.from_model(s) for s in specialties) if specialties is not None else None
+
+
+def _specialty_dicts(specialties: tuple[CompactSpecialty, ...] | None) -> list[dict[str, Any]] | None:
+    return [s.to_dict() for s in specialties] if specialties is not None else None
+
+
+@dataclass(frozen=True, slots=True)
+class CompactValue:
+    code: str
+    name: str
+    value: str | None = None
+    definition: str | None = None
+    index_codes: tuple[CompactIndexCode, ...] | None = None
+    images: tuple[Any, ...] | None = None  # Image models, copied; rare enough not to need a compact form
+
+    @staticmethod
+    def from_model(value: ValueSetValue) -> CompactValue:
+        return CompactValue(
+            code=sys.intern(value.code),
+            name=sys.intern(value.name),
+            value=_intern(value.value),
+            definition=value.definition,
+            index_codes=_index_codes(value.index_codes),
+            images=_copy_models(value.images),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "code": self.code,
+            "value": self.value,
+            "name": self.name,
+            "definition": self.definition,
+            "index_codes": _index_code_dicts(self.index_codes),
+            "images": _dump_models(self.images),
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class CompactElement:
+    """One element of any type; `values` is set for value set elements and `range` for numeric ones."""
+
+    kind: ElementKind
+    id: str
+    name: str
+    element_version: CompactVersion
+    schema_version: str
+    status: CompactStatus
+    parent_set: str | None = None
+    definition: str | None = None
+    question: str | None = None
+    index_codes: tuple[CompactIndexCode, ...] | None = None
+    history: tuple[CompactEvent, ...] | None = None
+    specialties: tuple[CompactSpecialty, ...] | None = None
+    source: str | None = None
+    min_cardinality: int | None = None
+    max_cardinality: int | None = None
+    values: tuple[CompactValue, ...] | None = None
+    range: CompactRange | None = None
+    contributors: Any = None  # Contributors model, copied
+    references: tuple[Any, ...] | None = None  # Reference models, copied
+
+    @staticmethod
+    def from_model(element: CDEElement) -> CompactElement:
+        kind: ElementKind = element_tag(element)  # type: ignore[assignment]
+        extra: dict[str, Any] = {}
+        if isinstance(element, ValueSetElement):
+            extra["min_cardinality"] = element.value_set.min_cardinality
+            extra["max_cardinality"] = element.value_set.max_cardinality
+            extra["values"] = tuple(CompactValue.from_model(v) for v in element.value_set.values)
+        elif isinstance(element, (FloatElement, IntegerElement)):
+            r = element.float_value if isinstance(element, FloatElement) else element.integer_value
+            extra["range"] = CompactRange.get(r.min, r.max, r.step, r.unit)
+        return CompactElement(
+            kind=kind,
+            id=sys.intern(element.id),
+            name=sys.intern(element.name),
+            element_version=CompactVersion.from_model(element.element_version),
+            schema_version=sys.intern(element.schema_version),
+            status=CompactStatus.from_model(element.status),
+            parent_set=_intern(element.parent_set),
+            definition=element.definition,
+            question=_intern(element.question),
+            index_codes=_index_codes(element.index_codes),
+            history=_events(element.history),
+            specialties=_specialties(element.specialties),
+            source=_intern(element.source),
+            contributors=element.contributors.model_copy(deep=True) if element.contributors is not None else None,
+            references=_copy_models(element.references),
+            **extra,
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "id": self.id,
+            "parent_set": self.parent_set,
+            "name": self.name,
+            "definition": self.definition,
+            "question": self.question,
+            "element_version": self.element_version.to_dict(),
+            "schema_version": self.schema_version,
+            "status": self.status.to_dict(),
+            "index_codes": _index_code_dicts(self.index_codes),
+            "contributors": self.contributors.model_dump() if self.contributors is not None else None,
+            "history": _event_dicts(self.history),
+            "specialties": _specialty_dicts(self.specialties),
+            "references": _dump_models(self.references),
+            "source": self.source,
+        }
+        if self.kind == "value_set":
+            data["value_set"] = {
+                "min_cardinality": self.min_cardinality,
+                "max_cardinality": self.max_cardinality,
+                "values": [v.to_dict() for v in self.values or ()],
+            }
+        elif self.kind == "boolean_value":
+            data["boolean_value"] = "boolean"
+        else:
+            data[self.kind] = (self.range or CompactRange()).to_dict()
+        return data
+
+    def to_model(self) -> CDEElement:
+        if self.kind == "value_set":
+            return ValueSetElement.model_validate(self.to_dict())
+        if self.kind == "float_value":
+            return FloatElement.model_validate(self.to_dict())
+        if self.kind == "integer_value":
+            return IntegerElement.model_validate(self.to_dict())
+        return BooleanElement.model_validate(self.to_dict())
+
+    def get_value(self, val: str) -> CompactValue:
+        """Get a value by code or value or name."""
+        key = val.casefold()
+        for v in self.values or ():
+            if key in (v.code.casefold(), v.name.casefold()) or (v.value is not None and v.value.casefold() == key):
+                return v
+        raise ValueError(f"Value '{val}' not found in ValueSet")
+
+
+@dataclass(frozen=True, slots=True)
+class CompactCDESet:
+    """A read-only CDE Set that takes a fraction of the memory of a `CDESet`.
+
+    Classes are frozen and slotted, and collections are tuples. Repeated strings (codes, names, dates,
+    schema versions) are interned, and equal versions, statuses, events, specialties, index codes and
+    numeric ranges are shared between all the sets in the process. Contributors, references, body
+    parts and images are rare, so they are kept as (copied) models. Convert with `from_model` and
+    `to_model`.
+    """
+
+    id: str
+    name: str
+    description: str
+    set_version: CompactVersion
+    schema_version: str
+    status: CompactStatus
+    url: str | None = None
+    index_codes: tuple[CompactIndexCode, ...] = ()
+    body_parts: tuple[Any, ...] | None = None  # BodyPart models, copied
+    contributors: Any = None  # Contributors model, copied
+    history: tuple[CompactEvent, ...] = ()
+    specialties: tuple[CompactSpecialty, ...] = ()
+    elements: tuple[CompactElement, ...] = ()
+    references: tuple[Any, ...] | None = None  # Reference models, copied
+
+    @staticmethod
+    def from_model(cde_set: CDESet) -> CompactCDESet:
+        return CompactCDESet(
+            id=sys.intern(cde_set.id),
+            name=sys.intern(cde_set.name),
+            description=cde_set.description,
+            set_version=CompactVersion.from_model(cde_set.set_version),
+            schema_version=sys.intern(cde_set.schema_version),
+            status=CompactStatus.from_model(cde_set.status),
+            url=str(cde_set.url) if cde_set.url is not None else None,
+            index_codes=_index_codes(cde_set.index_codes) or (),
+            body_parts=_copy_models(cde_set.body_parts),
+            contributors=cde_set.contributors.model_copy(deep=True) if cde_set.contributors is not None else None,
+            history=_events(cde_set.history) or (),
+            specialties=_specialties(cde_set.specialties) or (),
+            elements=tuple(CompactElement.from_model(el) for el in cde_set.elements),
+            references=_copy_models(cde_set.references),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "set_version": self.set_version.to_dict(),
+            "schema_version": self.schema_version,
+            "status": self.status.to_dict(),
+            "url": self.url,
+            "index_codes": _index_code_dicts(self.index_codes),
+            "body_parts": _dump_models(self.body_parts),
+            "contributors": self.contributors.model_dump() if self.contributors is not None else None,
+            "history": _event_dicts(self.history),
+            "specialties": _specialty_dicts(self.specialties),
+            "elements": [el.to_dict() for el in self.elements],
+            "references": _dump_models(self.references),
+        }
+
+    def to_model(self) -> CDESet:
+        """Build a new (mutable) `CDESet` equal to the one this was made from."""
+        return CDESet.model_validate(self.to_dict())
+
+    def get_element(self, element: str) -> CompactElement:
+        """Get a component element by name or ID."""
+        key = element.casefold()
+        for el in self.elements:
+            if el.id.casefold() == key or el.name.casefold() == key:
+                return el
+        raise ValueError(f"Element '{element}' not found in CDE Set '{self.id}' ({self.name})")
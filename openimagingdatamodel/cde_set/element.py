@@ -1,6 +1,6 @@
-from typing import Literal, Union
+from typing import Annotated, Any, Literal, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Discriminator, Field, PrivateAttr, Tag
 
 from .common import (
     Contributors,
@@ -13,9 +13,11 @@ from .common import (
     Status,
     Version,
 )
+from .lookup import LookupIndex
 
 
 class BaseElement(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     id: str = Field(pattern="^(RDE|TO_BE_DETERMINED)\d+")
     parent_set: str | None = Field(default=None, pattern="^(RDES|TO_BE_DETERMINED)\d+")
     name: str
@@ -33,6 +35,7 @@ class BaseElement(BaseModel):
 
 
 class ValueSetValue(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     code: str = Field(pattern="^(RDE|TO_BE_DETERMINED)\d+\.\d+")
     value: str | None = None
     name: str
@@ -42,29 +45,34 @@ class ValueSetValue(BaseModel):
 
 
 class ValueSet(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     min_cardinality: int  # TODO: Minimum value is 0
     max_cardinality: int | None = None
     values: list[ValueSetValue]  # TODO: Minimum length is 2
 
 
+def _value_keys(value: ValueSetValue) -> tuple[str, str | None, str]:
+    return value.code, value.value, value.name
+
+
 class ValueSetElement(BaseElement):
     value_set: ValueSet
+    _value_index: LookupIndex[ValueSetValue] = PrivateAttr(default_factory=lambda: LookupIndex(_value_keys))
 
     def get_value(self, val: str) -> ValueSetValue:
         """Get a ValueSetValue by code or value or name."""
-        if not hasattr(self, "_value_index"):
-            self._value_index = {}
-            for v in self.value_set.values:
-                self._value_index[v.code.casefold()] = v
-                self._value_index[v.value.casefold()] = v
-                self._value_index[v.name.casefold()] = v
-        if val.casefold() in self._value_index:
-            return self._value_index[val.casefold()]
-        raise ValueError(f"Value '{v}' not found in ValueSet")
+        if (found := self._value_index.find(self.value_set.values, val)) is None:
+            raise ValueError(f"Value '{val}' not found in ValueSet")
+        return found
+
+    def value_index_info(self) -> dict[str, int]:
+        """Report hits, misses and rebuilds of the index behind `get_value`."""
+        return self._value_index.info()
 
 
 # This corresponds to the floatElementSchema class in the cdElement.ts file
 class FloatValue(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     min: float | None = None
     max: float | None = None
     step: float | None = None
@@ -76,6 +84,7 @@ class FloatElement(BaseElement):
 
 
 class IntegerValue(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     min: int | None = None
     max: int | None = None
     step: int | None = None
@@ -91,5 +100,36 @@ class BooleanElement(BaseElement):
     boolean_value: Literal["boolean"]
 
 
+_ELEMENT_VALUE_KEYS: tuple[str, ...] = ("value_set", "float_value", "integer_value", "boolean_value")
+_ELEMENT_CLASS_TAGS: dict[type[BaseElement], str] = {
+    ValueSetElement: "value_set",
+    FloatElement: "float_value",
+    IntegerElement: "integer_value",
+    BooleanElement: "boolean_value",
+}
+
+
+def element_tag(value: Any) -> str | None:
+    """Pick the element type from its `value_set`/`*_value` key, so validation goes straight to the right
+    union member instead of trying them in turn."""
+    if isinstance(value, dict):
+        for key in _ELEMENT_VALUE_KEYS:
+            if key in value:
+                return key
+        return None
+    for cls, tag in _ELEMENT_CLASS_TAGS.items():
+        if isinstance(value, cls):
+            return tag
+    return None
+
+
 # Define a type CDElement which can be either a ValueSetElement, FloatElement, IntegerElement or BooleanElement
-CDEElement = Union[ValueSetElement, FloatElement, IntegerElement, BooleanElement]
+CDEElement = Annotated[
+    Union[
+        Annotated[ValueSetElement, Tag("value_set")],
+        Annotated[FloatElement, Tag("float_value")],
+        Annotated[IntegerElement, Tag("integer_value")],
+        Annotated[BooleanElement, Tag("boolean_value")],
+    ],
+    Discriminator(element_tag),
+]
@@ -0,0 +1,327 @@
+"""Find CDE element values in report text with one pass of an Aho-Corasick automaton over the words."""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import os
+import pickle
+import re
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Final, Iterable, NamedTuple
+
+from .element import FloatElement, IntegerElement, ValueSetElement
+
+if TYPE_CHECKING:
+    from .element import CDEElement, ValueSetValue
+    from .set import CDESet
+
+CACHE_FORMAT_VERSION: Final[int] = 1
+
+# Words are runs of letters and digits, so "part-solid", "part_solid" and "Part Solid" are all the same
+# two words; casefolding each word keeps spans pointing into the original text
+_WORD: Final[re.Pattern[str]] = re.compile(r"[^\W_]+")
+_NUMBER: Final[str] = r"(?<![\w.])([-+]?\d+(?:\.\d+)?)\s*"
+# A sentence ends at a semicolon, line break, ! or ?, or a period that isn't a decimal point
+_SENTENCE_END: Final[re.Pattern[str]] = re.compile(r"[;!?\n]|\.(?!\d)")
+
+# The compiled tables, as saved by `ValueExtractor.save`
+_TABLES: Final = ("_targets", "_units", "_vocabulary", "_goto", "_fail", "_outputs", "_term_lengths", "_term_targets")
+
+# What a term names: an element, or a value of a value set element
+_ELEMENT: Final[int] = 0
+_VALUE: Final[int] = 1
+
+
+class ExtractedValue(NamedTuple):
+    """A match in report text: a mention of an element (`value` None), one of its values, or a number.
+
+    `span` is the `(start, end)` of the matched text in the report.
+    """
+
+    cde_set: CDESet
+    element: CDEElement
+    value: ValueSetValue | float | int | None
+    span: tuple[int, int]
+
+
+def _words(text: str) -> list[str]:
+    return [word.casefold() for word in _WORD.findall(text)]
+
+
+def catalog_key(sets: Iterable[CDESet]) -> str:
+    """Hash the sets an extractor is built from, so a cached automaton is only used for the same sets."""
+    digest = hashlib.sha256()
+    for cde_set in sets:
+        digest.update(cde_set.model_dump_json(exclude_none=True).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ValueExtractor:
+    """Compiled from one or more CDE Sets, finds their elements and values in report text.
+
+    Terms are element names, value names and `value` slugs, and the `display` of the index codes of
+    elements and values (as synonyms), all matched as whole words, ignoring case and punctuation
+    between words. They're compiled into an Aho-Corasick automaton over word IDs, so a report is
+    matched in one pass over its words however many terms there are. Where terms overlap, the longest
+    wins ("solid component size" over "solid"). Numbers followed by the unit of a float or integer
+    element are matched too, and given to the nearest element with that unit mentioned before them in
+    the same sentence.
+
+    Building the automaton for a large catalog takes a while; `cached` keeps it on disk.
+    """
+
+    def __init__(self, sets: Iterable[CDESet], /, synonyms: bool = True) -> None:
+        self.sets = list(sets)
+        self.synonyms = synonyms
+        # Targets are (kind, set index, element index, value index), so the tables can be cached on disk
+        targets: list[tuple[int, int, int, int]] = []
+        terms: dict[tuple[str, ...], list[int]] = {}
+        units: dict[str, list[int]] = {}
+        for set_index, cde_set in enumerate(self.sets):
+            for element_index, element in enumerate(cde_set.elements):
+                self._add_terms(terms, targets, (_ELEMENT, set_index, element_index, -1), self._element_terms(element))
+                if isinstance(element, ValueSetElement):
+                    for value_index, value in enumerate(element.value_set.values):
+                        target = (_VALUE, set_index, element_index, value_index)
+                        self._add_terms(terms, targets, target, self._value_terms(value))
+                elif isinstance(element, (FloatElement, IntegerElement)):
+                    limits = element.float_value if isinstance(element, FloatElement) else element.integer_value
+                    if limits.unit:
+                        units.setdefault(limits.unit.casefold(), []).append(len(targets) - 1)
+        self._targets = targets
+        self._units = units
+        self._compile(terms)
+
+    def _element_terms(self, element: CDEElement) -> list[str]:
+        terms = [element.name]
+        if self.synonyms:
+            terms += [code.display for code in element.index_codes or () if code.display]
+        return terms
+
+    def _value_terms(self, value: ValueSetValue) -> list[str]:
+        terms = [value.name]
+        if value.value:
+            terms.append(value.value)
+        if self.synonyms:
+            terms += [code.display for code in value.index_codes or () if code.display]
+        return terms
+
+    @staticmethod
+    def _add_terms(
+        terms: dict[tuple[str, ...], list[int]],
+        targets: list[tuple[int, int, int, int]],
+        target: tuple[int, int, int, int],
+        texts: list[str],
+    ) -> None:
+        targets.append(target)
+        for text in texts:
+            if words := tuple(_words(text)):
+                target_list = terms.setdefault(words, [])
+                if not target_list or target_list[-1] != len(targets) - 1:
+                    target_list.append(len(targets) - 1)
+
+    def _compile(self, terms: dict[tuple[str, ...], list[int]]) -> None:
+        """Build the trie of terms (over word IDs), then its failure links and outputs, breadth first."""
+        vocabulary: dict[str, int] = {}
+        goto: list[dict[int, int]] = [{}]
+        outputs: list[list[int]] = [[]]
+        term_lengths: list[int] = []
+        term_targets: list[tuple[int, ...]] = []
+        for words, target_list in terms.items():
+            state = 0
+            for word in words:
+                word_id = vocabulary.setdefault(word, len(vocabulary))
+                next_state = goto[state].get(word_id)
+                if next_state is None:
+                    next_state = goto[state][word_id] = len(goto)
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(len(term_lengths))
+            term_lengths.append(len(words))
+            term_targets.append(tuple(target_list))
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word_id, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and word_id not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(word_id, 0)
+                outputs[next_state] += outputs[fail[next_state]]
+
+        self._vocabulary = vocabulary
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(output) for output in outputs]
+        self._term_lengths = term_lengths
+        self._term_targets = term_targets
+        self._compile_units()
+
+    def _compile_units(self) -> None:
+        # Longest units first, so "12 mm3" isn't read as 12 mm
+        units = "|".join(re.escape(unit) for unit in sorted(self._units, key=len, reverse=True))
+        self._number_unit = re.compile(_NUMBER + f"({units})(?!\\w)", re.IGNORECASE) if units else None
+
+    def _term_matches(self, text: str) -> list[tuple[int, int, int]]:
+        """Get the `(start, end, term)` of the longest leftmost terms in the text, not overlapping."""
+        words = list(_WORD.finditer(text))
+        vocabulary, goto, fail, outputs, lengths = (
+            self._vocabulary,
+            self._goto,
+            self._fail,
+            self._outputs,
+            self._term_lengths,
+        )
+        found: list[tuple[int, int, int]] = []
+        state = 0
+        for i, word in enumerate(words):
+            word_id = vocabulary.get(word.group().casefold())
+            if word_id is None:
+                state = 0
+                continue
+            while state and word_id not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word_id, 0)
+            for term in outputs[state]:
+                found.append((i - lengths[term] + 1, i, term))
+        found.sort(key=lambda match: (match[0], -match[1]))
+        matches: list[tuple[int, int, int]] = []
+        next_free = 0
+        for first, last, term in found:
+            if first >= next_free:
+                matches.append((words[first].start(), words[last].end(), term))
+                next_free = last + 1
+        return matches
+
+    def _result(self, target: int, span: tuple[int, int], value: Any = None) -> ExtractedValue:
+        kind, set_index, element_index, value_index = self._targets[target]
+        cde_set = self.sets[set_index]
+        element = cde_set.elements[element_index]
+        if kind == _VALUE:
+            value = element.value_set.values[value_index]  # type: ignore[union-attr]
+        return ExtractedValue(cde_set, element, value, span)
+
+    def find(self, text: str, /) -> list[ExtractedValue]:
+        """Find all candidate element mentions, values and numbers in the text, in order.
+
+        A term shared by several elements (e.g. "present") gives a candidate for each of them.
+        """
+        results: list[tuple[int, int, ExtractedValue]] = []
+        mentions: list[tuple[int, int]] = []  # (start, target) of element mentions with units, in order
+        numeric_targets = {t for targets in self._units.values() for t in targets}
+        for start, end, term in self._term_matches(text):
+            for target in self._term_targets[term]:
+                results.append((start, target, self._result(target, (start, end))))
+                if target in numeric_targets:
+                    mentions.append((start, target))
+        if self._number_unit is not None:
+            sentence_ends = [m.start() for m in _SENTENCE_END.finditer(text)]
+            for match in self._number_unit.finditer(text):
+                candidates = set(self._units[match.group(2).casefold()])
+                sentence = bisect.bisect_left(sentence_ends, match.start())
+                for start, target in reversed(mentions):
+                    if start < match.start() and target in candidates:
+                        if bisect.bisect_left(sentence_ends, start) == sentence:
+                            number = self._number(target, match.group(1))
+                            results.append((match.start(), target, self._result(target, match.span(), number)))
+                        break
+        results.sort(key=lambda result: (result[0], result[1]))
+        return [result for _, _, result in results]
+
+    def _number(self, target: int, text: str) -> float | int:
+        kind, set_index, element_index, _ = self._targets[target]
+        number = float(text)
+        if isinstance(self.sets[set_index].elements[element_index], IntegerElement) and number.is_integer():
+            return int(number)
+        return number
+
+    def component_values(self, text: str, /, cde_set: CDESet) -> dict[str, str | float | int]:
+        """Get `{element name: value}` for one set from the text, for `ObservationFactory.create_observation`.
+
+        Value set values are given by name and numbers as numbers. Where a value could belong to more
+        than one of the set's elements, the element mentioned nearest before it in the same sentence
+        gets it; if none was, the value is left out. The first value found for an element wins.
+        """
+        sentence_ends = [m.start() for m in _SENTENCE_END.finditer(text)]
+        candidates: dict[tuple[int, int], list[ExtractedValue]] = {}
+        mentioned: list[tuple[int, int, str]] = []  # (sentence, start, element ID)
+        for result in self.find(text):
+            if result.cde_set is not cde_set:
+                continue
+            if result.value is None:
+                mentioned.append((bisect.bisect_left(sentence_ends, result.span[0]), result.span[0], result.element.id))
+            else:
+                candidates.setdefault(result.span, []).append(result)
+        values: dict[str, str | float | int] = {}
+        for span, results in candidates.items():
+            chosen: ExtractedValue | None = results[0] if len(results) == 1 else None
+            if chosen is None:
+                sentence = bisect.bisect_left(sentence_ends, span[0])
+                ids = {result.element.id: result for result in results}
+                for mention_sentence, start, element_id in reversed(mentioned):
+                    if mention_sentence == sentence and start < span[0] and element_id in ids:
+                        chosen = ids[element_id]
+                        break
+            if chosen is not None and chosen.element.name not in values:
+                value = chosen.value
+                values[chosen.element.name] = value if isinstance(value, (int, float)) else value.name  # type: ignore[union-attr]
+        return values
+
+    def info(self) -> dict[str, int]:
+        """Report the size of the automaton."""
+        return {
+            "sets": len(self.sets),
+            "terms": len(self._term_lengths),
+            "words": len(self._vocabulary),
+            "states": len(self._goto),
+            "units": len(self._units),
+        }
+
+    def save(self, path: str | os.PathLike[str], /) -> None:
+        """Write the compiled automaton to a file, with a key identifying the sets it was built from."""
+        data = {name: getattr(self, name) for name in _TABLES}
+        data.update(version=CACHE_FORMAT_VERSION, key=catalog_key(self.sets), synonyms=self.synonyms)
+        tmp_path = f"{os.fspath(path)}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str], sets: Iterable[CDESet], /) -> ValueExtractor:
+        """Read an automaton written by `save`; `sets` must be the sets it was built from, in order."""
+        sets = list(sets)
+        with open(path, "rb") as f:
+            data = pickle.load(f)  # noqa: S301
+        if data.get("version") != CACHE_FORMAT_VERSION or data.get("key") != catalog_key(sets):
+            raise ValueError(f"Extractor file {path} wasn't built from these sets")
+        extractor = cls.__new__(cls)
+        extractor.sets = sets
+        extractor.synonyms = data["synonyms"]
+        for name in _TABLES:
+            setattr(extractor, name, data[name])
+        extractor._compile_units()
+        return extractor
+
+    @classmethod
+    def cached(
+        cls, sets: Iterable[CDESet], /, cache_dir: str | os.PathLike[str], synonyms: bool = True
+    ) -> ValueExtractor:
+        """Load the extractor for these sets from `cache_dir`, building and saving it there if needed."""
+        sets = list(sets)
+        path = Path(cache_dir) / f"extractor-{catalog_key(sets)[:32]}{'' if synonyms else '-nosyn'}.pickle"
+        if path.exists():
+            try:
+                return cls.load(path, sets)
+            except (ValueError, EOFError, pickle.UnpicklingError):
+                pass
+        extractor = cls(sets, synonyms=synonyms)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        extractor.save(path)
+        return extractor
@@ -1,7 +1,7 @@
 from enum import Enum
 from typing import Annotated, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class AttributeType(str, Enum):
@@ -13,6 +13,8 @@ class ChoiceValue(BaseModel):
     """A value that a radiologist might choose for a choice attribute. For example, the severity of a finding might be
     severe, or the shape of a finding might be oval."""
 
+    model_config = ConfigDict(defer_build=True)
+
     name: str
     description: str | None = None
 
@@ -22,6 +24,8 @@ class ChoiceAttribute(BaseModel):
     the severity of a finding might be mild, moderate, or severe, or the shape of a finding might be round, oval, or
     irregular."""
 
+    model_config = ConfigDict(defer_build=True)
+
     name: str
     description: str | None = None
     type: Literal[AttributeType.CHOICE] = AttributeType.CHOICE
@@ -35,6 +39,8 @@ class NumericAttribute(BaseModel):
     """An attribute of a radiology finding where the radiologist would choose a number from a range. For example, the
     size of a finding might be up to 10 cm or the number of findings might be between 1 and 10."""
 
+    model_config = ConfigDict(defer_build=True)
+
     name: str
     description: str | None = None
     type: Literal[AttributeType.NUMERIC] = AttributeType.NUMERIC
@@ -60,6 +66,8 @@ class FindingModel(BaseModel):
     along with definitions of the relevant attributes that a radiologist might use to characterize the finding in a
     radiology report."""
 
+    model_config = ConfigDict(defer_build=True)
+
     finding_name: str = Field(..., title="Finding Name", description="The name of a raidology finding")
     description: str = Field(
         ...,
@@ -0,0 +1,253 @@
+"""Content fingerprints of CDE Sets, elements and values, and structural diffs between versions of a set."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import operator
+import weakref
+from typing import TYPE_CHECKING, Any, Callable, Final, Iterable, Mapping, NamedTuple, Union
+
+from .element import ValueSetElement, ValueSetValue
+from .set import CDESet
+
+if TYPE_CHECKING:
+    from .element import CDEElement
+
+Fingerprinted = Union[CDESet, "CDEElement", ValueSetValue]
+
+_SET_OWN_FIELDS: Final[dict[str, Any]] = {"elements": True}
+_VALUE_SET_ELEMENT_OWN_FIELDS: Final[dict[str, Any]] = {"value_set": {"values": True}}
+
+
+def _own_fields(model: Fingerprinted) -> dict[str, Any]:
+    """Get a model's fields as JSON data, leaving out its elements or values (fingerprinted separately)."""
+    if isinstance(model, CDESet):
+        exclude = _SET_OWN_FIELDS
+    elif isinstance(model, ValueSetElement):
+        exclude = _VALUE_SET_ELEMENT_OWN_FIELDS
+    else:
+        exclude = None
+    return model.model_dump(mode="json", exclude_none=True, exclude=exclude)
+
+
+_ENCODER: Final[json.JSONEncoder] = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _canonical(data: dict[str, Any]) -> bytes:
+    return _ENCODER.encode(data).encode()
+
+
+# Digests are computed from a model's JSON data, dumped once for a whole set
+
+
+def _value_digest(data: dict[str, Any]) -> bytes:
+    return hashlib.sha256(b"value\0" + _canonical(data)).digest()
+
+
+def _element_digest(data: dict[str, Any]) -> bytes:
+    return hashlib.sha256(b"element\0" + _canonical(data)).digest()
+
+
+def _set_digest(data: dict[str, Any]) -> bytes:
+    digest = hashlib.sha256(b"set\0" + _canonical({**data, "elements": None}))
+    for element in data.get("elements", ()):
+        digest.update(_element_digest(element))
+    return digest.digest()
+
+
+def _field_objects(model: Fingerprinted, objects: list[Any]) -> list[Any]:
+    """Collect the objects held by the fields of a model and of the elements and values in it."""
+    objects.extend(model.__dict__.values())
+    if isinstance(model, CDESet):
+        for element in model.elements:
+            _field_objects(element, objects)
+    elif isinstance(model, ValueSetElement):
+        objects.extend(model.value_set.__dict__.values())
+        for value in model.value_set.values:
+            objects.extend(value.__dict__.values())
+    return objects
+
+
+class FingerprintCache:
+    """Computes and caches content fingerprints (SHA-256, as hex) of sets, elements and values.
+
+    A fingerprint covers a model's canonical JSON (JSON with sorted keys, no whitespace, and `None`s left
+    out), so it is the same for equal content however the model was made, and stable across processes (so
+    it can be stored). A set's fingerprint covers its elements' fingerprints in order, so a change to an
+    element, or to one of its values, changes the element's fingerprint and the set's.
+
+    Fingerprints are cached per object for as long as the object lives, along with the objects held by
+    its fields and those of the elements and values in it. A cached fingerprint is reused only while all
+    of those are the same objects, so assigning a field, or adding, removing or reordering elements or
+    values, is always seen. Edits inside a field's value (such as appending to a set's `index_codes`)
+    are not: call `forget` with the model after making one.
+    """
+
+    def __init__(self) -> None:
+        self._digests: dict[int, tuple[weakref.ref[Any], list[Any], bytes]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _digest(self, model: Fingerprinted, compute: Callable[[dict[str, Any]], bytes]) -> bytes:
+        key = id(model)
+        objects = _field_objects(model, [])
+        entry = self._digests.get(key)
+        if (
+            entry is not None
+            and entry[0]() is model
+            and len(entry[1]) == len(objects)
+            and all(map(operator.is_, entry[1], objects))
+        ):
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        digest = compute(model.model_dump(mode="json", exclude_none=True))
+        digests = self._digests
+        self._digests[key] = (weakref.ref(model, lambda _, key=key: digests.pop(key, None)), objects, digest)
+        return digest
+
+    def value(self, value: ValueSetValue, /) -> str:
+        return self._digest(value, _value_digest).hex()
+
+    def element(self, element: CDEElement, /) -> str:
+        return self._digest(element, _element_digest).hex()
+
+    def set(self, cde_set: CDESet, /) -> str:
+        return self._digest(cde_set, _set_digest).hex()
+
+    def catalog(self, sets: Iterable[CDESet], /) -> dict[str, str]:
+        """Get the fingerprint of each set by set ID, e.g. to store for `diff_catalog` next time."""
+        return {cde_set.id: self.set(cde_set) for cde_set in sets}
+
+    def forget(self, model: Fingerprinted, /) -> None:
+        """Drop the cached fingerprint of a model edited inside one of its fields."""
+        self._digests.pop(id(model), None)
+
+    def clear(self) -> None:
+        self._digests.clear()
+
+    def info(self) -> dict[str, int]:
+        """Report cache hits and misses and the number of models cached."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._digests)}
+
+
+_default_cache = FingerprintCache()
+
+
+def set_fingerprint(cde_set: CDESet, /) -> str:
+    """Get the content fingerprint of a set, cached in a shared `FingerprintCache`."""
+    return _default_cache.set(cde_set)
+
+
+def element_fingerprint(element: CDEElement, /) -> str:
+    """Get the content fingerprint of an element, cached in a shared `FingerprintCache`."""
+    return _default_cache.element(element)
+
+
+def value_fingerprint(value: ValueSetValue, /) -> str:
+    """Get the content fingerprint of a value, cached in a shared `FingerprintCache`."""
+    return _default_cache.value(value)
+
+
+# Diffs
+
+
+class ElementDiff(NamedTuple):
+    """How an element differs between two versions of a set; values are compared by code."""
+
+    element_id: str
+    fields: tuple[str, ...]
+    added_values: tuple[str, ...]
+    removed_values: tuple[str, ...]
+    modified_values: tuple[str, ...]
+
+
+class SetDiff(NamedTuple):
+    """How a set differs between two versions; elements are compared by ID.
+
+    `fields` names the set's own fields that changed, plus "elements" if the elements were reordered.
+    An element's `fields` likewise includes "values" if its values were reordered.
+    """
+
+    set_id: str
+    fields: tuple[str, ...]
+    added_elements: tuple[str, ...]
+    removed_elements: tuple[str, ...]
+    modified_elements: tuple[ElementDiff, ...]
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.fields or self.added_elements or self.removed_elements or self.modified_elements)
+
+    @property
+    def affected_elements(self) -> tuple[str, ...]:
+        """IDs of the elements added, removed or modified, i.e. whatever depends on them needs updating."""
+        modified = tuple(diff.element_id for diff in self.modified_elements)
+        return self.added_elements + self.removed_elements + modified
+
+
+class CatalogDiff(NamedTuple):
+    """Set IDs added, removed and modified between two versions of a catalog."""
+
+    added: tuple[str, ...]
+    removed: tuple[str, ...]
+    modified: tuple[str, ...]
+
+
+def _changed_fields(old: Fingerprinted, new: Fingerprinted) -> list[str]:
+    old_fields, new_fields = _own_fields(old), _own_fields(new)
+    return [name for name in {**old_fields, **new_fields} if old_fields.get(name) != new_fields.get(name)]
+
+
+def _diff_keys(old: Mapping[str, Any], new: Mapping[str, Any]) -> tuple[tuple[str, ...], tuple[str, ...], bool]:
+    """Get the keys only in `new`, those only in `old`, and whether the shared keys are in a different order."""
+    added = tuple(key for key in new if key not in old)
+    removed = tuple(key for key in old if key not in new)
+    reordered = [key for key in old if key in new] != [key for key in new if key in old]
+    return added, removed, reordered
+
+
+def _diff_elements(old: CDEElement, new: CDEElement, cache: FingerprintCache) -> ElementDiff:
+    fields = _changed_fields(old, new)
+    old_values = {value.code: value for value in old.value_set.values} if isinstance(old, ValueSetElement) else {}
+    new_values = {value.code: value for value in new.value_set.values} if isinstance(new, ValueSetElement) else {}
+    added, removed, reordered = _diff_keys(old_values, new_values)
+    if reordered:
+        fields.append("values")
+    modified = tuple(
+        code
+        for code, value in new_values.items()
+        if code in old_values and cache.value(value) != cache.value(old_values[code])
+    )
+    return ElementDiff(new.id, tuple(fields), added, removed, modified)
+
+
+def diff_sets(old: CDESet, new: CDESet, /, cache: FingerprintCache | None = None) -> SetDiff:
+    """Compare two versions of a set. Unchanged elements are skipped by comparing fingerprints."""
+    cache = cache or _default_cache
+    fields = _changed_fields(old, new)
+    old_elements = {element.id: element for element in old.elements}
+    new_elements = {element.id: element for element in new.elements}
+    added, removed, reordered = _diff_keys(old_elements, new_elements)
+    if reordered:
+        fields.append("elements")
+    modified = tuple(
+        _diff_elements(old_elements[element_id], element, cache)
+        for element_id, element in new_elements.items()
+        if element_id in old_elements and cache.element(element) != cache.element(old_elements[element_id])
+    )
+    return SetDiff(new.id, tuple(fields), added, removed, modified)
+
+
+def diff_catalog(
+    previous: Mapping[str, str], sets: Iterable[CDESet], /, cache: FingerprintCache | None = None
+) -> CatalogDiff:
+    """Compare the sets of a catalog against the fingerprints stored from an earlier version (see
+    `FingerprintCache.catalog`), to find the sets whose dependents need updating."""
+    current = (cache or _default_cache).catalog(sets)
+    added, removed, _ = _diff_keys(previous, current)
+    modified = tuple(
+        set_id for set_id, fingerprint in current.items() if previous.get(set_id, fingerprint) != fingerprint
+    )
+    return CatalogDiff(added, removed, modified)
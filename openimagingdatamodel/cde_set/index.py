@@ -0,0 +1,135 @@
+"""Cross-set index resolving set, element and value codes back to the objects that own them."""
+
+from __future__ import annotations
+
+import threading
+from typing import Iterable, NamedTuple
+
+from .element import CDEElement, ValueSetElement, ValueSetValue  # noqa: TCH001
+from .set import CDESet  # noqa: TCH001
+
+
+class CodeResolution(NamedTuple):
+    """What a code refers to: a set, an element of the set, or a value of the element."""
+
+    cde_set: CDESet
+    element: CDEElement | None = None
+    value: ValueSetValue | None = None
+
+
+class CDEIndex:
+    """Index over many CDE Sets mapping set IDs, element IDs, element names and value codes (`RDExxx.n`)
+    to the objects that own them.
+
+    Keys are casefolded. Sets can be added and removed at any time; only the entries for that set are
+    touched. The index holds what a set contained when it was added, so re-add a set after editing it.
+    Lookups don't take a lock, so one index can be shared between threads, with updates serialized
+    among themselves.
+    """
+
+    def __init__(self, sets: Iterable[CDESet] = (), /) -> None:
+        self._lock = threading.Lock()
+        self._sets: dict[str, CDESet] = {}
+        self._elements: dict[str, CodeResolution] = {}
+        self._values: dict[str, CodeResolution] = {}
+        self._names: dict[str, list[CodeResolution]] = {}
+        # Set ID -> the element, value and name keys the set was indexed under
+        self._keys: dict[str, tuple[list[str], list[str], list[str]]] = {}
+        for cde_set in sets:
+            self.add_set(cde_set)
+
+    def __len__(self) -> int:
+        return len(self._sets)
+
+    def __contains__(self, set_id: object) -> bool:
+        return isinstance(set_id, str) and set_id.casefold() in self._sets
+
+    @property
+    def sets(self) -> list[CDESet]:
+        return list(self._sets.values())
+
+    def add_set(self, cde_set: CDESet) -> None:
+        """Add a set to the index, replacing any set already indexed under the same ID."""
+        key = cde_set.id.casefold()
+        with self._lock:
+            self._remove(key)
+            self._sets[key] = cde_set
+            element_keys: list[str] = []
+            value_keys: list[str] = []
+            name_keys: list[str] = []
+            for element in cde_set.elements:
+                resolution = CodeResolution(cde_set, element)
+                element_keys.append(element.id.casefold())
+                self._elements[element_keys[-1]] = resolution
+                name_keys.append(element.name.casefold())
+                self._names.setdefault(name_keys[-1], []).append(resolution)
+                if isinstance(element, ValueSetElement):
+                    for value in element.value_set.values:
+                        value_keys.append(value.code.casefold())
+                        self._values[value_keys[-1]] = CodeResolution(cde_set, element, value)
+            self._keys[key] = (element_keys, value_keys, name_keys)
+
+    def remove_set(self, set_id: str) -> CDESet:
+        """Remove a set (by ID) and all of its entries from the index."""
+        with self._lock:
+            cde_set = self._remove(set_id.casefold())
+        if cde_set is None:
+            raise ValueError(f"CDE Set '{set_id}' not found in index")
+        return cde_set
+
+    def _remove(self, key: str) -> CDESet | None:
+        cde_set = self._sets.pop(key, None)
+        if cde_set is None:
+            return None
+        # Go by the keys the set was indexed under, as it may have been edited since, and only drop entries
+        # that still point at it; another set may have claimed the same code since
+        element_keys, value_keys, name_keys = self._keys.pop(key)
+        for codes, entries in ((element_keys, self._elements), (value_keys, self._values)):
+            for code in codes:
+                if (found := entries.get(code)) is not None and found.cde_set is cde_set:
+                    del entries[code]
+        for name_key in name_keys:
+            remaining = [res for res in self._names.get(name_key, []) if res.cde_set is not cde_set]
+            if remaining:
+                self._names[name_key] = remaining
+            else:
+                self._names.pop(name_key, None)
+        return cde_set
+
+    def get_set(self, set_id: str) -> CDESet:
+        if (cde_set := self._sets.get(set_id.casefold())) is None:
+            raise ValueError(f"CDE Set '{set_id}' not found in index")
+        return cde_set
+
+    def get_element(self, element_id: str) -> CDEElement:
+        """Get an element by ID from whichever set owns it."""
+        if (resolution := self._elements.get(element_id.casefold())) is None:
+            raise ValueError(f"Element '{element_id}' not found in index")
+        return resolution.element  # type: ignore[return-value]
+
+    def find_elements(self, name: str) -> list[CodeResolution]:
+        """Get every indexed element with the given name, along with its set."""
+        return list(self._names.get(name.casefold(), []))
+
+    def get_value(self, code: str) -> ValueSetValue:
+        """Get a ValueSetValue by its code (e.g. `RDE1304.2`)."""
+        if (resolution := self._values.get(code.casefold())) is None:
+            raise ValueError(f"Value code '{code}' not found in index")
+        return resolution.value  # type: ignore[return-value]
+
+    def resolve(self, code: str) -> CodeResolution:
+        """Resolve any set ID, element ID or value code to its set, and element and value where applicable."""
+        key = code.casefold()
+        if (resolution := self._values.get(key) or self._elements.get(key)) is not None:
+            return resolution
+        if (cde_set := self._sets.get(key)) is not None:
+            return CodeResolution(cde_set)
+        raise ValueError(f"Code '{code}' not found in index")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sets.clear()
+            self._elements.clear()
+            self._values.clear()
+            self._names.clear()
+            self._keys.clear()
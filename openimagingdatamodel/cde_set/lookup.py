@@ -0,0 +1,100 @@
+"""Lazily built lookup indexes that stay correct while the indexed list and its items are edited."""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Generic, Iterable, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+class LookupIndex(Generic[T]):
+    """Maps casefolded keys to positions in a list of items, e.g. element IDs and names to elements.
+
+    A position is only trusted after checking that the item there still has the key. A key that can't
+    be found that way causes a rebuild from the current list if the list was replaced or changed length
+    since the last build; otherwise the items are scanned for the key, and the index rebuilt only if one
+    has it (it was renamed or moved). So appending, removing, reordering or renaming items (or replacing
+    the list) never gives a wrong answer, and looking up missing keys doesn't keep rebuilding the index.
+    If several items share a key, the first one wins.
+
+    Each build makes a new dict and swaps it in, so lookups from other threads always see a complete
+    index. Misses are resolved under a lock of the index's own, so threads don't race to rebuild it;
+    hits never take it. Hit/miss counters are plain integers and may undercount slightly when many
+    threads update them at once. Indexes are caches: they compare equal to each other, so they don't
+    affect the equality of the models holding them, and copies and pickles start out empty.
+    """
+
+    __slots__ = ("keys_of", "_positions", "_built_for", "_lock", "hits", "misses", "rebuilds")
+
+    def __init__(self, keys_of: Callable[[T], Iterable[str | None]]) -> None:
+        self.keys_of = keys_of
+        self._positions: dict[str, int] | None = None
+        # Identity and length of the list the index was last built from
+        self._built_for: tuple[int, int] | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, LookupIndex)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (type(self), (self.keys_of,))
+
+    def _has_key(self, item: T, key: str) -> bool:
+        return any(k is not None and k.casefold() == key for k in self.keys_of(item))
+
+    def _at(self, positions: dict[str, int], items: Sequence[T], key: str) -> T | None:
+        position = positions.get(key)
+        if position is None:
+            return None
+        try:
+            item = items[position]
+        except IndexError:  # The list got shorter since the index was built
+            return None
+        return item if self._has_key(item, key) else None
+
+    def rebuild(self, items: Sequence[T]) -> dict[str, int]:
+        with self._lock:
+            return self._rebuild(items)
+
+    def _rebuild(self, items: Sequence[T]) -> dict[str, int]:
+        positions: dict[str, int] = {}
+        for position, item in enumerate(items):
+            for k in self.keys_of(item):
+                if k is not None:
+                    positions.setdefault(k.casefold(), position)
+        self._positions = positions
+        self._built_for = (id(items), len(items))
+        self.rebuilds += 1
+        return positions
+
+    def find(self, items: Sequence[T], key: str) -> T | None:
+        """Get the item with a key (casefolded here), or None if no item in `items` has it."""
+        key = key.casefold()
+        positions = self._positions
+        if positions is not None and (item := self._at(positions, items, key)) is not None:
+            self.hits += 1
+            return item
+        self.misses += 1
+        with self._lock:
+            # Another thread may have rebuilt the index while this one waited
+            if self._positions is not positions and (item := self._at(self._positions, items, key)) is not None:
+                return item
+            if self._built_for == (id(items), len(items)) and not any(self._has_key(item, key) for item in items):
+                return None
+            return self._at(self._rebuild(items), items, key)
+
+    def info(self) -> dict[str, int]:
+        """Report hits, misses, rebuilds and the number of keys currently indexed."""
+        positions = self._positions
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "rebuilds": self.rebuilds,
+            "size": len(positions) if positions is not None else 0,
+        }
@@ -0,0 +1,205 @@
+"""Registry of CDE Sets stored as `*.cde.json` files, loaded lazily through an on-disk index."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Final
+
+from .element import CDEElement  # noqa: TCH001
+from .set import CDESet
+
+INDEX_FILENAME: Final[str] = ".cde_index.json"
+INDEX_FORMAT_VERSION: Final[int] = 1
+DEFAULT_PATTERN: Final[str] = "*.cde.json"
+DEFAULT_CACHE_SIZE: Final[int] = 128
+
+logger = logging.getLogger(__name__)
+
+
+class CDESetRegistry:
+    """Index a directory of CDE Set files and parse each set only when it is first requested.
+
+    The index maps set IDs, element IDs and element names (all casefolded) to the position of the
+    owning file in the index's file table. It is written next to the set files and reused on the next
+    start as long as the files have the same size and modification time, so startup only needs to
+    `stat` the directory. Parsed sets are kept in a bounded LRU cache. Files that aren't JSON or lack
+    a set ID are left out of the index, with a warning.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        /,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        pattern: str = DEFAULT_PATTERN,
+        index_path: str | os.PathLike[str] | None = None,
+    ) -> None:
+        if cache_size < 1:
+            raise ValueError("Cache size must be at least 1")
+        self.directory = Path(directory)
+        if not self.directory.is_dir():
+            raise ValueError(f"CDE Set directory '{self.directory}' does not exist")
+        self.pattern = pattern
+        self.index_path = Path(index_path) if index_path else self.directory / INDEX_FILENAME
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, CDESet] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._files: list[list[Any]] = []
+        self._set_index: dict[str, int] = {}
+        self._element_index: dict[str, int] = {}
+        self._name_index: dict[str, list[int]] = {}
+        self.refresh()
+
+    # Index handling
+
+    def refresh(self) -> None:
+        """Bring the index up to date with the directory, re-reading only new or changed files."""
+        previous = self._read_index_file()
+        known = {entry[0]: entry for entry in previous.get("files", [])}
+        files: list[list[Any]] = []
+        changed = False
+        for path in sorted(self.directory.glob(self.pattern)):
+            rel_path = path.relative_to(self.directory).as_posix()
+            stat = path.stat()
+            entry = known.get(rel_path)
+            if entry is None or entry[1] != stat.st_size or entry[2] != stat.st_mtime_ns:
+                try:
+                    scanned = self._scan_file(path)
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    logger.warning("Skipping CDE Set file '%s': %s", path, e)
+                    changed = True
+                    continue
+                entry = [rel_path, stat.st_size, stat.st_mtime_ns, *scanned]
+                changed = True
+            files.append(entry)
+        if len(files) != len(known):
+            changed = True
+        self._build_lookup_tables(files)
+        if changed:
+            with self._lock:
+                self._cache.clear()
+            self._write_index_file()
+
+    @staticmethod
+    def _scan_file(path: Path) -> tuple[str, list[list[str]]]:
+        """Pull the set ID and element IDs/names from a set file without building the models."""
+        with open(path, "rb") as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or not isinstance(data.get("id"), str):
+            raise ValueError("not a CDE Set with an ID")
+        elements = [[el["id"], el["name"]] for el in data.get("elements", [])]
+        if not all(isinstance(value, str) for element in elements for value in element):
+            raise ValueError("element IDs and names must be strings")
+        return data["id"], elements
+
+    def _build_lookup_tables(self, files: list[list[Any]]) -> None:
+        set_index: dict[str, int] = {}
+        element_index: dict[str, int] = {}
+        name_index: dict[str, list[int]] = {}
+        for file_no, (_, _, _, set_id, elements) in enumerate(files):
+            set_index[set_id.casefold()] = file_no
+            for element_id, element_name in elements:
+                element_index[element_id.casefold()] = file_no
+                name_index.setdefault(element_name.casefold(), []).append(file_no)
+        self._files = files
+        self._set_index = set_index
+        self._element_index = element_index
+        self._name_index = name_index
+
+    def _read_index_file(self) -> dict[str, Any]:
+        try:
+            with open(self.index_path, "rb") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != INDEX_FORMAT_VERSION or data.get("pattern") != self.pattern:
+            return {}
+        return data
+
+    def _write_index_file(self) -> None:
+        data = {"version": INDEX_FORMAT_VERSION, "pattern": self.pattern, "files": self._files}
+        tmp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            # A read-only catalog still works; the index just has to be rebuilt on the next start
+            tmp_path.unlink(missing_ok=True)
+
+    # Lookups
+
+    @property
+    def set_ids(self) -> list[str]:
+        """IDs of all the indexed sets."""
+        return [entry[3] for entry in self._files]
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __contains__(self, set_id: object) -> bool:
+        return isinstance(set_id, str) and set_id.casefold() in self._set_index
+
+    def path_for_set(self, set_id: str) -> Path:
+        """Get the path of the file holding a CDE Set."""
+        file_no = self._set_index.get(set_id.casefold())
+        if file_no is None:
+            raise ValueError(f"CDE Set '{set_id}' not found in registry")
+        return self.directory / self._files[file_no][0]
+
+    def get_set(self, set_id: str) -> CDESet:
+        """Get a CDE Set by ID, parsing it from disk if it isn't cached."""
+        key = set_id.casefold()
+        with self._lock:
+            cde_set = self._cache.get(key)
+            if cde_set is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return cde_set
+            self._misses += 1
+        with open(self.path_for_set(set_id), "rb") as f:
+            cde_set = CDESet.model_validate_json(f.read())
+        with self._lock:
+            self._cache[key] = cde_set
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return cde_set
+
+    def get_element_set(self, element: str) -> CDESet:
+        """Get the CDE Set containing an element, given the element's ID or (unambiguous) name."""
+        key = element.casefold()
+        file_no = self._element_index.get(key)
+        if file_no is None:
+            file_nos = self._name_index.get(key)
+            if not file_nos:
+                raise ValueError(f"Element '{element}' not found in registry")
+            if len(set(file_nos)) > 1:
+                set_ids = ", ".join(self._files[no][3] for no in file_nos)
+                raise ValueError(f"Element name '{element}' is ambiguous; found in sets {set_ids}")
+            file_no = file_nos[0]
+        return self.get_set(self._files[file_no][3])
+
+    def get_element(self, element: str) -> CDEElement:
+        """Get an element by ID or (unambiguous) name from whichever set contains it."""
+        return self.get_element_set(element).get_element(element)
+
+    def set_ids_for_element_name(self, name: str) -> list[str]:
+        """Get the IDs of all the sets that have an element with the given name."""
+        return [self._files[file_no][3] for file_no in self._name_index.get(name.casefold(), [])]
+
+    def cache_info(self) -> dict[str, int]:
+        """Report cache hits, misses and current size."""
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "size": len(self._cache), "maxsize": self.cache_size}
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
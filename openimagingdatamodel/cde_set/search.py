@@ -0,0 +1,376 @@
+"""Full-text search with BM25 ranking over CDE Sets, their elements and values, and finding models."""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import math
+import os
+import pickle
+import re
+from collections import Counter
+from typing import TYPE_CHECKING, Final, Iterable, Iterator, Literal, NamedTuple
+
+from .element import ValueSetElement
+
+if TYPE_CHECKING:
+    from .finding_model import FindingModel
+    from .set import CDESet
+
+SEARCH_INDEX_FORMAT_VERSION: Final[int] = 1
+
+SearchKind = Literal["set", "element", "value", "finding_model", "attribute"]
+
+_WORD: Final[re.Pattern[str]] = re.compile(r"[^\W_]+")
+STOP_WORDS: Final[frozenset[str]] = frozenset(
+    "a an and are as at be by for from has in is it of on or that the this to was were which with".split()  # noqa: SIM905
+)
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Split text into casefolded words, leaving out stop words."""
+    if not text:
+        return []
+    return [word for word in (match.casefold() for match in _WORD.findall(text)) if word not in STOP_WORDS]
+
+
+class SearchHit(NamedTuple):
+    """A search result.
+
+    `key` is the set ID, element ID or value code; for finding models, the finding name, and for their
+    attributes, `"<finding name>/<attribute name>"`. `owner` is the ID of the set an element or value
+    belongs to, or the name of the finding model an attribute belongs to.
+    """
+
+    score: float
+    kind: SearchKind
+    key: str
+    name: str
+    owner: str | None = None
+
+
+class _Document(NamedTuple):
+    kind: SearchKind
+    key: str
+    name: str
+    owner: str | None
+    length: int
+    terms: tuple[str, ...]
+
+
+class CatalogSearchIndex:
+    """Inverted index over CDE Sets and finding models, ranking matches with BM25.
+
+    Each set, element, value, finding model and finding model attribute is a document. A document's
+    text is its name (counted `name_weight` times, so name matches rank first) plus its description
+    or definition, question, index code displays and, for attributes, choice value names. Text is
+    split into casefolded words without stop words. By default the last word of a query also matches
+    words it is a prefix of (the best of up to `max_expansions` of them counts), for search-as-you-type.
+
+    Searches don't score every document containing a query word. Each term's postings are kept
+    sorted by score (built when the term is first searched for, and again after the index changes).
+    Documents matching only one query word are then read from the top of that word's list, and only
+    those matching several are scored in full; when many documents match several words, the lists
+    are read together until nothing further down could make the top `limit` instead (Fagin's
+    threshold algorithm). Either way the results are the same as scoring everything.
+
+    Sets and finding models can be added and removed at any time; only their own documents are
+    touched. `save` and `load` keep the index on disk, so it needn't be rebuilt from the catalog. Hits
+    identify what they matched by ID or name; look the objects up in a `CDEIndex` or catalog snapshot.
+    The index isn't thread-safe: serialize updates with searches.
+    """
+
+    def __init__(
+        self,
+        sets: Iterable[CDESet] = (),
+        /,
+        finding_models: Iterable[FindingModel] = (),
+        k1: float = 1.2,
+        b: float = 0.75,
+        name_weight: int = 3,
+    ) -> None:
+        self.k1 = k1
+        self.b = b
+        self.name_weight = name_weight
+        self._docs: dict[int, _Document] = {}
+        self._postings: dict[str, dict[int, int]] = {}
+        self._terms: list[str] = []  # Sorted, for prefix matching
+        self._owners: dict[str, list[int]] = {}
+        # Postings of each searched term as (score, document), best first; cleared whenever the index changes
+        self._impacts: dict[str, list[tuple[float, int]]] = {}
+        self._total_length = 0
+        self._next_doc = 0
+        for cde_set in sets:
+            self.add_set(cde_set)
+        for model in finding_models:
+            self.add_finding_model(model)
+
+    def __len__(self) -> int:
+        """Number of documents in the index."""
+        return len(self._docs)
+
+    def _terms_of(self, name: str, *texts: str | None) -> Counter[str]:
+        terms = Counter(tokenize(name) * self.name_weight)
+        for text in texts:
+            terms.update(tokenize(text))
+        return terms
+
+    def _add(self, group: str, kind: SearchKind, key: str, name: str, owner: str | None, terms: Counter[str]) -> None:
+        doc_id = self._next_doc
+        self._next_doc += 1
+        self._docs[doc_id] = document = _Document(kind, key, name, owner, sum(terms.values()), tuple(terms))
+        self._owners.setdefault(group, []).append(doc_id)
+        self._total_length += document.length
+        for term, count in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._terms, term)
+            postings[doc_id] = count
+        self._impacts.clear()
+
+    def _remove(self, group: str) -> bool:
+        doc_ids = self._owners.pop(group, None)
+        if doc_ids is None:
+            return False
+        for doc_id in doc_ids:
+            document = self._docs.pop(doc_id)
+            self._total_length -= document.length
+            for term in document.terms:
+                postings = self._postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self._postings[term]
+                    del self._terms[bisect.bisect_left(self._terms, term)]
+        self._impacts.clear()
+        return True
+
+    def add_set(self, cde_set: CDESet) -> None:
+        """Index a set, its elements and their values, replacing any set already indexed under the same ID."""
+        group = f"set:{cde_set.id.casefold()}"
+        self._remove(group)
+        codes = [code.display for code in cde_set.index_codes]
+        terms = self._terms_of(cde_set.name, cde_set.description, *codes)
+        self._add(group, "set", cde_set.id, cde_set.name, None, terms)
+        for element in cde_set.elements:
+            codes = [code.display for code in element.index_codes or ()]
+            terms = self._terms_of(element.name, element.definition, element.question, *codes)
+            self._add(group, "element", element.id, element.name, cde_set.id, terms)
+            if isinstance(element, ValueSetElement):
+                for value in element.value_set.values:
+                    codes = [code.display for code in value.index_codes or ()]
+                    terms = self._terms_of(value.name, value.value, value.definition, *codes)
+                    self._add(group, "value", value.code, value.name, cde_set.id, terms)
+
+    def remove_set(self, set_id: str) -> None:
+        if not self._remove(f"set:{set_id.casefold()}"):
+            raise ValueError(f"CDE Set '{set_id}' not found in search index")
+
+    def add_finding_model(self, model: FindingModel) -> None:
+        """Index a finding model and its attributes, replacing any model already indexed under the same name."""
+        group = f"model:{model.finding_name.casefold()}"
+        self._remove(group)
+        name = model.finding_name
+        self._add(group, "finding_model", name, name, None, self._terms_of(name, model.description))
+        for attribute in model.attributes:
+            texts = [attribute.description]
+            for value in getattr(attribute, "values", ()):
+                texts += [value.name, value.description]
+            terms = self._terms_of(attribute.name, *texts)
+            self._add(group, "attribute", f"{name}/{attribute.name}", attribute.name, name, terms)
+
+    def remove_finding_model(self, finding_name: str) -> None:
+        if not self._remove(f"model:{finding_name.casefold()}"):
+            raise ValueError(f"Finding model '{finding_name}' not found in search index")
+
+    def _expand(self, prefix: str, max_expansions: int) -> list[str]:
+        start = bisect.bisect_left(self._terms, prefix)
+        expansions = []
+        for term in self._terms[start : start + max_expansions]:
+            if not term.startswith(prefix):
+                break
+            expansions.append(term)
+        return expansions
+
+    def _ranked(self, term: str) -> list[tuple[float, int]]:
+        ranked = self._impacts.get(term)
+        if ranked is None:
+            docs, k1, b = self._docs, self.k1, self.b
+            postings = self._postings[term]
+            average_length = self._total_length / len(docs)
+            idf = _idf(len(docs), len(postings))
+            ranked = [
+                (idf * count * (k1 + 1) / (count + k1 * (1 - b + b * docs[doc_id].length / average_length)), doc_id)
+                for doc_id, count in postings.items()
+            ]
+            ranked.sort(key=_best_first)
+            self._impacts[term] = ranked
+        return ranked
+
+    def _ranked_group(self, terms: list[str]) -> Iterator[tuple[float, int]]:
+        """Postings of any of the terms, best first; a document in several comes first with its best score."""
+        if len(terms) == 1:
+            return iter(self._ranked(terms[0]))
+        return heapq.merge(*(self._ranked(term) for term in terms), key=_best_first)
+
+    def _score(self, doc_id: int, groups: list[list[str]]) -> float:
+        docs, postings, k1, b = self._docs, self._postings, self.k1, self.b
+        norm = k1 * (1 - b + b * docs[doc_id].length / (self._total_length / len(docs)))
+        score = 0.0
+        for group in groups:
+            best = 0.0
+            for term in group:
+                if count := postings[term].get(doc_id):
+                    best = max(best, _idf(len(docs), len(postings[term])) * count * (k1 + 1) / (count + norm))
+            score += best
+        return score
+
+    def search(
+        self,
+        query: str,
+        /,
+        limit: int = 10,
+        kinds: Iterable[SearchKind] | None = None,
+        prefix: bool = True,
+        max_expansions: int = 50,
+    ) -> list[SearchHit]:
+        """Get the best `limit` matches for the query, best first, optionally only of the given kinds."""
+        words = tokenize(query)
+        if not words or not self._docs or limit < 1:
+            return []
+        # Each query word matches a group of terms: itself, plus its expansions if it's the prefix word
+        # (the last one, which may also come earlier in the query)
+        word_groups = {word: [word] for word in words}
+        if prefix:
+            word_groups[words[-1]] = list(dict.fromkeys([words[-1], *self._expand(words[-1], max_expansions)]))
+        groups = [
+            terms for group in word_groups.values() if (terms := [term for term in group if term in self._postings])
+        ]
+        wanted = set(kinds) if kinds is not None else None
+
+        # Documents with more than one of the query words; usually few, and found by set operations in C
+        shared: set[int] = set()
+        for i, group in enumerate(groups):
+            for other in groups[i + 1 :]:
+                for term in group:
+                    for other_term in other:
+                        shared |= self._postings[term].keys() & self._postings[other_term].keys()
+        # The rest match one word only, so their score is the one in that word's list
+        top: list[tuple[float, int]] = []
+        for group in groups:
+            found = 0
+            seen: set[int] = set()
+            for score, doc_id in self._ranked_group(group):
+                if found == limit or (len(top) == limit and score < top[0][0]):
+                    break
+                if doc_id in shared or doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                if wanted is None or self._docs[doc_id].kind in wanted:
+                    found += 1
+                    _push(top, limit, score, doc_id)
+        if len(shared) > _MAX_SHARED:
+            self._threshold_top(groups, shared, top, limit, wanted)
+        else:
+            for doc_id in shared:
+                if wanted is None or self._docs[doc_id].kind in wanted:
+                    _push(top, limit, self._score(doc_id, groups), doc_id)
+
+        hits = []
+        for score, negative_id in sorted(top, reverse=True):
+            document = self._docs[-negative_id]
+            hits.append(SearchHit(score, document.kind, document.key, document.name, document.owner))
+        return hits
+
+    def _threshold_top(
+        self,
+        groups: list[list[str]],
+        shared: set[int],
+        top: list[tuple[float, int]],
+        limit: int,
+        wanted: set[str] | None,
+    ) -> None:
+        """Add the best of the `shared` documents to `top`, reading the groups' lists in turn until no
+        document further down could make it."""
+        lists = [self._ranked_group(group) for group in groups]
+        bounds = [math.inf] * len(lists)
+        seen: set[int] = set()
+        active = list(range(len(lists)))
+        while active:
+            for list_number in list(active):
+                impact = next(lists[list_number], None)
+                if impact is None:
+                    bounds[list_number] = 0.0
+                    active.remove(list_number)
+                    continue
+                bounds[list_number], doc_id = impact
+                if doc_id not in shared or doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                if wanted is None or self._docs[doc_id].kind in wanted:
+                    _push(top, limit, self._score(doc_id, groups), doc_id)
+            # Nothing not yet read can score more than the sum of the scores last read from each list
+            if len(top) == limit and top[0][0] >= sum(bounds):
+                break
+
+    def info(self) -> dict[str, int]:
+        """Report the size of the index."""
+        return {
+            "documents": len(self._docs),
+            "terms": len(self._postings),
+            "postings": sum(len(postings) for postings in self._postings.values()),
+            "sets": sum(group.startswith("set:") for group in self._owners),
+            "finding_models": sum(group.startswith("model:") for group in self._owners),
+        }
+
+    def save(self, path: str | os.PathLike[str], /) -> None:
+        """Write the index to a file, to be read back with `load`."""
+        data = {
+            "version": SEARCH_INDEX_FORMAT_VERSION,
+            "settings": (self.k1, self.b, self.name_weight),
+            "docs": self._docs,
+            "postings": self._postings,
+            "owners": self._owners,
+            "next_doc": self._next_doc,
+        }
+        tmp_path = f"{os.fspath(path)}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str], /) -> CatalogSearchIndex:
+        """Read an index written by `save`."""
+        with open(path, "rb") as f:
+            data = pickle.load(f)  # noqa: S301
+        if data.get("version") != SEARCH_INDEX_FORMAT_VERSION:
+            raise ValueError(f"'{path}' is not a version {SEARCH_INDEX_FORMAT_VERSION} search index")
+        k1, b, name_weight = data["settings"]
+        index = cls(k1=k1, b=b, name_weight=name_weight)
+        index._docs = data["docs"]
+        index._postings = data["postings"]
+        index._owners = data["owners"]
+        index._next_doc = data["next_doc"]
+        index._terms = sorted(index._postings)
+        index._total_length = sum(document.length for document in index._docs.values())
+        return index
+
+
+# Above this many documents sharing query words, `search` finds the best of them with the threshold algorithm
+_MAX_SHARED: Final[int] = 200
+
+
+def _idf(doc_count: int, term_count: int) -> float:
+    return math.log(1 + (doc_count - term_count + 0.5) / (term_count + 0.5))
+
+
+def _best_first(impact: tuple[float, int]) -> tuple[float, int]:
+    return -impact[0], impact[1]
+
+
+def _push(top: list[tuple[float, int]], limit: int, score: float, doc_id: int) -> None:
+    """Keep the best `limit` as a min-heap of `(score, -document)`, so ties go to the earlier document."""
+    if len(top) < limit:
+        heapq.heappush(top, (score, -doc_id))
+    elif (score, -doc_id) > top[0]:
+        heapq.heapreplace(top, (score, -doc_id))
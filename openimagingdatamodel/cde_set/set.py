@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl, PrivateAttr
 
 from .common import (  # noqa: TCH001
     BodyPart,
@@ -16,12 +16,19 @@ from .common import (  # noqa: TCH001
     Version,
 )
 from .element import CDEElement  # noqa: TCH001
+from .lookup import LookupIndex
+
+
+def _element_keys(element: CDEElement) -> tuple[str, str]:
+    return element.id, element.name
 
 
 # https://github.com/RSNA/ACR-RSNA-CDEs/blob/master/cde.schema.json
 class CDESet(BaseModel):
     """Represents a CDE Set with its component Elements."""
 
+    model_config = ConfigDict(defer_build=True)
+
     id: str = Field(..., pattern="^(RDES|TO_BE_DETERMINED)\d+", description="Must be a valid ID")
     name: str = Field(..., max_length=50, description="Must be 50 or fewer characters long")
     description: str = Field(..., max_length=100, description="Must be 100 or fewer characters long")
@@ -37,14 +44,14 @@ class CDESet(BaseModel):
     elements: list[CDEElement] = Field(default_factory=list)  # TODO: Require at least one element
     references: list[Reference] | None = None
 
+    _element_index: LookupIndex[CDEElement] = PrivateAttr(default_factory=lambda: LookupIndex(_element_keys))
+
     def get_element(self, element: str) -> CDEElement:
         """Get a component CDEElement by name or ID."""
-        element = element.casefold()
-        if not hasattr(self, "_element_index"):
-            self._element_index = {}
-            for el in self.elements:
-                self._element_index[el.id.casefold()] = el
-                self._element_index[el.name.casefold()] = el
-        if element in self._element_index:
-            return self._element_index[element]
-        raise ValueError(f"Element '{element}' not found in CDE Set '{self.id}' ({self.name})")
+        if (found := self._element_index.find(self.elements, element)) is None:
+            raise ValueError(f"Element '{element}' not found in CDE Set '{self.id}' ({self.name})")
+        return found
+
+    def element_index_info(self) -> dict[str, int]:
+        """Report hits, misses and rebuilds of the index behind `get_element`."""
+        return self._element_index.info()
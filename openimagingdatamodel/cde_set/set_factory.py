@@ -1,44 +1,86 @@
 """Utility class for building up a CDE set."""
 
-import random
+import logging
+import os
+import warnings
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import date
-from typing import Any
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator
 
 from caseswitcher import to_snake
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, ConfigDict, ValidationError
 
 from openimagingdatamodel.cde_set import finding_model
 from openimagingdatamodel.cde_set.finding_model import FindingModel
+from openimagingdatamodel.id_allocator import PROVISIONAL_PREFIX, EntropyIdAllocator, IdAllocator
 
 from .common import Event, Status, Version
-from .element import BooleanElement, FloatElement, FloatValue, IntegerElement, IntegerValue, ValueSet, ValueSetElement
+from .element import (
+    BooleanElement,
+    CDEElement,
+    FloatElement,
+    FloatValue,
+    IntegerElement,
+    IntegerValue,
+    ValueSet,
+    ValueSetElement,
+    ValueSetValue,
+)
+from .fingerprint import ElementDiff, SetDiff
 from .set import CDESet
 
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4096)
+def _value_slug(name: str) -> str:
+    """Snake-case a value name; cached because the same value names recur across a whole library."""
+    return to_snake(name)
+
+
+def _today() -> str:
+    return date.today().strftime("%Y-%m-%d")
+
 
 class SetIddict(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     set_id: str
     element_ids: dict[str, str]
 
 
 class SetFactory:
+    # Makes the provisional `TO_BE_DETERMINED...` set and element IDs; see `openimagingdatamodel.id_allocator`
+    id_allocator: IdAllocator = EntropyIdAllocator()
+
     @staticmethod
     def random_digits() -> str:
-        return "".join(random.choices("0123456789", k=4))
+        """Deprecated: return the digits of a provisional set ID from `id_allocator`."""
+        warnings.warn(
+            "SetFactory.random_digits is deprecated; use SetFactory.id_allocator.provisional_id",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return SetFactory.id_allocator.provisional_id("set", "").removeprefix(PROVISIONAL_PREFIX)
 
     @staticmethod
-    def create_set(name: str, /, description: str | None = None, add_presence_element: bool = False) -> CDESet:
+    def create_set(
+        name: str, /, description: str | None = None, add_presence_element: bool = False, today: str | None = None
+    ) -> CDESet:
         """Return a default required CDE Set metadata."""
 
         if not name:
             raise ValueError("Name is required for a CDE Set")
 
-        random_digits = SetFactory.random_digits()
-        today = date.today().strftime("%Y-%m-%d")
+        today = today or _today()
         version = Version(number=1, date=today)
         status = Status(date=today, name="Proposed")
         history = [Event(date=today, status=status)]
         set = CDESet(
-            id=f"TO_BE_DETERMINED{random_digits}",
+            id=SetFactory.id_allocator.provisional_id("set", name),
             name=name,
             description=(description or f"Description for {name}"),
             schema_version="1.0.0",
@@ -49,21 +91,28 @@ class SetFactory:
             specialties=[],
         )
         if add_presence_element:
-            set.elements.append(SetFactory.create_presence_element(name))
+            set.elements.append(SetFactory.create_presence_element(name, today=today, parent_set=set.id))
         return set
 
     @staticmethod
-    def default_element_metadata(name) -> dict[str, str | dict[str, Any] | list[Any]]:
-        """Return a default required CDE Element metadata."""
+    def default_element_metadata(
+        name, today: str | None = None, parent_set: str | None = None, value_key: str = ""
+    ) -> dict[str, str | dict[str, Any] | list[Any]]:
+        """Return a default required CDE Element metadata.
+
+        The provisional ID is made from the ID of the set the element is for (if given), the element's
+        value key (e.g. `"value_set"`) and its name, so deterministic allocators give elements of the
+        same name in different sets, or of a different type, different IDs.
+        """
 
         if not name:
             raise ValueError("Name is required for a CDE Element")
 
-        today = date.today().strftime("%Y-%m-%d")
-        random_digits = SetFactory.random_digits()
+        today = today or _today()
+        content = f"{parent_set or ''}\0{value_key}\0{name}"
 
         return {
-            "id": f"TO_BE_DETERMINED{random_digits}",
+            "id": SetFactory.id_allocator.provisional_id("element", content),
             "name": name,
             "element_version": {
                 "number": 1,
@@ -84,11 +133,13 @@ class SetFactory:
         max: int | None = None,
         step: int | None = None,
         unit: str | None = None,
+        today: str | None = None,
+        parent_set: str | None = None,
     ) -> IntegerElement:
         """Return an integer element."""
-        element_id = "TO_BE_DETERMINED" + SetFactory.random_digits()
-        boilerplate = SetFactory.default_element_metadata(name)
-        boilerplate["id"] = element_id
+        boilerplate = SetFactory.default_element_metadata(
+            name, today=today, parent_set=parent_set, value_key="integer_value"
+        )
 
         integer_value_args: dict[str, str | int] = {}
         if min is not None:
@@ -109,11 +160,13 @@ class SetFactory:
         max: float | None = None,
         step: float | None = None,
         unit: str | None = None,
+        today: str | None = None,
+        parent_set: str | None = None,
     ) -> FloatElement:
         """Return a float element."""
-        element_id = "TO_BE_DETERMINED" + SetFactory.random_digits()
-        boilerplate = SetFactory.default_element_metadata(name)
-        boilerplate["id"] = element_id
+        boilerplate = SetFactory.default_element_metadata(
+            name, today=today, parent_set=parent_set, value_key="float_value"
+        )
 
         float_value_args: dict[str, str | float] = {}
         if min is not None:
@@ -127,11 +180,11 @@ class SetFactory:
         return FloatElement(**boilerplate, float_value=FloatValue(**float_value_args))  # type: ignore
 
     @staticmethod
-    def create_boolean_element(name: str) -> BooleanElement:
+    def create_boolean_element(name: str, today: str | None = None, parent_set: str | None = None) -> BooleanElement:
         """Return a boolean element."""
-        element_id = "TO_BE_DETERMINED" + SetFactory.random_digits()
-        boilerplate = SetFactory.default_element_metadata(name)
-        boilerplate["id"] = element_id
+        boilerplate = SetFactory.default_element_metadata(
+            name, today=today, parent_set=parent_set, value_key="boolean_value"
+        )
         return BooleanElement(**boilerplate, boolean_value="boolean")  # type: ignore
 
     @staticmethod
@@ -143,11 +196,14 @@ class SetFactory:
         question: str | None = None,
         min_cardinality: int = 1,
         max_cardinality: int = 1,
+        today: str | None = None,
+        parent_set: str | None = None,
     ) -> ValueSetElement:
         """Return a value set element."""
-        element_id = "TO_BE_DETERMINED" + SetFactory.random_digits()
-        boilerplate = SetFactory.default_element_metadata(name)
-        boilerplate["id"] = element_id
+        boilerplate = SetFactory.default_element_metadata(
+            name, today=today, parent_set=parent_set, value_key="value_set"
+        )
+        element_id = boilerplate["id"]
         if definition:
             boilerplate["definition"] = definition
         if question:
@@ -164,7 +220,7 @@ class SetFactory:
                 out_value["definition"] = out_value["description"]
                 del out_value["description"]
             if "value" not in out_value:
-                out_value["value"] = to_snake(out_value["name"])
+                out_value["value"] = _value_slug(out_value["name"])
             return out_value
 
         values = [check_and_fix_value(value, i) for i, value in enumerate(values)]
@@ -179,7 +235,12 @@ class SetFactory:
 
     @staticmethod
     def create_presence_element(
-        finding_name: str | None = None, /, definition: str | None = None, question: str | None = None
+        finding_name: str | None = None,
+        /,
+        definition: str | None = None,
+        question: str | None = None,
+        today: str | None = None,
+        parent_set: str | None = None,
     ) -> ValueSetElement:
         """Return a presence element."""
 
@@ -208,33 +269,112 @@ class SetFactory:
             },
         ]
 
-        return SetFactory.create_value_set_element(name, values, definition=definition, question=question)
+        return SetFactory.create_value_set_element(
+            name, values, definition=definition, question=question, today=today, parent_set=parent_set
+        )
 
     @staticmethod
-    def create_set_from_finding_model(model: FindingModel) -> CDESet:
+    def create_set_from_finding_model(model: FindingModel, today: str | None = None) -> CDESet:
+        today = today or _today()
         try:
-            set: CDESet = SetFactory.create_set(model.finding_name)
+            set: CDESet = SetFactory.create_set(model.finding_name, today=today)
         except ValidationError as e:
-            print(f"Error creating set from model {finding_model}: {e}")
-            raise e
+            logger.error("Error creating set from finding model '%s': %s", model.finding_name, e)
+            raise
         set.description = model.description
-        for element in model.attributes:
-            new_el: FloatElement | ValueSetElement
-            if isinstance(element, finding_model.ChoiceAttribute):
-                values: list[dict[str, str] | str] = [value.model_dump() for value in element.values]
-                new_el = SetFactory.create_value_set_element(element.name, values)
-                for el_value, att_value in zip(new_el.value_set.values, values):
-                    if isinstance(att_value, dict) and (description := att_value.get("description")):
-                        el_value.definition = description
-            if isinstance(element, finding_model.NumericAttribute):
-                new_el = SetFactory.create_float_element(
-                    element.name, min=element.minimum, max=element.maximum, unit=element.unit
-                )
-            if element.description:
-                new_el.definition = element.description
-            set.elements.append(new_el)
+        for attribute in model.attributes:
+            set.elements.append(_element_from_attribute(attribute, today, set.id))
         return set
 
+    @staticmethod
+    def sync_set_with_finding_model(existing_set: CDESet, model: FindingModel, /, today: str | None = None) -> SetDiff:
+        """Update a set made from a FindingModel (and maybe since given published IDs) to match an edited
+        version of the model, in place, keeping the set's IDs and value codes wherever they still apply.
+
+        Attributes are matched to elements, and choice values to values, by name (ignoring case). Only
+        what differs is changed: the set's name and description, element definitions, numeric ranges and
+        units, and value names and definitions. Elements and values are put in the model's order. Unmatched
+        attributes become new elements with provisional IDs (as in `create_set_from_finding_model`), and new
+        values get codes after the element's highest existing one, so codes of removed values are never reused.
+        An attribute whose type no longer matches its element replaces it with a new element. Returns what
+        changed, as from `diff_sets`.
+        """
+        today = today or _today()
+        fields = []
+        if existing_set.name != model.finding_name:
+            existing_set.name = model.finding_name
+            fields.append("name")
+        if existing_set.description != model.description:
+            existing_set.description = model.description
+            fields.append("description")
+        old_elements = {element.name.casefold(): element for element in existing_set.elements}
+        elements: list[CDEElement] = []
+        added: list[str] = []
+        replaced: list[str] = []
+        modified: list[ElementDiff] = []
+        for attribute in model.attributes:
+            element = old_elements.pop(attribute.name.casefold(), None)
+            if element is None or not _attribute_matches(attribute, element):
+                if element is not None:
+                    replaced.append(element.id)
+                element = _element_from_attribute(attribute, today, existing_set.id)
+                added.append(element.id)
+            elif (diff := _sync_element(element, attribute)) is not None:
+                modified.append(diff)
+            elements.append(element)
+        removed = (*replaced, *(element.id for element in old_elements.values()))
+        kept = [element.id for element in existing_set.elements if element.id not in removed]
+        if kept != [element.id for element in elements if element.id not in added]:
+            fields.append("elements")
+        if added or removed or "elements" in fields:
+            existing_set.elements = elements
+        return SetDiff(existing_set.id, tuple(fields), tuple(added), removed, tuple(modified))
+
+    @staticmethod
+    def set_file_name(set: CDESet) -> str:
+        """Return the conventional file name for a CDE Set, e.g. `RDES195_pulmonary_nodule.cde.json`."""
+        return f"{set.id}_{_value_slug(set.name)}.cde.json"
+
+    @staticmethod
+    def create_sets_from_finding_models(
+        models: Iterable[FindingModel | str | os.PathLike[str]],
+        /,
+        workers: int | None = None,
+        chunksize: int = 32,
+        output_dir: str | os.PathLike[str] | None = None,
+    ) -> Iterator[CDESet]:
+        """Convert many FindingModels (or paths to FindingModel JSON files) to CDE Sets in a process pool.
+
+        Models are read from `models` lazily and sent to the workers in chunks of `chunksize`, with a
+        bounded number of chunks in flight, and the resulting sets are yielded in input order. If
+        `output_dir` is given, each worker also writes its sets there as `.cde.json` files. Per-batch
+        values such as today's date are computed once. With `workers=1` everything runs in-process.
+        Each chunk gets its IDs from `SetFactory.id_allocator.for_batch`, so a `SequenceIdAllocator`
+        stays collision-free across workers.
+        """
+        workers = workers or os.cpu_count() or 1
+        today = _today()
+        out_dir = os.fspath(output_dir) if output_dir is not None else None
+        if out_dir is not None:
+            Path(out_dir).mkdir(parents=True, exist_ok=True)
+        iterator = iter(models)
+        chunks = iter(
+            lambda: [m if isinstance(m, FindingModel) else os.fspath(m) for m in islice(iterator, chunksize)], []
+        )
+        if workers == 1:
+            for chunk in chunks:
+                yield from _convert_finding_models(chunk, today, out_dir)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending: deque[Future[list[CDESet]]] = deque()
+            for chunk in chunks:
+                allocator = SetFactory.id_allocator.for_batch(len(chunk))
+                pending.append(executor.submit(_convert_finding_models, chunk, today, out_dir, allocator))
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
     @staticmethod
     def update_set_ids_from_dict(set: CDESet, dict: SetIddict | dict[str, str | dict[str, str]]) -> None:
         if not isinstance(dict, SetIddict):
@@ -245,3 +385,111 @@ class SetFactory:
             if isinstance(element, ValueSetElement):
                 for i in range(0, len(element.value_set.values)):
                     element.value_set.values[i].code = f"{element.id}.{i}"
+
+
+def _element_from_attribute(
+    attribute: finding_model.Attribute, today: str, parent_set: str | None = None
+) -> FloatElement | ValueSetElement:
+    element: FloatElement | ValueSetElement
+    if isinstance(attribute, finding_model.ChoiceAttribute):
+        values: list[dict[str, str] | str] = [value.model_dump() for value in attribute.values]
+        element = SetFactory.create_value_set_element(attribute.name, values, today=today, parent_set=parent_set)
+        for el_value, att_value in zip(element.value_set.values, values):
+            if isinstance(att_value, dict) and (description := att_value.get("description")):
+                el_value.definition = description
+    else:
+        element = SetFactory.create_float_element(
+            attribute.name,
+            min=attribute.minimum,
+            max=attribute.maximum,
+            unit=attribute.unit,
+            today=today,
+            parent_set=parent_set,
+        )
+    if attribute.description:
+        element.definition = attribute.description
+    return element
+
+
+def _attribute_matches(attribute: finding_model.Attribute, element: CDEElement) -> bool:
+    if isinstance(attribute, finding_model.ChoiceAttribute):
+        return isinstance(element, ValueSetElement)
+    if isinstance(element, IntegerElement):
+        # An integer element can only keep whole-number bounds; otherwise the element's type changes
+        return all(bound is None or isinstance(bound, int) for bound in (attribute.minimum, attribute.maximum))
+    return isinstance(element, FloatElement)
+
+
+def _value_index(code: str) -> int:
+    suffix = code.rpartition(".")[2]
+    return int(suffix) if suffix.isdigit() else -1
+
+
+def _sync_element(element: CDEElement, attribute: finding_model.Attribute) -> ElementDiff | None:
+    """Patch an element to match its attribute; get what changed, or None if nothing did."""
+    fields = []
+    if attribute.description and element.definition != attribute.description:
+        element.definition = attribute.description
+        fields.append("definition")
+    if not isinstance(attribute, finding_model.ChoiceAttribute):
+        numeric = element.float_value if isinstance(element, FloatElement) else element.integer_value  # type: ignore[union-attr]
+        wanted = {"min": attribute.minimum, "max": attribute.maximum, "unit": attribute.unit}
+        if any(getattr(numeric, name) != value for name, value in wanted.items()):
+            for name, value in wanted.items():
+                setattr(numeric, name, value)
+            fields.append("float_value" if isinstance(element, FloatElement) else "integer_value")
+        return ElementDiff(element.id, tuple(fields), (), (), ()) if fields else None
+
+    value_set = element.value_set  # type: ignore[union-attr]
+    old_values = {value.name.casefold(): value for value in value_set.values}
+    next_index = max((_value_index(value.code) for value in value_set.values), default=-1) + 1
+    values: list[ValueSetValue] = []
+    added: list[str] = []
+    modified: list[str] = []
+    for choice in attribute.values:
+        value = old_values.pop(choice.name.casefold(), None)
+        if value is None:
+            value = ValueSetValue(
+                code=f"{element.id}.{next_index}",
+                name=choice.name,
+                value=_value_slug(choice.name),
+                definition=choice.description,
+            )
+            next_index += 1
+            added.append(value.code)
+        elif value.name != choice.name or (choice.description and value.definition != choice.description):
+            value.name = choice.name
+            value.definition = choice.description or value.definition
+            modified.append(value.code)
+        values.append(value)
+    removed = tuple(value.code for value in old_values.values())
+    kept = [value.code for value in value_set.values if value.code not in removed]
+    if kept != [value.code for value in values if value.code not in added]:
+        fields.append("values")
+    if added or removed or "values" in fields:
+        value_set.values = values
+    if not (fields or added or removed or modified):
+        return None
+    return ElementDiff(element.id, tuple(fields), tuple(added), removed, tuple(modified))
+
+
+def _convert_finding_models(
+    models: list[FindingModel | str], today: str, output_dir: str | None, allocator: IdAllocator | None = None
+) -> list[CDESet]:
+    """Worker for `SetFactory.create_sets_from_finding_models`: convert (and optionally write) one chunk.
+
+    In a worker process, `allocator` replaces the process's `SetFactory.id_allocator`, so IDs made in
+    different workers come from ranges the parent reserved for them.
+    """
+    if allocator is not None:
+        SetFactory.id_allocator = allocator
+    sets = []
+    for model in models:
+        if not isinstance(model, FindingModel):
+            model = FindingModel.model_validate_json(Path(model).read_bytes())
+        cde_set = SetFactory.create_set_from_finding_model(model, today=today)
+        if output_dir is not None:
+            path = Path(output_dir) / SetFactory.set_file_name(cde_set)
+            path.write_text(cde_set.model_dump_json(indent=2, exclude_none=True))
+        sets.append(cde_set)
+    return sets
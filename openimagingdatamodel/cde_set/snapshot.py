@@ -0,0 +1,324 @@
+"""Compiled binary snapshot of a catalog of CDE Sets, read through `mmap` and validated on demand."""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import threading
+from typing import TYPE_CHECKING, Final, Iterable, Iterator
+
+from pydantic import ConfigDict, TypeAdapter
+
+from .element import CDEElement, ValueSetElement, ValueSetValue  # noqa: TCH001
+from .set import CDESet
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+SNAPSHOT_MAGIC: Final[bytes] = b"CDESNAP\x00"
+SNAPSHOT_FORMAT_VERSION: Final[int] = 1
+
+# Layout (all integers little-endian, all offsets absolute):
+#   header
+#   string index      (offset, length) into the string data for each string number
+#   string data       UTF-8 strings: IDs, names and casefolded lookup keys
+#   set table         one row per set, sorted by casefolded set ID
+#   element table     one row per element, grouped by set in set table order
+#   element keys      (key, element number) for casefolded element IDs and names, sorted by key
+#   value keys        (key, element number, value position) for casefolded value codes, sorted by key
+#   blobs             each set's JSON; each element's JSON is a slice of its set's
+_HEADER: Final = struct.Struct("<8sIIIIII7Q")
+_STRING: Final = struct.Struct("<II")
+_SET: Final = struct.Struct("<IIIIIQI")  # key, id, name, first element, element count, blob offset, blob length
+_ELEMENT: Final = struct.Struct("<IIIQI")  # set number, id, name, blob offset, blob length
+_ELEMENT_KEY: Final = struct.Struct("<II")  # key, element number
+_VALUE_KEY: Final = struct.Struct("<III")  # key, element number, value position
+
+_ELEMENT_ADAPTER: Final = TypeAdapter(CDEElement, config=ConfigDict(defer_build=True))
+
+
+class _StringTable:
+    """Collects unique strings for the writer and hands out their numbers."""
+
+    def __init__(self) -> None:
+        self.numbers: dict[str, int] = {}
+        self.encoded: list[bytes] = []
+
+    def add(self, value: str) -> int:
+        number = self.numbers.get(value)
+        if number is None:
+            number = self.numbers[value] = len(self.encoded)
+            self.encoded.append(value.encode())
+        return number
+
+
+class CDECatalogSnapshot:
+    """Read-only catalog of CDE Sets compiled into one binary file by `CDECatalogSnapshot.write`.
+
+    The file is memory-mapped, so opening it costs the same however many sets it holds, and processes
+    that open it (or fork after opening it) share its pages instead of each holding parsed copies.
+    Lookups by set ID, element ID or name, and value code binary-search the sorted key tables; Pydantic
+    objects are only built from the stored JSON when a set or element is actually requested. Built
+    sets are kept, so asking for the same set again returns the same object.
+    """
+
+    def __init__(self, path: str | os.PathLike[str], /) -> None:
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _HEADER.size:
+            self._mm.close()
+            raise ValueError(f"'{self.path}' is not a CDE catalog snapshot")
+        (
+            magic,
+            version,
+            self._string_count,
+            self._set_count,
+            self._element_count,
+            self._element_key_count,
+            self._value_key_count,
+            self._strings_at,
+            self._string_data_at,
+            self._sets_at,
+            self._elements_at,
+            self._element_keys_at,
+            self._value_keys_at,
+            self._blobs_at,
+        ) = _HEADER.unpack_from(self._mm, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"'{self.path}' is not a version {SNAPSHOT_FORMAT_VERSION} CDE catalog snapshot")
+        self._sets: dict[int, CDESet] = {}
+        self._lock = threading.Lock()
+
+    # Writing
+
+    @staticmethod
+    def write(path: str | os.PathLike[str], sets: Iterable[CDESet], /) -> int:
+        """Compile CDE Sets into a snapshot file, returning the number of sets written."""
+        strings = _StringTable()
+        by_key: dict[str, CDESet] = {}
+        for cde_set in sets:
+            key = cde_set.id.casefold()
+            if key in by_key:
+                raise ValueError(f"Duplicate CDE Set ID '{cde_set.id}'")
+            by_key[key] = cde_set
+
+        set_rows: list[tuple[int, ...]] = []
+        element_rows: list[tuple[int, ...]] = []
+        element_keys: list[tuple[bytes, int, int]] = []
+        value_keys: list[tuple[bytes, int, int, int]] = []
+        blobs: list[bytes] = []
+        blob_offset = 0
+        for set_no, key in enumerate(sorted(by_key, key=str.encode)):
+            cde_set = by_key[key]
+            # Put the set's JSON together by hand so each element's JSON is a known slice of it
+            head = cde_set.model_dump_json(exclude={"elements"}, exclude_none=True).encode()
+            parts = [head[:-1], b',"elements":[']
+            position = blob_offset + len(parts[0]) + len(parts[1])
+            for element_pos, element in enumerate(cde_set.elements):
+                element_no = len(element_rows)
+                if element_pos:
+                    parts.append(b",")
+                    position += 1
+                element_json = element.model_dump_json(exclude_none=True).encode()
+                parts.append(element_json)
+                element_rows.append((
+                    set_no,
+                    strings.add(element.id),
+                    strings.add(element.name),
+                    position,
+                    len(element_json),
+                ))
+                position += len(element_json)
+                for element_key in {element.id.casefold(), element.name.casefold()}:
+                    element_keys.append((element_key.encode(), strings.add(element_key), element_no))
+                if isinstance(element, ValueSetElement):
+                    for value_pos, value in enumerate(element.value_set.values):
+                        code = value.code.casefold()
+                        value_keys.append((code.encode(), strings.add(code), element_no, value_pos))
+            parts.append(b"]}")
+            blob = b"".join(parts)
+            set_rows.append((
+                strings.add(key),
+                strings.add(cde_set.id),
+                strings.add(cde_set.name),
+                len(element_rows) - len(cde_set.elements),
+                len(cde_set.elements),
+                blob_offset,
+                len(blob),
+            ))
+            blobs.append(blob)
+            blob_offset += len(blob)
+        element_keys.sort()
+        value_keys.sort()
+
+        string_index = bytearray()
+        string_offset = 0
+        for encoded in strings.encoded:
+            string_index += _STRING.pack(string_offset, len(encoded))
+            string_offset += len(encoded)
+        sections = [
+            bytes(string_index),
+            b"".join(strings.encoded),
+            b"".join(_SET.pack(*row) for row in set_rows),
+            b"".join(_ELEMENT.pack(*row) for row in element_rows),
+            b"".join(_ELEMENT_KEY.pack(string_no, element_no) for _, string_no, element_no in element_keys),
+            b"".join(_VALUE_KEY.pack(*row[1:]) for row in value_keys),
+            b"".join(blobs),
+        ]
+        offsets = []
+        offset = _HEADER.size
+        for section in sections:
+            offsets.append(offset)
+            offset += len(section)
+        header = _HEADER.pack(
+            SNAPSHOT_MAGIC,
+            SNAPSHOT_FORMAT_VERSION,
+            len(strings.encoded),
+            len(set_rows),
+            len(element_rows),
+            len(element_keys),
+            len(value_keys),
+            *offsets,
+        )
+        path = os.fspath(path)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                for section in sections:
+                    f.write(section)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        return len(set_rows)
+
+    # Reading the tables
+
+    def _string_bytes(self, number: int) -> bytes:
+        offset, length = _STRING.unpack_from(self._mm, self._strings_at + number * _STRING.size)
+        start = self._string_data_at + offset
+        return self._mm[start : start + length]
+
+    def _string(self, number: int) -> str:
+        return self._string_bytes(number).decode()
+
+    def _lower_bound(self, table_at: int, count: int, row: struct.Struct, key: bytes) -> int:
+        """Find the first row of a sorted table whose key (its first field) is not less than `key`."""
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self._string_bytes(row.unpack_from(self._mm, table_at + middle * row.size)[0]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _find_rows(self, table_at: int, count: int, row: struct.Struct, key: str) -> list[tuple[int, ...]]:
+        encoded = key.casefold().encode()
+        rows = []
+        for number in range(self._lower_bound(table_at, count, row, encoded), count):
+            found = row.unpack_from(self._mm, table_at + number * row.size)
+            if self._string_bytes(found[0]) != encoded:
+                break
+            rows.append(found)
+        return rows
+
+    def _set_row(self, set_no: int) -> tuple[int, ...]:
+        return _SET.unpack_from(self._mm, self._sets_at + set_no * _SET.size)
+
+    def _element_row(self, element_no: int) -> tuple[int, ...]:
+        return _ELEMENT.unpack_from(self._mm, self._elements_at + element_no * _ELEMENT.size)
+
+    def _set_number(self, set_id: str) -> int | None:
+        encoded = set_id.casefold().encode()
+        set_no = self._lower_bound(self._sets_at, self._set_count, _SET, encoded)
+        if set_no < self._set_count and self._string_bytes(self._set_row(set_no)[0]) == encoded:
+            return set_no
+        return None
+
+    def _element_number(self, element: str) -> int:
+        rows = self._find_rows(self._element_keys_at, self._element_key_count, _ELEMENT_KEY, element)
+        if not rows:
+            raise ValueError(f"Element '{element}' not found in snapshot")
+        # Keys are sorted with their element numbers, so the first row is the set's first matching element
+        set_nos = {self._element_row(element_no)[0] for _, element_no in rows}
+        if len(set_nos) > 1:
+            set_ids = ", ".join(self._string(self._set_row(set_no)[1]) for set_no in sorted(set_nos))
+            raise ValueError(f"Element name '{element}' is ambiguous; found in sets {set_ids}")
+        return rows[0][1]
+
+    def _blob(self, offset: int, length: int) -> bytes:
+        start = self._blobs_at + offset
+        return self._mm[start : start + length]
+
+    def _load_set(self, set_no: int) -> CDESet:
+        cde_set = self._sets.get(set_no)
+        if cde_set is None:
+            _, _, _, _, _, offset, length = self._set_row(set_no)
+            cde_set = CDESet.model_validate_json(self._blob(offset, length))
+            with self._lock:
+                cde_set = self._sets.setdefault(set_no, cde_set)
+        return cde_set
+
+    # Lookups
+
+    def __len__(self) -> int:
+        return self._set_count
+
+    def __contains__(self, set_id: object) -> bool:
+        return isinstance(set_id, str) and self._set_number(set_id) is not None
+
+    def __iter__(self) -> Iterator[CDESet]:
+        for set_no in range(self._set_count):
+            yield self._load_set(set_no)
+
+    @property
+    def set_ids(self) -> list[str]:
+        """IDs of all the sets in the snapshot, in order of their casefolded ID."""
+        return [self._string(self._set_row(set_no)[1]) for set_no in range(self._set_count)]
+
+    def set_name(self, set_id: str) -> str:
+        """Get a set's name without building the set."""
+        if (set_no := self._set_number(set_id)) is None:
+            raise ValueError(f"CDE Set '{set_id}' not found in snapshot")
+        return self._string(self._set_row(set_no)[2])
+
+    def get_set(self, set_id: str) -> CDESet:
+        """Get a CDE Set by ID, building it from the snapshot the first time it is requested."""
+        if (set_no := self._set_number(set_id)) is None:
+            raise ValueError(f"CDE Set '{set_id}' not found in snapshot")
+        return self._load_set(set_no)
+
+    def get_element_set(self, element: str) -> CDESet:
+        """Get the CDE Set containing an element, given the element's ID or (unambiguous) name."""
+        return self._load_set(self._element_row(self._element_number(element))[0])
+
+    def get_element(self, element: str) -> CDEElement:
+        """Get an element by ID or (unambiguous) name, building only the element and not its set."""
+        _, _, _, offset, length = self._element_row(self._element_number(element))
+        return _ELEMENT_ADAPTER.validate_json(self._blob(offset, length))
+
+    def get_value(self, code: str) -> ValueSetValue:
+        """Get a ValueSetValue by its code (e.g. `RDE1304.2`)."""
+        rows = self._find_rows(self._value_keys_at, self._value_key_count, _VALUE_KEY, code)
+        if not rows:
+            raise ValueError(f"Value code '{code}' not found in snapshot")
+        _, element_no, value_pos = rows[0]
+        _, _, _, offset, length = self._element_row(element_no)
+        element = _ELEMENT_ADAPTER.validate_json(self._blob(offset, length))
+        return element.value_set.values[value_pos]
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> CDECatalogSnapshot:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self.close()
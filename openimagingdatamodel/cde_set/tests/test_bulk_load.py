@@ -0,0 +1,59 @@
+import json
+import logging
+from pathlib import Path
+
+import pytest  # type: ignore
+from openimagingdatamodel.cde_set.bulk_load import iter_set_records, load_sets
+
+
+@pytest.fixture
+def set_dir(tmp_path: Path, pulmonary_nodule_file: Path) -> Path:
+    data = json.loads(pulmonary_nodule_file.read_text())
+    directory = tmp_path / "sets"
+    directory.mkdir()
+    for i in range(3):
+        data["id"] = f"RDES{900 + i}"
+        (directory / f"RDES{900 + i}.cde.json").write_text(json.dumps(data))
+    data["elements"][1]["element_version"] = {"number": "one"}
+    (directory / "RDES999.cde.json").write_text(json.dumps(data))
+    (directory / "RDES998.cde.json").write_text("{")
+    (directory / "notes.txt").write_text("not a set")
+    return directory
+
+
+def test_load_sets_keeps_going(set_dir: Path, tmp_path: Path, caplog):
+    quarantine = tmp_path / "quarantine.ndjson"
+    loader = load_sets([set_dir], quarantine=quarantine)
+    with caplog.at_level(logging.INFO, logger="openimagingdatamodel.quarantine"):
+        sets = loader.load()
+    assert [cde_set.id for cde_set in sets] == ["RDES900", "RDES901", "RDES902"]
+    report = loader.report
+    assert (report.records, report.loaded, report.failed) == (5, 3, 2)
+    assert report.error_rate == pytest.approx(0.4)
+    assert report.bytes_read == sum(p.stat().st_size for p in set_dir.glob("*.cde.json"))
+    assert report.summary()["errors"] == report.error_count == len(report.errors)
+    paths = {Path(e.source).name: e.path for e in report.errors}
+    assert paths["RDES998.cde.json"] == ""
+    assert paths["RDES999.cde.json"].startswith("elements.1.")
+    entries = [json.loads(line) for line in quarantine.read_text().splitlines()]
+    assert [Path(entry["source"]).name for entry in entries] == ["RDES998.cde.json", "RDES999.cde.json"]
+    assert "2 failed" in caplog.records[-1].getMessage()
+
+
+def test_load_sets_from_ndjson(set_dir: Path, tmp_path: Path):
+    path = tmp_path / "sets.ndjson"
+    records = list(iter_set_records([set_dir]))
+    records = [r for r in records if r.data != b"{"]
+    path.write_bytes(b"".join(r.data + b"\n" for r in records))
+    loader = load_sets([path], check=lambda cde_set: cde_set.get_element("Size"))
+    assert len(loader.load()) == 3
+    assert loader.report.failed == 1
+    assert {error.offset for error in loader.report.errors} == {sum(len(r.data) + 1 for r in records[:3])}
+    assert not (tmp_path / "quarantine.ndjson").exists()
+
+
+def test_check_failures_are_quarantined(set_dir: Path):
+    loader = load_sets([set_dir / "RDES900.cde.json"], check=lambda cde_set: cde_set.get_element("nonexistent"))
+    assert loader.load() == []
+    assert loader.report.errors[0].message.startswith("Element 'nonexistent' not found")
+    assert loader.report.errors[0].type == "ValueError"
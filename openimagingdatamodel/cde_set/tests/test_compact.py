@@ -0,0 +1,44 @@
+import dataclasses
+from pathlib import Path
+
+import pytest  # type: ignore
+from openimagingdatamodel.cde_set.compact import CompactCDESet
+from openimagingdatamodel.cde_set.set import CDESet
+
+
+def test_round_trip(sample_set_file: Path):
+    cde_set = CDESet.model_validate_json(sample_set_file.read_text())
+    compact = CompactCDESet.from_model(cde_set)
+    assert compact.to_model() == cde_set
+    assert CompactCDESet.from_model(compact.to_model()) == compact
+
+
+def test_shared_instances_and_strings(adrenal_nodule: CDESet):
+    first, second = (CompactCDESet.from_model(s) for s in (adrenal_nodule, adrenal_nodule.model_copy(deep=True)))
+    assert first.set_version is second.set_version
+    assert first.status is second.status
+    assert first.specialties[0] is second.specialties[0]
+    assert first.elements[0].element_version is first.elements[1].element_version
+    assert first.schema_version is second.elements[0].schema_version
+    assert first.elements[0].name is second.elements[0].name
+
+
+def test_read_only(pulmonary_nodule: CDESet):
+    compact = CompactCDESet.from_model(pulmonary_nodule)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        compact.name = "Changed"  # type: ignore[misc]
+    assert not hasattr(compact, "__dict__")
+    assert isinstance(compact.elements, tuple)
+
+
+def test_lookups(pulmonary_nodule: CDESet):
+    cde_set = pulmonary_nodule
+    compact = CompactCDESet.from_model(cde_set)
+    element = cde_set.elements[0]
+    assert compact.get_element(element.name.upper()).id == element.id
+    value = element.value_set.values[0]
+    assert compact.get_element(element.id).get_value(value.name).code == value.code
+    with pytest.raises(ValueError, match="not found"):
+        compact.get_element("nonexistent")
+    with pytest.raises(ValueError, match="not found"):
+        compact.get_element(element.id).get_value("nonexistent")
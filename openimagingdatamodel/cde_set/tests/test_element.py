@@ -0,0 +1,42 @@
+from pathlib import Path
+
+import pytest  # type: ignore
+from openimagingdatamodel.cde_set.element import BooleanElement, FloatElement, IntegerElement, ValueSetElement
+from openimagingdatamodel.cde_set.set import CDESet
+from openimagingdatamodel.cde_set.set_factory import SetFactory
+from pydantic import ValidationError
+
+
+def test_set_round_trip(sample_set_file: Path):
+    cde_set = CDESet.model_validate_json(sample_set_file.read_text())
+    assert CDESet.model_validate_json(cde_set.model_dump_json()) == cde_set
+    assert CDESet.model_validate(cde_set.model_dump()) == cde_set
+
+
+def test_element_discriminator(adrenal_nodule: CDESet):
+    cde_set = adrenal_nodule
+    assert [type(el) for el in cde_set.elements] == [
+        IntegerElement,
+        ValueSetElement,
+        IntegerElement,
+        IntegerElement,
+        IntegerElement,
+        BooleanElement,
+        ValueSetElement,
+        ValueSetElement,
+    ]
+
+
+def test_element_instances():
+    cde_set = SetFactory.create_set("Test Set")
+    element = SetFactory.create_float_element("Size")
+    cde_set = CDESet.model_validate({**cde_set.model_dump(), "elements": [element]})
+    assert isinstance(cde_set.elements[0], FloatElement)
+    assert cde_set.elements[0] is element
+
+
+def test_element_without_value_type():
+    data = SetFactory.create_set("Test Set").model_dump()
+    data["elements"] = [SetFactory.default_element_metadata("Size")]
+    with pytest.raises(ValidationError):
+        CDESet.model_validate(data)
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pytest  # type: ignore
+from openimagingdatamodel.cde_set.common import IndexCode
+from openimagingdatamodel.cde_set.extractor import ValueExtractor
+from openimagingdatamodel.cde_set.set import CDESet
+from openimagingdatamodel.cde_set.set_factory import SetFactory
+from openimagingdatamodel.observation.observation_factory import ObservationFactory
+
+REPORT = (
+    "Part-solid nodule in the right upper lobe, size 12.5 mm with solid component size 5 mm. "
+    "Volume 300 mm3. Presence: present; suspicious appearance: yes. Min density -20 HU."
+)
+
+
+def test_find_values_and_numbers(pulmonary_nodule: CDESet):
+    extractor = ValueExtractor([pulmonary_nodule])
+    found = {
+        (r.element.name, getattr(r.value, "name", r.value), REPORT[slice(*r.span)]) for r in extractor.find(REPORT)
+    }
+    assert ("Composition", "part-solid", "Part-solid") in found
+    assert ("Size", 12.5, "12.5 mm") in found
+    assert ("Solid component size", 5.0, "5 mm") in found
+    assert ("Volume", 300.0, "300 mm3") in found
+    assert ("Min density", -20.0, "-20 HU") in found
+    # The longest term wins: "solid component size" isn't also read as the value "solid"
+    assert ("Composition", "solid", "solid") not in found
+    # "present" could be either element's value; find gives both candidates
+    assert {name for name, value, _ in found if value == "present"} == {"Presence", "Microcystic component"}
+
+
+def test_component_values_go_through_the_factory(pulmonary_nodule: CDESet):
+    values = ValueExtractor([pulmonary_nodule]).component_values(REPORT, pulmonary_nodule)
+    assert values == {
+        "Composition": "part-solid",
+        "Location": "right upper lobe",
+        "Size": 12.5,
+        "Solid component size": 5.0,
+        "Volume": 300.0,
+        "Presence": "present",
+        "Suspicious appearance": "yes",
+        "Min density": -20.0,
+    }
+    ObservationFactory.create_observation(pulmonary_nodule, component_values=values)
+
+
+def test_numbers_need_an_element_in_the_same_sentence():
+    cde_set = SetFactory.create_set("example finding")
+    cde_set.elements.extend([
+        SetFactory.create_integer_element("count", min=0, unit="lesions"),
+        SetFactory.create_float_element("diameter", unit="cm"),
+    ])
+    extractor = ValueExtractor([cde_set])
+    assert extractor.component_values("Count: 3 lesions. Then 4 cm.", cde_set) == {"count": 3}
+    assert extractor.component_values("Diameter 1.5 cm, count 2 cm", cde_set) == {"diameter": 1.5}
+    assert isinstance(extractor.component_values("count 2 Lesions", cde_set)["count"], int)
+
+
+def test_synonyms_and_several_sets():
+    first = SetFactory.create_set("first finding")
+    severity = SetFactory.create_value_set_element("severity", ["mild", "moderate", "severe"])
+    severity.value_set.values[2].index_codes = [IndexCode(system="RADLEX", code="RID0", display="Marked")]
+    first.elements.append(severity)
+    second = SetFactory.create_set("second finding")
+    second.elements.append(SetFactory.create_value_set_element("grade", ["mild", "high grade"]))
+    extractor = ValueExtractor([first, second])
+    assert extractor.info()["sets"] == 2
+    assert extractor.component_values("Severity: marked", first) == {"severity": "severe"}
+    assert extractor.component_values("HIGH-GRADE change", second) == {"grade": "high grade"}
+    assert [r.cde_set for r in extractor.find("mild")] == [first, second]
+    assert ValueExtractor([first], synonyms=False).find("marked") == []
+
+
+def test_cached_automaton(pulmonary_nodule: CDESet, tmp_path: Path):
+    extractor = ValueExtractor.cached([pulmonary_nodule], tmp_path)
+    (path,) = tmp_path.iterdir()
+    loaded = ValueExtractor.load(path, [pulmonary_nodule])
+    assert loaded.info() == extractor.info()
+    assert loaded.component_values(REPORT, pulmonary_nodule) == extractor.component_values(REPORT, pulmonary_nodule)
+    other = SetFactory.create_set("other finding")
+    with pytest.raises(ValueError, match="wasn't built from these sets"):
+        ValueExtractor.load(path, [other])
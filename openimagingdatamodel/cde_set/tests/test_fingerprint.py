@@ -0,0 +1,88 @@
+import json
+from pathlib import Path
+
+from openimagingdatamodel.cde_set.common import IndexCode
+from openimagingdatamodel.cde_set.element import ValueSetValue
+from openimagingdatamodel.cde_set.fingerprint import (
+    FingerprintCache,
+    diff_catalog,
+    diff_sets,
+    set_fingerprint,
+    value_fingerprint,
+)
+from openimagingdatamodel.cde_set.set import CDESet
+from openimagingdatamodel.cde_set.set_factory import SetFactory
+
+
+def test_fingerprints_follow_content(pulmonary_nodule: CDESet, pulmonary_nodule_file: Path):
+    # Same content, however it was made, gives the same fingerprint
+    data = json.loads(pulmonary_nodule_file.read_text())
+    data["url"] = None
+    same = CDESet.model_validate(data)
+    assert set_fingerprint(same) == set_fingerprint(pulmonary_nodule)
+    assert len(set_fingerprint(pulmonary_nodule)) == 64
+
+    cache = FingerprintCache()
+    before = cache.set(pulmonary_nodule)
+    assert cache.set(pulmonary_nodule) == before and cache.info()["hits"] == 1
+    element = pulmonary_nodule.get_element("Location")
+    element_before = cache.element(element)
+    element.value_set.values.pop()
+    assert cache.set(pulmonary_nodule) != before
+    assert cache.element(element) != element_before
+    assert cache.element(pulmonary_nodule.get_element("Size")) == FingerprintCache().element(
+        pulmonary_nodule.get_element("Size")
+    )
+
+
+def test_edits_in_place(pulmonary_nodule: CDESet, pulmonary_nodule_file: Path):
+    cache = FingerprintCache()
+    value = pulmonary_nodule.get_element("Location").get_value("lingula")  # type: ignore[union-attr]
+    before = cache.value(value)
+    value.definition = "Lingular segments of the left upper lobe"
+    assert cache.value(value) != before
+    pulmonary_nodule.index_codes.append(IndexCode(system="RADLEX", code="RID50149"))
+    set_before = cache.set(pulmonary_nodule)
+    pulmonary_nodule.index_codes.pop()
+    assert cache.set(pulmonary_nodule) == set_before
+    cache.forget(pulmonary_nodule)
+    assert cache.set(pulmonary_nodule) != set_before
+    fresh = CDESet.model_validate_json(pulmonary_nodule_file.read_text()).get_element("Location")
+    assert value_fingerprint(fresh.get_value("lingula")) == before  # type: ignore[union-attr]
+
+
+def test_diff_sets(pulmonary_nodule: CDESet):
+    new = pulmonary_nodule.model_copy(deep=True)
+    assert not diff_sets(pulmonary_nodule, new).changed
+
+    new.description = "Pulmonary nodule, revised"
+    location = new.get_element("Location")
+    location.definition = "Lobe or segment"
+    location.value_set.values[0].name = "undetermined"  # type: ignore[union-attr]
+    location.value_set.values.append(ValueSetValue(code="RDE1304.99", name="right lower lobe"))  # type: ignore[union-attr]
+    new.elements = [e for e in new.elements if e.id != "RDE1307"]
+    new.elements.append(SetFactory.create_float_element("Diameter", unit="mm"))
+    new.elements[0], new.elements[1] = new.elements[1], new.elements[0]
+
+    diff = diff_sets(pulmonary_nodule, new)
+    assert diff.set_id == "RDES195"
+    assert diff.fields == ("description", "elements")
+    assert diff.added_elements == (new.elements[-1].id,)
+    assert diff.removed_elements == ("RDE1307",)
+    assert [d.element_id for d in diff.modified_elements] == ["RDE1304"]
+    element_diff = diff.modified_elements[0]
+    assert element_diff.fields == ("definition",)
+    assert element_diff.added_values == ("RDE1304.99",)
+    assert element_diff.removed_values == ()
+    assert element_diff.modified_values == (location.value_set.values[0].code,)  # type: ignore[union-attr]
+    assert set(diff.affected_elements) == {new.elements[-1].id, "RDE1307", "RDE1304"}
+
+
+def test_diff_catalog(pulmonary_nodule: CDESet):
+    other = SetFactory.create_set("example finding", add_presence_element=True)
+    cache = FingerprintCache()
+    previous = cache.catalog([pulmonary_nodule, other])
+    changed = pulmonary_nodule.model_copy(deep=True)
+    changed.name = "Lung nodule"
+    added = SetFactory.create_set("another finding")
+    assert diff_catalog(previous, [changed, added], cache=cache) == ((added.id,), (other.id,), (pulmonary_nodule.id,))
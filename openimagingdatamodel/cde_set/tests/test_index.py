@@ -0,0 +1,64 @@
+import pytest  # type: ignore
+from openimagingdatamodel.cde_set.element import ValueSetElement
+from openimagingdatamodel.cde_set.index import CDEIndex
+from openimagingdatamodel.cde_set.set import CDESet
+
+
+def test_resolve_codes(pulmonary_nodule: CDESet, adrenal_nodule: CDESet):
+    index = CDEIndex([pulmonary_nodule, adrenal_nodule])
+    assert len(index) == 2
+
+    resolution = index.resolve("RDE1304.2")
+    assert resolution.cde_set is pulmonary_nodule
+    assert isinstance(resolution.element, ValueSetElement)
+    assert resolution.element.id == "RDE1304"
+    assert resolution.value is not None and resolution.value.code == "RDE1304.2"
+
+    resolution = index.resolve("rde1304")
+    assert resolution.element is pulmonary_nodule.get_element("RDE1304")
+    assert resolution.value is None
+
+    assert index.resolve("RDES3") == (adrenal_nodule, None, None)
+    assert index.get_element("RDE41").name == adrenal_nodule.get_element("RDE41").name
+    assert index.get_value("RDE1301.0").name == "solid"
+    assert [res.cde_set for res in index.find_elements("size")] == [pulmonary_nodule]
+    with pytest.raises(ValueError):
+        index.resolve("RDE999999")
+
+
+def test_add_and_remove_sets(pulmonary_nodule: CDESet, adrenal_nodule: CDESet):
+    index = CDEIndex([pulmonary_nodule])
+    index.add_set(adrenal_nodule)
+    assert "RDES3" in index
+    assert index.remove_set("rdes3") is adrenal_nodule
+    assert "RDES3" not in index
+    with pytest.raises(ValueError):
+        index.resolve("RDE41")
+    assert index.resolve("RDE1301").cde_set is pulmonary_nodule
+
+    replacement = pulmonary_nodule.model_copy(deep=True)
+    replacement.elements = replacement.elements[:1]
+    index.add_set(replacement)
+    assert index.get_set("RDES195") is replacement
+    assert index.resolve("RDE1301").cde_set is replacement
+    with pytest.raises(ValueError):
+        index.resolve("RDE1302")
+    assert index.find_elements("Size") == []
+
+
+def test_remove_set_edited_after_adding(pulmonary_nodule: CDESet, adrenal_nodule: CDESet):
+    index = CDEIndex([pulmonary_nodule])
+    element = pulmonary_nodule.get_element("RDE1301")
+    element.id = "RDE9999"
+    # Another set takes over a code while the first still has it, then the first is removed
+    claimed = adrenal_nodule.elements[0]
+    claimed.id = "RDE1302"
+    index.add_set(adrenal_nodule)
+    index.remove_set("RDES195")
+    with pytest.raises(ValueError):
+        index.resolve("RDE1301")
+    with pytest.raises(ValueError):
+        index.resolve("RDE1301.0")
+    assert index.get_element("RDE1302") is claimed
+    assert index.find_elements("Composition") == []
+    assert index.resolve("RDES3").cde_set is adrenal_nodule
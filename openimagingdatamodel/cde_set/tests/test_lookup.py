@@ -0,0 +1,78 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest  # type: ignore
+from openimagingdatamodel.cde_set.set import CDESet
+from openimagingdatamodel.cde_set.set_factory import SetFactory
+
+
+def test_lookup_counts_hits_and_misses(pulmonary_nodule: CDESet):
+    element = pulmonary_nodule.elements[1]
+    assert pulmonary_nodule.get_element(element.id) is element
+    assert pulmonary_nodule.get_element(element.name.upper()) is element
+    info = pulmonary_nodule.element_index_info()
+    assert (info["hits"], info["misses"], info["rebuilds"]) == (1, 1, 1)
+    for _ in range(3):
+        with pytest.raises(ValueError, match="not found"):
+            pulmonary_nodule.get_element("nonexistent")
+    info = pulmonary_nodule.element_index_info()
+    assert (info["misses"], info["rebuilds"]) == (4, 1)
+
+
+def test_lookup_follows_appended_elements(pulmonary_nodule: CDESet):
+    pulmonary_nodule.get_element(pulmonary_nodule.elements[0].id)
+    element = SetFactory.create_float_element("Doubling time")
+    pulmonary_nodule.elements.append(element)
+    assert pulmonary_nodule.get_element("doubling TIME") is element
+
+
+def test_lookup_follows_removed_and_reordered_elements(pulmonary_nodule: CDESet):
+    first, second = pulmonary_nodule.elements[0], pulmonary_nodule.elements[1]
+    assert pulmonary_nodule.get_element(second.name) is second
+    del pulmonary_nodule.elements[0]
+    assert pulmonary_nodule.get_element(second.name) is second
+    with pytest.raises(ValueError, match="not found"):
+        pulmonary_nodule.get_element(first.id)
+    pulmonary_nodule.elements = [second]
+    assert pulmonary_nodule.get_element(second.id) is second
+
+
+def test_lookup_follows_renamed_ids(pulmonary_nodule: CDESet):
+    element = pulmonary_nodule.elements[0]
+    old_id = element.id
+    pulmonary_nodule.get_element(old_id)
+    element_ids = {el.name: el.id for el in pulmonary_nodule.elements} | {element.name: "RDE9999"}
+    SetFactory.update_set_ids_from_dict(pulmonary_nodule, {"set_id": pulmonary_nodule.id, "element_ids": element_ids})
+    assert pulmonary_nodule.get_element("RDE9999") is element
+    with pytest.raises(ValueError, match="not found"):
+        pulmonary_nodule.get_element(old_id)
+
+
+def test_value_lookup_follows_edits(pulmonary_nodule: CDESet):
+    element = next(el for el in pulmonary_nodule.elements if hasattr(el, "value_set"))
+    value = element.value_set.values[0]
+    assert element.get_value(value.name) is value
+    value.name = "renamed"
+    assert element.get_value("RENAMED") is value
+    with pytest.raises(ValueError, match="Value 'missing' not found"):
+        element.get_value("missing")
+    assert element.value_index_info()["hits"] == 0
+
+
+def test_index_does_not_affect_equality_or_pickling(pulmonary_nodule: CDESet):
+    other = pulmonary_nodule.model_copy(deep=True)
+    pulmonary_nodule.get_element(pulmonary_nodule.elements[0].id)
+    assert pulmonary_nodule == other
+    restored = pickle.loads(pickle.dumps(pulmonary_nodule))
+    assert restored == pulmonary_nodule
+    assert restored.element_index_info()["size"] == 0
+    assert restored.get_element(pulmonary_nodule.elements[0].id) == pulmonary_nodule.elements[0]
+
+
+def test_concurrent_lookups(pulmonary_nodule: CDESet):
+    keys = [key for el in pulmonary_nodule.elements for key in (el.id, el.name)] * 200
+    expected = [el for el in pulmonary_nodule.elements for _ in (0, 1)] * 200
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        found = list(executor.map(pulmonary_nodule.get_element, keys))
+    assert all(a is b for a, b in zip(found, expected, strict=True))
+    assert pulmonary_nodule.element_index_info()["rebuilds"] == 1
@@ -0,0 +1,90 @@
+import logging
+import shutil
+from pathlib import Path
+
+import pytest  # type: ignore
+from openimagingdatamodel.cde_set.element import FloatElement, IntegerElement
+from openimagingdatamodel.cde_set.registry import INDEX_FILENAME, CDESetRegistry
+from openimagingdatamodel.cde_set.set import CDESet
+
+
+@pytest.fixture
+def catalog_dir(tmp_path: Path, sample_set_files: list[Path]) -> Path:
+    for path in sample_set_files:
+        shutil.copy(path, tmp_path / path.name)
+    return tmp_path
+
+
+def test_index_is_written_and_sets_are_lazy(catalog_dir: Path):
+    registry = CDESetRegistry(catalog_dir)
+    assert (catalog_dir / INDEX_FILENAME).exists()
+    assert len(registry) == 2
+    assert sorted(registry.set_ids) == ["RDES195", "RDES3"]
+    assert "rdes195" in registry
+    assert registry.cache_info()["size"] == 0
+
+
+def test_get_set_caches(catalog_dir: Path):
+    registry = CDESetRegistry(catalog_dir)
+    cde_set = registry.get_set("RDES195")
+    assert isinstance(cde_set, CDESet)
+    assert cde_set.name == "Pulmonary Nodule"
+    assert registry.get_set("RDES195") is cde_set
+    assert registry.cache_info()["hits"] == 1
+    assert registry.cache_info()["misses"] == 1
+
+
+def test_get_element(catalog_dir: Path):
+    registry = CDESetRegistry(catalog_dir)
+    size = registry.get_element("RDE1302")
+    assert isinstance(size, FloatElement)
+    assert size.name == "Size"
+    assert registry.get_element_set("RDE1302").id == "RDES195"
+    assert isinstance(registry.get_element("RDE41"), IntegerElement)
+    assert registry.get_element("composition").id == "RDE1301"
+    with pytest.raises(ValueError):
+        registry.get_element("RDE999999")
+
+
+def test_cache_is_bounded(catalog_dir: Path):
+    registry = CDESetRegistry(catalog_dir, cache_size=1)
+    first = registry.get_set("RDES195")
+    registry.get_set("RDES3")
+    assert registry.cache_info()["size"] == 1
+    assert registry.get_set("RDES195") is not first
+
+
+def test_index_is_reused_and_refreshed(catalog_dir: Path, monkeypatch):
+    CDESetRegistry(catalog_dir)
+    scanned: list[Path] = []
+    original_scan = CDESetRegistry._scan_file
+
+    def tracking_scan(path: Path):
+        scanned.append(path)
+        return original_scan(path)
+
+    monkeypatch.setattr(CDESetRegistry, "_scan_file", staticmethod(tracking_scan))
+    registry = CDESetRegistry(catalog_dir)
+    assert scanned == []
+
+    (catalog_dir / "SampleDES.cde.json").unlink()
+    registry.refresh()
+    assert registry.set_ids == ["RDES195"]
+    with pytest.raises(ValueError):
+        registry.get_set("RDES3")
+
+
+def test_bad_files_are_skipped(catalog_dir: Path, caplog):
+    (catalog_dir / "broken.cde.json").write_text("{")
+    (catalog_dir / "no_id.cde.json").write_text('{"name": "No ID", "elements": []}')
+    (catalog_dir / "list.cde.json").write_text("[]")
+    with caplog.at_level(logging.WARNING, logger="openimagingdatamodel.cde_set.registry"):
+        registry = CDESetRegistry(catalog_dir)
+    assert sorted(registry.set_ids) == ["RDES195", "RDES3"]
+    assert {Path(record.args[0]).name for record in caplog.records} == {
+        "broken.cde.json",
+        "list.cde.json",
+        "no_id.cde.json",
+    }
+    (catalog_dir / "no_id.cde.json").unlink()
+    assert len(CDESetRegistry(catalog_dir)) == 2
@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import pytest  # type: ignore
+from openimagingdatamodel.cde_set.finding_model import FindingModel
+from openimagingdatamodel.cde_set.search import CatalogSearchIndex, tokenize
+from openimagingdatamodel.cde_set.set import CDESet
+
+
+@pytest.fixture
+def ipmn(data_dir: Path) -> FindingModel:
+    return FindingModel.model_validate_json((data_dir / "ipmn.json").read_text())
+
+
+@pytest.fixture
+def index(pulmonary_nodule: CDESet, adrenal_nodule: CDESet, ipmn: FindingModel) -> CatalogSearchIndex:
+    return CatalogSearchIndex([pulmonary_nodule, adrenal_nodule], finding_models=[ipmn])
+
+
+def test_tokenize():
+    assert tokenize("Part-solid component_size of the Nodule") == ["part", "solid", "component", "size", "nodule"]
+    assert tokenize(None) == []
+
+
+def test_search_ranks_names_first(index: CatalogSearchIndex, adrenal_nodule: CDESet):
+    hits = index.search("adrenal nodule", kinds=["set"])
+    assert hits[0].key == adrenal_nodule.id
+    assert [hit.score for hit in hits] == sorted((hit.score for hit in hits), reverse=True)
+
+    (hit,) = index.search("microscopic fat", limit=1)
+    assert (hit.kind, hit.name, hit.owner) == ("element", "Microscopic fat", adrenal_nodule.id)
+
+    hits = index.search("ground glass", kinds=["value"], limit=3)
+    assert hits[0].name == "ground glass" and hits[0].key.startswith("RDE")
+
+
+def test_search_finding_models(index: CatalogSearchIndex):
+    assert index.search("pancreatic duct", kinds=["finding_model", "attribute"])[0].owner == "ipmn"
+    assert index.search("intraductal papillary")[0].key == "ipmn"
+
+
+def test_prefix_matching(index: CatalogSearchIndex):
+    assert index.search("microcys", limit=1)[0].name == "Microcystic component"
+    assert index.search("microcys", prefix=False) == []
+    assert index.search("the of") == []
+    # A repeated last word still expands as the prefix word, and the other words keep their own groups
+    assert [hit.name for hit in index.search("upper lobe upper", kinds=["value"])] == [
+        hit.name for hit in index.search("upper lobe", kinds=["value"])
+    ]
+    assert "middle lobe" in [hit.name for hit in index.search("upper lobe upper", kinds=["value"])]
+
+
+def test_add_and_remove(index: CatalogSearchIndex, pulmonary_nodule: CDESet, ipmn: FindingModel):
+    count = len(index)
+    index.add_set(pulmonary_nodule)
+    assert len(index) == count
+    index.remove_set(pulmonary_nodule.id.lower())
+    assert not any(hit.owner == pulmonary_nodule.id for hit in index.search("solid component", limit=100))
+    index.remove_finding_model("IPMN")
+    assert index.search("intraductal") == []
+    assert index.info()["sets"] == 1 and index.info()["finding_models"] == 0
+    with pytest.raises(ValueError, match="not found in search index"):
+        index.remove_set(pulmonary_nodule.id)
+    with pytest.raises(ValueError, match="not found in search index"):
+        index.remove_finding_model(ipmn.finding_name)
+
+
+def test_save_and_load(index: CatalogSearchIndex, tmp_path: Path):
+    path = tmp_path / "catalog.search"
+    index.save(path)
+    loaded = CatalogSearchIndex.load(path)
+    assert loaded.info() == index.info()
+    for query in ["nodule size", "attenuation", "mucin", "loc"]:
+        assert loaded.search(query) == index.search(query)
+    loaded.remove_set("RDES195")
+    assert loaded.info()["sets"] == 1
@@ -1,17 +1,22 @@
+import json
 import re
+from pathlib import Path
 from typing import Any, Final
 
 import pytest  # type: ignore
 from openimagingdatamodel.cde_set.element import BooleanElement, FloatElement, IntegerElement, ValueSetElement
 from openimagingdatamodel.cde_set.finding_model import FindingModel
+from openimagingdatamodel.cde_set.fingerprint import FingerprintCache, diff_sets
 from openimagingdatamodel.cde_set.set import CDESet
 from openimagingdatamodel.cde_set.set_factory import SetFactory
+from openimagingdatamodel.id_allocator import DeterministicIdAllocator, SequenceIdAllocator
 
-SET_ELEMENT_ID_REGEX = r"TO_BE_DETERMINED\d{4}"
+SET_ELEMENT_ID_REGEX = r"TO_BE_DETERMINED\d{12}"
 
 
 def test_random_digits():
-    digits = SetFactory.random_digits()
+    with pytest.warns(DeprecationWarning):
+        digits = SetFactory.random_digits()
     assert isinstance(digits, str)
     assert digits.isdigit()
 
@@ -21,7 +26,7 @@ def test_create_set():
     cde_set = SetFactory.create_set(name)
     assert isinstance(cde_set, CDESet)
     assert cde_set.name == name
-    assert re.match(SET_ELEMENT_ID_REGEX, cde_set.id)
+    assert re.fullmatch(SET_ELEMENT_ID_REGEX, cde_set.id)
     assert len(cde_set.elements) == 0
 
 
@@ -68,7 +73,7 @@ def test_create_value_set_element():
     element = SetFactory.create_value_set_element(name, values, definition="Definition", question="Question")
     assert isinstance(element, ValueSetElement)
     # Assert that the element ID has the expected format
-    assert re.match(SET_ELEMENT_ID_REGEX, element.id)
+    assert re.fullmatch(SET_ELEMENT_ID_REGEX, element.id)
     assert element.name == name
     assert element.definition == "Definition"
     assert element.question == "Question"
@@ -91,7 +96,7 @@ def test_create_value_set_element_with_dict_values():
     element = SetFactory.create_value_set_element(name, values, definition="Definition", question="Question")
     assert isinstance(element, ValueSetElement)
     # Assert that the element ID has the expected format
-    assert re.match(SET_ELEMENT_ID_REGEX, element.id)
+    assert re.fullmatch(SET_ELEMENT_ID_REGEX, element.id)
     assert element.name == name
     assert element.definition == "Definition"
     assert element.question == "Question"
@@ -110,7 +115,7 @@ def test_create_presence_element():
     finding_name = "Test Finding"
     element = SetFactory.create_presence_element(finding_name)
     assert isinstance(element, ValueSetElement)
-    assert re.match(SET_ELEMENT_ID_REGEX, element.id)
+    assert re.fullmatch(SET_ELEMENT_ID_REGEX, element.id)
     assert element.name == f"Presence of {finding_name}"
     assert element.definition == f"Presence of {finding_name}"
     assert element.value_set.min_cardinality == 1
@@ -127,12 +132,12 @@ def test_create_set_with_presence_element():
     cde_set = SetFactory.create_set(finding_name, description=description, add_presence_element=True)
     assert isinstance(cde_set, CDESet)
     assert cde_set.name == finding_name
-    assert re.match(SET_ELEMENT_ID_REGEX, cde_set.id)
+    assert re.fullmatch(SET_ELEMENT_ID_REGEX, cde_set.id)
     assert cde_set.description == description
     assert len(cde_set.elements) == 1
     presence_element = cde_set.elements[0]
     assert presence_element.name == f"Presence of {finding_name}"
-    assert re.match(SET_ELEMENT_ID_REGEX, presence_element.id)
+    assert re.fullmatch(SET_ELEMENT_ID_REGEX, presence_element.id)
     assert presence_element.value_set.min_cardinality == 1
     assert len(presence_element.value_set.values) == 4
     first_value = presence_element.value_set.values[0]
@@ -185,7 +190,7 @@ def test_create_set_from_finding_model(finding_model):
     cde_set = SetFactory.create_set_from_finding_model(finding_model)
     assert isinstance(cde_set, CDESet)
     assert cde_set.name == finding_model.finding_name
-    assert re.match(SET_ELEMENT_ID_REGEX, cde_set.id)
+    assert re.fullmatch(SET_ELEMENT_ID_REGEX, cde_set.id)
     assert cde_set.description == finding_model.description
     assert len(cde_set.elements) == 3
     size_element = cde_set.elements[0]
@@ -208,3 +213,104 @@ def test_create_set_from_finding_model(finding_model):
     assert first_value.code == f"{presence_element.id}.0"
     assert first_value.name == "Absent"
     assert first_value.definition == "The feature is not present"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_create_sets_from_finding_models(finding_model, tmp_path, workers):
+    model_path = tmp_path / "model.json"
+    model_path.write_text(finding_model.model_dump_json())
+    other_model = finding_model.model_copy(update={"finding_name": "Other Finding"})
+    models = [finding_model, model_path, other_model] * 3
+    output_dir = tmp_path / "sets"
+    sets = list(
+        SetFactory.create_sets_from_finding_models(iter(models), workers=workers, chunksize=2, output_dir=output_dir)
+    )
+    assert [cde_set.name for cde_set in sets] == ["Test Finding", "Test Finding", "Other Finding"] * 3
+    assert all(len(cde_set.elements) == 3 for cde_set in sets)
+    assert len({cde_set.set_version.date for cde_set in sets}) == 1
+    written = output_dir / SetFactory.set_file_name(sets[-1])
+    assert CDESet.model_validate_json(written.read_text()) == sets[-1]
+
+
+def test_create_sets_with_sequence_ids(finding_model, monkeypatch):
+    monkeypatch.setattr(SetFactory, "id_allocator", SequenceIdAllocator())
+    models = [finding_model.model_copy(update={"finding_name": f"Finding {i}"}) for i in range(5)]
+    sets = list(SetFactory.create_sets_from_finding_models(models, workers=2, chunksize=2))
+    set_ids = [cde_set.id for cde_set in sets]
+    element_ids = [element.id for cde_set in sets for element in cde_set.elements]
+    assert len(set(set_ids)) == len(set_ids) == 5
+    assert len(set(element_ids)) == len(element_ids) == 15
+    assert all(re.fullmatch(r"TO_BE_DETERMINED\d{4}", id) for id in set_ids + element_ids)
+
+
+def test_deterministic_element_ids_per_set(finding_model, monkeypatch):
+    monkeypatch.setattr(SetFactory, "id_allocator", DeterministicIdAllocator())
+    cde_set = SetFactory.create_set_from_finding_model(finding_model)
+    assert SetFactory.create_set_from_finding_model(finding_model) == cde_set
+    other = SetFactory.create_set_from_finding_model(finding_model.model_copy(update={"finding_name": "Other Finding"}))
+    assert [element.name for element in other.elements] == [element.name for element in cde_set.elements]
+    assert not {element.id for element in other.elements} & {element.id for element in cde_set.elements}
+    assert SetFactory.create_presence_element("nodule", parent_set="RDES1").id != (
+        SetFactory.create_presence_element("nodule", parent_set="RDES2").id
+    )
+
+    # An element replaced because its attribute changed type gets a new ID
+    data = finding_model.model_dump()
+    data["attributes"][1] = {"name": "Shape", "type": "numeric", "minimum": 0}
+    old_id = cde_set.elements[1].id
+    diff = SetFactory.sync_set_with_finding_model(cde_set, FindingModel.model_validate(data))
+    assert diff.removed_elements == (old_id,)
+    assert diff.added_elements == (cde_set.elements[1].id,) != (old_id,)
+
+
+def test_sync_set_with_finding_model(pulmonary_nodule: CDESet, data_dir: Path):
+    cde_set = pulmonary_nodule
+    data = json.loads((data_dir / "pulmonary_nodule_finding_model.json").read_text())
+    assert not SetFactory.sync_set_with_finding_model(cde_set, FindingModel.model_validate(data)).changed
+
+    attributes = {attribute["name"]: attribute for attribute in data["attributes"]}
+    attributes["Size"]["unit"] = "cm"
+    location = attributes["Location"]
+    location["values"] = [v for v in location["values"] if v["name"] != "lingula"]
+    location["values"].append({"name": "Right lower lobe segment", "description": "A basal segment"})
+    location["values"][0]["description"] = "Location can't be determined"
+    del attributes["Plurality"]
+    attributes["Morphology"] = {"name": "Morphology", "type": "numeric", "minimum": 0}
+    attributes["Cavitation"] = {"name": "Cavitation", "type": "choice", "values": [{"name": "no"}, {"name": "yes"}]}
+    data["attributes"] = list(attributes.values())
+    before = cde_set.model_copy(deep=True)
+
+    diff = SetFactory.sync_set_with_finding_model(cde_set, FindingModel.model_validate(data))
+    assert cde_set.id == "RDES195"
+    assert [element.name for element in cde_set.elements] == [attribute["name"] for attribute in data["attributes"]]
+    morphology, cavitation = cde_set.get_element("Morphology"), cde_set.get_element("Cavitation")
+    assert diff.added_elements == (morphology.id, cavitation.id)
+    assert diff.removed_elements == ("RDE1305", "RDE1306")
+    assert [d.element_id for d in diff.modified_elements] == ["RDE1302", "RDE1304"]
+    assert diff.modified_elements[1].added_values == ("RDE1304.10",)
+    assert diff.modified_elements[1].removed_values == ("RDE1304.3",)
+    assert diff.modified_elements[1].modified_values == ("RDE1304.0",)
+    assert cde_set.get_element("Location").get_value("left lower lobe").code == "RDE1304.4"
+    assert cde_set.get_element("Size").float_value.unit == "cm"
+    # The summary is what a diff of the two versions finds
+    assert diff == diff_sets(before, cde_set, cache=FingerprintCache())
+
+
+def test_sync_integer_element_with_fractional_bounds():
+    cde_set = SetFactory.create_set("example finding")
+    cde_set.elements.append(SetFactory.create_integer_element("count", min=0, max=10, parent_set=cde_set.id))
+    count_id = cde_set.elements[0].id
+    attributes = [{"name": "count", "type": "numeric", "minimum": 1, "maximum": 20}]
+    data = {"finding_name": "example finding", "description": "An example finding", "attributes": attributes}
+    diff = SetFactory.sync_set_with_finding_model(cde_set, FindingModel.model_validate(data))
+    assert [d.element_id for d in diff.modified_elements] == [count_id]
+    assert cde_set.elements[0].integer_value.max == 20
+
+    # Fractional bounds don't fit an IntegerValue, so the element is replaced with a float element
+    data["attributes"] = [{"name": "count", "type": "numeric", "minimum": 0, "maximum": 2.5}]
+    diff = SetFactory.sync_set_with_finding_model(cde_set, FindingModel.model_validate(data))
+    assert diff.removed_elements == (count_id,)
+    element = cde_set.elements[0]
+    assert isinstance(element, FloatElement)
+    assert diff.added_elements == (element.id,)
+    assert element.float_value.max == 2.5
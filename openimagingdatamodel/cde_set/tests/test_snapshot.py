@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import pytest  # type: ignore
+from openimagingdatamodel.cde_set.element import ValueSetElement
+from openimagingdatamodel.cde_set.set import CDESet
+from openimagingdatamodel.cde_set.snapshot import CDECatalogSnapshot
+
+
+@pytest.fixture
+def sets(sample_set_files: list[Path]) -> list[CDESet]:
+    return [CDESet.model_validate_json(path.read_text()) for path in sample_set_files]
+
+
+@pytest.fixture
+def snapshot(tmp_path: Path, sets: list[CDESet]):
+    path = tmp_path / "catalog.cdesnap"
+    assert CDECatalogSnapshot.write(path, sets) == 2
+    with CDECatalogSnapshot(path) as snapshot:
+        yield snapshot
+
+
+def test_sets_round_trip(snapshot: CDECatalogSnapshot, sets: list[CDESet]):
+    assert len(snapshot) == 2
+    assert snapshot.set_ids == sorted(s.id for s in sets)
+    for cde_set in sets:
+        assert cde_set.id.lower() in snapshot
+        assert snapshot.set_name(cde_set.id) == cde_set.name
+        assert snapshot.get_set(cde_set.id) == cde_set
+    assert snapshot.get_set(sets[0].id) is snapshot.get_set(sets[0].id)
+    assert "RDES1" not in snapshot
+    with pytest.raises(ValueError, match="not found"):
+        snapshot.get_set("RDES1")
+
+
+def test_element_and_value_lookup(snapshot: CDECatalogSnapshot, sets: list[CDESet]):
+    for cde_set in sets:
+        for element in cde_set.elements:
+            assert snapshot.get_element(element.id) == cde_set.get_element(element.id)
+            assert snapshot.get_element_set(element.id.lower()) is snapshot.get_set(cde_set.id)
+            if isinstance(element, ValueSetElement):
+                for value in element.value_set.values:
+                    assert snapshot.get_value(value.code) == cde_set.get_element(element.id).get_value(value.code)
+    element = sets[0].elements[0]
+    assert snapshot.get_element(element.name.upper()) == element
+    with pytest.raises(ValueError, match="not found"):
+        snapshot.get_element("nonexistent")
+    with pytest.raises(ValueError, match="not found"):
+        snapshot.get_value("RDE1.1")
+
+
+def test_ambiguous_element_name(tmp_path: Path, sets: list[CDESet]):
+    other = sets[0].model_copy(update={"id": "RDES99999"})
+    other.elements = [el.model_copy(update={"id": f"RDE9999{i}"}) for i, el in enumerate(other.elements)]
+    path = tmp_path / "catalog.cdesnap"
+    CDECatalogSnapshot.write(path, [sets[0], other])
+    with CDECatalogSnapshot(path) as snapshot:
+        with pytest.raises(ValueError, match="ambiguous"):
+            snapshot.get_element(sets[0].elements[0].name)
+        assert snapshot.get_element("RDE99990").name == sets[0].elements[0].name
+
+
+def test_invalid_files(tmp_path: Path, sets: list[CDESet]):
+    with pytest.raises(ValueError, match="Duplicate"):
+        CDECatalogSnapshot.write(tmp_path / "dup.cdesnap", [sets[0], sets[0]])
+    path = tmp_path / "bad.cdesnap"
+    path.write_bytes(b"not a snapshot" * 10)
+    with pytest.raises(ValueError, match="not a version 1"):
+        CDECatalogSnapshot(path)
@@ -0,0 +1,121 @@
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest  # type: ignore
+from openai import APIConnectionError
+from openimagingdatamodel.cde_set.finding_model import FindingModel
+from openimagingdatamodel.cde_set.text_to_finding_model import FindingModelGenerator, RateLimiter
+
+
+class FakeCompletions:
+    """Stands in for instructor's `client.chat.completions`, answering from the outline text."""
+
+    def __init__(self, failures: int = 0, delay: float = 0.01, error: type[Exception] | None = None) -> None:
+        self.calls: list[dict[str, Any]] = []
+        self.failures = failures
+        self.error = error
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, *, model: str, messages: list[dict[str, str]], response_model: type) -> FindingModel:
+        self.calls.append({"model": model, "messages": messages})
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures:
+                self.failures -= 1
+                raise self.error("simulated failure") if self.error else APIConnectionError(request=None)
+        finally:
+            self.in_flight -= 1
+        name = messages[-1]["content"].split("```")[1].strip()
+        return response_model.model_validate({
+            "finding_name": name,
+            "description": f"Description of {name}",
+            "attributes": [{"name": "Presence", "type": "choice", "values": [{"name": "Absent"}, {"name": "Present"}]}],
+        })
+
+
+def fake_client(completions: FakeCompletions) -> Any:
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+def test_generate_many_limits_concurrency():
+    completions = FakeCompletions()
+    generator = FindingModelGenerator(fake_client(completions), max_concurrency=3)
+    outlines = [f"finding {i}" for i in range(10)]
+    models = asyncio.run(generator.generate_many(outlines))
+    assert [model.finding_name for model in models] == outlines
+    assert len(completions.calls) == 10
+    assert completions.max_in_flight == 3
+
+
+def test_retries_with_backoff():
+    completions = FakeCompletions(failures=2)
+    generator = FindingModelGenerator(fake_client(completions), max_retries=2, backoff_seconds=0.001)
+    model = asyncio.run(generator.generate("nodule"))
+    assert model.finding_name == "nodule"
+    assert len(completions.calls) == 3
+
+    completions = FakeCompletions(failures=5)
+    generator = FindingModelGenerator(fake_client(completions), max_retries=1, backoff_seconds=0.001)
+    with pytest.raises(APIConnectionError):
+        asyncio.run(generator.generate("nodule"))
+
+
+def test_only_retryable_errors_are_retried():
+    completions = FakeCompletions(failures=1, error=KeyError)
+    generator = FindingModelGenerator(fake_client(completions), backoff_seconds=0.001)
+    with pytest.raises(KeyError):
+        asyncio.run(generator.generate("nodule"))
+    assert len(completions.calls) == 1
+
+    completions = FakeCompletions(failures=1, error=KeyError)
+    generator = FindingModelGenerator(fake_client(completions), backoff_seconds=0.001, retry_on=(KeyError,))
+    assert asyncio.run(generator.generate("nodule")).finding_name == "nodule"
+
+
+def test_backoff_releases_concurrency_slot():
+    completions = FakeCompletions(failures=1)
+    generator = FindingModelGenerator(fake_client(completions), max_concurrency=1, backoff_seconds=0.2)
+    models = asyncio.run(generator.generate_many(["first", "second"]))
+    assert [model.finding_name for model in models] == ["first", "second"]
+    # The second outline was sent while the first waited to be retried
+    assert [call["messages"][-1]["content"].split("```")[1].strip() for call in completions.calls] == [
+        "first",
+        "second",
+        "first",
+    ]
+
+
+def test_results_are_cached_on_disk(tmp_path: Path):
+    completions = FakeCompletions()
+    generator = FindingModelGenerator(fake_client(completions), cache_dir=tmp_path)
+    first = asyncio.run(generator.generate("nodule"))
+    assert len(list(tmp_path.rglob("*.json"))) == 1
+
+    # A new generator (and event loop) with the same cache doesn't call the client again
+    generator = FindingModelGenerator(fake_client(completions), cache_dir=tmp_path)
+    assert asyncio.run(generator.generate("nodule")) == first
+    assert len(completions.calls) == 1
+
+    generator = FindingModelGenerator(fake_client(completions), model="other-model", cache_dir=tmp_path)
+    asyncio.run(generator.generate("nodule"))
+    assert len(completions.calls) == 2
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(requests_per_minute=600)  # one every 0.1s once the initial allowance is spent
+
+    async def run() -> float:
+        limiter._request_allowance = 0
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(3):
+            await limiter.acquire()
+        return loop.time() - start
+
+    assert asyncio.run(run()) >= 0.25
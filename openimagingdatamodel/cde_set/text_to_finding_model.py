@@ -1,13 +1,28 @@
 """Use OpenAI's GPT models to automatically generate a Finding Model from a text representation of the model."""
 
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+import weakref
 from os import getenv
+from pathlib import Path
+from typing import Any, Final, Iterable
 
 from dotenv import load_dotenv
 from instructor import from_openai
-from openai import AsyncOpenAI
+from openai import APIConnectionError, APITimeoutError, AsyncOpenAI, RateLimitError
 
 from .finding_model import FindingModel
 
+DEFAULT_MODEL: Final[str] = "gpt-3.5-turbo"
+# Errors worth trying again: the client was rate limited, timed out or couldn't connect
+RETRYABLE_ERRORS: Final[tuple[type[BaseException], ...]] = (RateLimitError, APITimeoutError, APIConnectionError)
+
 PROMPT = [
     {
         "role": "system",
@@ -44,22 +59,179 @@ PROMPT = [
 ]
 
 
-async def text_to_finding_model(expert_text: str) -> FindingModel:
-    load_dotenv()
-    openai = AsyncOpenAI(api_key=getenv("OPENAI_API_KEY"))
-    client = from_openai(openai)
-    response = await client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=PROMPT  # type: ignore
-        + [
-            {
-                "role": "user",
-                "content": f"""Expert's outline: 
+def outline_messages(expert_text: str) -> list[dict[str, str]]:
+    """Build the chat messages asking for a FindingModel from an expert's outline."""
+    return PROMPT + [
+        {
+            "role": "user",
+            "content": f"""Expert's outline: 
                 ```
                 {expert_text}
                 ```""",
-            }
-        ],
-        response_model=FindingModel,
-    )
-    return response
+        }
+    ]
+
+
+class RateLimiter:
+    """Token-bucket limiter on requests per minute and (estimated) tokens per minute for asyncio tasks."""
+
+    def __init__(self, requests_per_minute: float | None = None, tokens_per_minute: float | None = None) -> None:
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_allowance = requests_per_minute or 0.0
+        self._token_allowance = tokens_per_minute or 0.0
+        self._updated = time.monotonic()
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed_minutes = (now - self._updated) / 60
+        self._updated = now
+        if self.requests_per_minute:
+            self._request_allowance = min(
+                self.requests_per_minute, self._request_allowance + elapsed_minutes * self.requests_per_minute
+            )
+        if self.tokens_per_minute:
+            self._token_allowance = min(
+                self.tokens_per_minute, self._token_allowance + elapsed_minutes * self.tokens_per_minute
+            )
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until one more request using about `tokens` tokens is allowed."""
+        if not self.requests_per_minute and not self.tokens_per_minute:
+            return
+        if self.tokens_per_minute:
+            tokens = min(tokens, int(self.tokens_per_minute))
+        if self._lock is None or self._loop is not asyncio.get_running_loop():
+            self._lock, self._loop = asyncio.Lock(), asyncio.get_running_loop()
+        async with self._lock:
+            while True:
+                self._refill()
+                wait_minutes = 0.0
+                if self.requests_per_minute and self._request_allowance < 1:
+                    wait_minutes = (1 - self._request_allowance) / self.requests_per_minute
+                if self.tokens_per_minute and self._token_allowance < tokens:
+                    wait_minutes = max(wait_minutes, (tokens - self._token_allowance) / self.tokens_per_minute)
+                if wait_minutes <= 0:
+                    break
+                await asyncio.sleep(wait_minutes * 60)
+            if self.requests_per_minute:
+                self._request_allowance -= 1
+            if self.tokens_per_minute:
+                self._token_allowance -= tokens
+
+
+class FindingModelGenerator:
+    """Generates FindingModels from expert outlines with one shared client.
+
+    Many outlines can be converted at once (`generate_many`) with at most `max_concurrency` requests in
+    flight, optional request/token rate limits, and retries with exponential backoff on the errors in
+    `retry_on` (by default the client's rate limit, timeout and connection errors); a request waiting
+    to be retried doesn't count against `max_concurrency`. If `cache_dir` is
+    given, results are stored there keyed by a hash of the LLM model name and the full prompt, so the same
+    outline is only ever sent once. The client is anything with instructor's
+    `chat.completions.create(model=..., messages=..., response_model=...)`; by default an instructor-wrapped
+    `AsyncOpenAI` client is created on first use with `OPENAI_API_KEY` from the environment (or `.env`).
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        /,
+        model: str = DEFAULT_MODEL,
+        max_concurrency: int = 8,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        max_retries: int = 3,
+        backoff_seconds: float = 1.0,
+        retry_on: tuple[type[BaseException], ...] = RETRYABLE_ERRORS,
+        cache_dir: str | os.PathLike[str] | None = None,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self._client = client
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.retry_on = retry_on
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            load_dotenv()
+            self._client = from_openai(AsyncOpenAI(api_key=getenv("OPENAI_API_KEY")))
+        return self._client
+
+    def cache_key(self, messages: list[dict[str, str]]) -> str:
+        payload = json.dumps({"model": self.model, "messages": messages}, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _cache_path(self, key: str) -> Path | None:
+        return self.cache_dir / key[:2] / f"{key}.json" if self.cache_dir else None
+
+    def _read_cache(self, key: str) -> FindingModel | None:
+        path = self._cache_path(key)
+        if path is None or not path.exists():
+            return None
+        return FindingModel.model_validate_json(path.read_bytes())
+
+    def _write_cache(self, key: str, finding_model: FindingModel) -> None:
+        path = self._cache_path(key)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(finding_model.model_dump_json())
+        os.replace(tmp_path, path)
+
+    async def generate(self, expert_text: str) -> FindingModel:
+        """Generate a FindingModel from one expert outline."""
+        messages = outline_messages(expert_text)
+        key = self.cache_key(messages)
+        if (cached := self._read_cache(key)) is not None:
+            return cached
+        if self._semaphore is None or self._loop is not asyncio.get_running_loop():
+            self._semaphore, self._loop = asyncio.Semaphore(self.max_concurrency), asyncio.get_running_loop()
+        # Rough token estimate (~4 characters per token) for the rate limiter
+        tokens = sum(len(message["content"]) for message in messages) // 4
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                await self.rate_limiter.acquire(tokens)
+                try:
+                    finding_model = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,  # type: ignore
+                        response_model=FindingModel,
+                    )
+                    break
+                except self.retry_on:
+                    if attempt == self.max_retries:
+                        raise
+            await asyncio.sleep(self.backoff_seconds * 2**attempt * (1 + random.random()))
+        self._write_cache(key, finding_model)
+        return finding_model
+
+    async def generate_many(
+        self, outlines: Iterable[str], /, return_exceptions: bool = False
+    ) -> list[FindingModel | BaseException]:
+        """Generate FindingModels for many outlines concurrently, in the order given."""
+        return await asyncio.gather(*(self.generate(text) for text in outlines), return_exceptions=return_exceptions)  # type: ignore[return-value]
+
+
+# The OpenAI client's connection pool belongs to the event loop it was first used on, so keep one per loop
+_default_generators: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, FindingModelGenerator] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def text_to_finding_model(expert_text: str) -> FindingModel:
+    loop = asyncio.get_running_loop()
+    if (generator := _default_generators.get(loop)) is None:
+        generator = _default_generators[loop] = FindingModelGenerator(max_retries=0)
+    return await generator.generate(expert_text)
@@ -0,0 +1,44 @@
+"""Fixtures shared by the test suites: the sample CDE Sets and finding models in `cde_set/data`."""
+
+from pathlib import Path
+
+import pytest  # type: ignore
+
+from openimagingdatamodel.cde_set.set import CDESet
+
+DATA_DIR = Path(__file__).parent / "cde_set" / "data"
+PULMONARY_NODULE_FILE = DATA_DIR / "RDES195_pulmonary_nodule.cde.json"
+ADRENAL_NODULE_FILE = DATA_DIR / "SampleDES.cde.json"
+SAMPLE_SET_FILES = [PULMONARY_NODULE_FILE, ADRENAL_NODULE_FILE]
+
+
+@pytest.fixture
+def data_dir() -> Path:
+    return DATA_DIR
+
+
+@pytest.fixture
+def pulmonary_nodule_file() -> Path:
+    return PULMONARY_NODULE_FILE
+
+
+@pytest.fixture
+def pulmonary_nodule() -> CDESet:
+    """RDES195 Pulmonary Nodule, parsed afresh for each test so it can be edited."""
+    return CDESet.model_validate_json(PULMONARY_NODULE_FILE.read_text())
+
+
+@pytest.fixture
+def adrenal_nodule() -> CDESet:
+    """RDES3 Adrenal Nodule, parsed afresh for each test so it can be edited."""
+    return CDESet.model_validate_json(ADRENAL_NODULE_FILE.read_text())
+
+
+@pytest.fixture
+def sample_set_files() -> list[Path]:
+    return list(SAMPLE_SET_FILES)
+
+
+@pytest.fixture(params=SAMPLE_SET_FILES, ids=lambda path: path.name)
+def sample_set_file(request: pytest.FixtureRequest) -> Path:
+    return request.param
@@ -0,0 +1,217 @@
+"""Pluggable allocation of IDs for CDE Sets, elements and Observations.
+
+`SetFactory.id_allocator` and `ObservationFactory.id_allocator` decide how provisional set and element
+IDs (`TO_BE_DETERMINED...`), Observation IDs (`<finding>_<nanoid>`) and DICOM UUID-derived UIDs
+(`2.25.<uuid as integer>`) are made. Assign one of the allocators here to change it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import random
+import threading
+from typing import ClassVar, Final
+
+PROVISIONAL_PREFIX: Final[str] = "TO_BE_DETERMINED"
+NANOID_SIZE: Final[int] = 10
+# nanoid's default alphabet has 64 characters, so each random byte picks one through its low six bits
+_NANOID_ALPHABET: Final[bytes] = b"_-0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_NANOID_TABLE: Final[bytes] = bytes(_NANOID_ALPHABET[b & 63] for b in range(256))
+# 256 isn't a multiple of 10, so bytes 250-255 would favor some digits; they're skipped instead
+_DIGIT_TABLE: Final[bytes] = bytes(b"0123456789"[b % 10] for b in range(256))
+_NOT_DIGITS: Final[bytes] = bytes(range(250, 256))
+
+# Version and variant bits that make 128 random or hashed bits a valid RFC 4122 UUID
+_VERSION_MASK: Final[int] = ~(0xF000 << 64) & ~(0xC000 << 48)
+_VARIANT: Final[int] = 0x8000 << 48
+_VERSION_4: Final[int] = _VARIANT | (4 << 76)
+_VERSION_5: Final[int] = _VARIANT | (5 << 76)
+
+
+def _uuid_int(data: bytes, version_bits: int) -> int:
+    return (int.from_bytes(data[:16], "big") & _VERSION_MASK) | version_bits
+
+
+class IdAllocator:
+    """Makes provisional set/element IDs, Observation IDs and DICOM UIDs.
+
+    This base class generates them the way the factories always have: four random digits, a nanoid
+    from `nanoid.generate`, and `uuid.uuid4()`. `content` is only used by allocators with
+    `deterministic = True`; the factories don't compute it for the others.
+    """
+
+    deterministic: ClassVar[bool] = False
+
+    def provisional_id(self, namespace: str, /, content: str | None = None) -> str:
+        """Get a `TO_BE_DETERMINED...` ID for a set (`namespace="set"`) or an element (`"element"`)."""
+        return PROVISIONAL_PREFIX + "".join(random.choices("0123456789", k=4))
+
+    def observation_id(self, prefix: str, /, content: bytes | None = None) -> str:
+        """Get an Observation ID, `<prefix>_<10-character nanoid>`."""
+        from nanoid import generate as generate_nanoid
+
+        return f"{prefix}_{generate_nanoid(size=NANOID_SIZE)}"
+
+    def dicom_uid(self, /, content: bytes | None = None) -> str:
+        """Get a DICOM UUID-derived UID (`2.25.` followed by a UUID as a decimal integer)."""
+        import uuid
+
+        return f"2.25.{uuid.uuid4().int}"
+
+    def for_batch(self, sets: int, /) -> IdAllocator:
+        """Get an allocator that another process can use to create `sets` sets (and their elements)
+        without clashing with this one."""
+        return self
+
+
+class EntropyIdAllocator(IdAllocator):
+    """Draws randomness from `os.urandom` in batches of `batch_size` bytes and slices IDs out of it.
+
+    Observation IDs and DICOM UIDs have the same form and amount of randomness as the base class, at a
+    fraction of the cost. Provisional IDs get `provisional_digits` random digits, enough by default
+    that catalogs of many thousands of provisional sets and elements don't collide.
+    """
+
+    def __init__(self, batch_size: int = 1 << 16, provisional_digits: int = 12) -> None:
+        self.batch_size = batch_size
+        self.provisional_digits = provisional_digits
+        self._lock = threading.Lock()
+        self._buffer = b""
+        self._position = 0
+
+    def __getstate__(self) -> dict[str, object]:
+        # Never hand the same random bytes to another process
+        return {"batch_size": self.batch_size, "provisional_digits": self.provisional_digits}
+
+    def __setstate__(self, state: dict[str, object]) -> None:
+        self.__init__(**state)  # type: ignore[misc]
+
+    def random_bytes(self, count: int, /) -> bytes:
+        with self._lock:
+            if self._position + count > len(self._buffer):
+                self._buffer = os.urandom(max(self.batch_size, count))
+                self._position = 0
+            start = self._position
+            self._position += count
+            return self._buffer[start : self._position]
+
+    def random_digits(self, count: int, /) -> str:
+        digits = b""
+        while len(digits) < count:
+            digits += self.random_bytes(count + 2).translate(_DIGIT_TABLE, _NOT_DIGITS)
+        return digits[:count].decode()
+
+    def provisional_id(self, namespace: str, /, content: str | None = None) -> str:
+        return PROVISIONAL_PREFIX + self.random_digits(self.provisional_digits)
+
+    def observation_id(self, prefix: str, /, content: bytes | None = None) -> str:
+        return f"{prefix}_{self.random_bytes(NANOID_SIZE).translate(_NANOID_TABLE).decode()}"
+
+    def dicom_uid(self, /, content: bytes | None = None) -> str:
+        return f"2.25.{_uuid_int(self.random_bytes(16), _VERSION_4)}"
+
+    def observation_ids(self, prefix: str, count: int, /) -> list[str]:
+        """Get `count` Observation IDs from a single draw."""
+        ids = self.random_bytes(NANOID_SIZE * count).translate(_NANOID_TABLE).decode()
+        return [f"{prefix}_{ids[i : i + NANOID_SIZE]}" for i in range(0, len(ids), NANOID_SIZE)]
+
+    def dicom_uids(self, count: int, /) -> list[str]:
+        """Get `count` DICOM UIDs from a single draw."""
+        data = self.random_bytes(16 * count)
+        return [f"2.25.{_uuid_int(data[i : i + 16], _VERSION_4)}" for i in range(0, len(data), 16)]
+
+
+class SequenceIdAllocator(EntropyIdAllocator):
+    """Numbers provisional IDs and Observation IDs from counters, one per namespace (`"set"`,
+    `"element"`, and each Observation ID prefix), so they never collide within the allocator.
+
+    Provisional IDs are zero-padded to `width` digits and Observation IDs to ten. Ranges can be
+    reserved in bulk with `reserve`; `for_batch` uses that to give worker processes their own ranges.
+    DICOM UIDs stay random, since they have to be unique beyond this allocator.
+    """
+
+    # Element IDs reserved per set by `for_batch`; far more elements than any finding model has
+    ELEMENTS_PER_SET: ClassVar[int] = 256
+
+    def __init__(self, start: int = 1, width: int = 4, batch_size: int = 1 << 16) -> None:
+        super().__init__(batch_size=batch_size)
+        self.start = start
+        self.width = width
+        self._next: dict[str, int] = {}
+        self._limits: dict[str, int] | None = None
+
+    def __getstate__(self) -> dict[str, object]:
+        return {
+            "batch_size": self.batch_size,
+            "start": self.start,
+            "width": self.width,
+            "next": self._next,
+            "limits": self._limits,
+        }
+
+    def __setstate__(self, state: dict[str, object]) -> None:
+        self.__init__(start=state["start"], width=state["width"], batch_size=state["batch_size"])  # type: ignore[misc]
+        self._next = dict(state["next"])  # type: ignore[call-overload]
+        self._limits = state["limits"]  # type: ignore[assignment]
+
+    def reserve(self, namespace: str, count: int, /) -> range:
+        """Reserve the next `count` numbers in a namespace."""
+        with self._lock:
+            first = self._next.get(namespace, self.start)
+            if self._limits is not None and first + count > self._limits.get(namespace, first):
+                raise ValueError(f"Numbers reserved for '{namespace}' IDs are used up")
+            self._next[namespace] = first + count
+        return range(first, first + count)
+
+    def provisional_id(self, namespace: str, /, content: str | None = None) -> str:
+        return f"{PROVISIONAL_PREFIX}{self.reserve(namespace, 1)[0]:0{self.width}d}"
+
+    def observation_id(self, prefix: str, /, content: bytes | None = None) -> str:
+        return f"{prefix}_{self.reserve(prefix, 1)[0]:010d}"
+
+    def observation_ids(self, prefix: str, count: int, /) -> list[str]:
+        return [f"{prefix}_{n:010d}" for n in self.reserve(prefix, count)]
+
+    def for_batch(self, sets: int, /) -> SequenceIdAllocator:
+        batch = SequenceIdAllocator(width=self.width, batch_size=self.batch_size)
+        set_numbers = self.reserve("set", sets)
+        element_numbers = self.reserve("element", sets * self.ELEMENTS_PER_SET)
+        batch._next = {"set": set_numbers.start, "element": element_numbers.start}
+        batch._limits = {"set": set_numbers.stop, "element": element_numbers.stop}
+        return batch
+
+
+class DeterministicIdAllocator(IdAllocator):
+    """Derives every ID from a SHA-256 hash of its content, so reprocessing the same input gives the
+    same set, element and Observation IDs and DICOM UIDs.
+
+    The factories pass the set name for a set's provisional ID and, for an element's, the element's name
+    and type together with the ID of the set it is made for; and they pass a canonical encoding of an
+    Observation's set, component values, subject, focus, derivation and body site for Observations
+    (see `ObservationFactory.content_key`); two Observations with all of those equal get the same IDs.
+    `namespace` is mixed into every hash to keep the IDs of separate pipelines apart.
+    """
+
+    deterministic: ClassVar[bool] = True
+
+    def __init__(self, namespace: str = "", provisional_digits: int = 12) -> None:
+        self.namespace = namespace
+        self.provisional_digits = provisional_digits
+
+    def _digest(self, kind: str, content: bytes | str | None) -> bytes:
+        if content is None:
+            raise ValueError(f"Deterministic {kind} IDs need content to derive them from")
+        if isinstance(content, str):
+            content = content.encode()
+        return hashlib.sha256(b"\0".join((self.namespace.encode(), kind.encode(), content))).digest()
+
+    def provisional_id(self, namespace: str, /, content: str | None = None) -> str:
+        digits = str(int.from_bytes(self._digest(namespace, content), "big"))
+        return PROVISIONAL_PREFIX + digits[-self.provisional_digits :]
+
+    def observation_id(self, prefix: str, /, content: bytes | None = None) -> str:
+        return f"{prefix}_{self._digest('observation', content)[:NANOID_SIZE].translate(_NANOID_TABLE).decode()}"
+
+    def dicom_uid(self, /, content: bytes | None = None) -> str:
+        return f"2.25.{_uuid_int(self._digest('uid', content), _VERSION_5)}"
@@ -1 +1,18 @@
-from .observation import Observation as Observation
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .. import _lazy_loader
+
+if TYPE_CHECKING:
+    from .observation import Observation as Observation
+
+# Imported on first use (PEP 562); see the package __init__
+_LAZY: dict[str, str] = {
+    "Observation": ".observation",
+}
+
+__all__ = ["Observation"]
+
+
+__getattr__, __dir__ = _lazy_loader(globals(), _LAZY)
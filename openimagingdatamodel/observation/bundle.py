@@ -0,0 +1,266 @@
+"""Streaming output of Observations as FHIR transaction or batch Bundles, split into chunks."""
+
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import select
+import uuid
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Callable, Final, Iterable, Literal, Mapping
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+    from .observation import Observation
+
+BundleType = Literal["transaction", "batch"]
+RequestMethod = Literal["PUT", "POST"]
+
+DEFAULT_MAX_ENTRIES: Final[int] = 500
+FHIR_JSON: Final[str] = "application/fhir+json"
+
+
+class BundleWriter:
+    """Write Observations as a series of FHIR Bundles of type `transaction` or `batch`.
+
+    Each Observation becomes an entry with a `fullUrl` and a `request`. With `method="PUT"` (the default)
+    the request updates `Observation/<id>`, so sending a Bundle twice doesn't duplicate Observations;
+    with `"POST"` the server assigns new IDs. `fullUrl` is `<base_url>/Observation/<id>` if `base_url` is
+    given, and otherwise a `urn:uuid` derived from the ID.
+
+    Entries are serialized as they are written and collected into the current Bundle, which is sent on
+    once it holds `max_entries` entries or adding one more would take it past `max_bytes`, so memory use
+    is bounded by the chunk size. (An entry bigger than `max_bytes` gets a Bundle to itself.) Bundles go
+    to `target`:
+
+    - a directory: one file per Bundle, `Bundle-000001.json` and so on (see `paths`);
+    - a binary stream: one Bundle per line; a stream passed in is left open;
+    - a callable, called with the JSON of each Bundle, e.g. a `BundlePoster` to send it to a server.
+
+    Used as a context manager, the last Bundle is sent on when the block ends, unless it ends with an
+    exception, in which case the entries not yet sent are dropped.
+    """
+
+    def __init__(
+        self,
+        target: str | os.PathLike[str] | IO[bytes] | Callable[[bytes], Any],
+        /,
+        bundle_type: BundleType = "transaction",
+        method: RequestMethod = "PUT",
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int | None = None,
+        base_url: str | None = None,
+    ) -> None:
+        if bundle_type not in ("transaction", "batch"):
+            raise ValueError(f"Bundle type must be 'transaction' or 'batch', not '{bundle_type}'")
+        if method not in ("PUT", "POST"):
+            raise ValueError(f"Request method must be 'PUT' or 'POST', not '{method}'")
+        if max_entries < 1:
+            raise ValueError("Bundles must hold at least 1 entry")
+        self._directory: Path | None = None
+        self._stream: IO[bytes] | None = None
+        self._send: Callable[[bytes], Any] | None = None
+        if isinstance(target, (str, os.PathLike)):
+            self._directory = Path(target)
+            self._directory.mkdir(parents=True, exist_ok=True)
+        elif hasattr(target, "write"):
+            self._stream = target  # type: ignore[assignment]
+        elif callable(target):
+            self._send = target
+        else:
+            raise ValueError(f"Can't write Bundles to a {type(target).__name__}")
+        self.method = method
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self._header = b'{"resourceType":"Bundle","type":"' + bundle_type.encode() + b'","entry":['
+        self._footer = b"]}"
+        self._entries: list[bytes] = []
+        self._size = len(self._header) + len(self._footer)
+        self.paths: list[Path] = []
+        self.count = 0
+        self.bundles = 0
+        self.bytes_written = 0
+        self.closed = False
+
+    def _entry(self, observation_id: str, resource: bytes) -> bytes:
+        if self.base_url is not None:
+            full_url = f"{self.base_url}/Observation/{observation_id}"
+        else:
+            full_url = f"urn:uuid:{uuid.uuid5(uuid.NAMESPACE_URL, f'Observation/{observation_id}')}"
+        url = f"Observation/{observation_id}" if self.method == "PUT" else "Observation"
+        request = json.dumps({"method": self.method, "url": url}, separators=(",", ":")).encode()
+        return b"".join((
+            b'{"fullUrl":',
+            json.dumps(full_url).encode(),
+            b',"resource":',
+            resource,
+            b',"request":',
+            request,
+            b"}",
+        ))
+
+    def write_json(self, observation_id: str, resource: bytes, /) -> None:
+        """Write an Observation already serialized as FHIR JSON."""
+        if self.closed:
+            raise ValueError("Can't write to a closed BundleWriter")
+        entry = self._entry(observation_id, resource)
+        added = len(entry) + (1 if self._entries else 0)
+        if self._entries and self.max_bytes is not None and self._size + added > self.max_bytes:
+            self.flush()
+            added = len(entry)
+        self._entries.append(entry)
+        self._size += added
+        self.count += 1
+        if len(self._entries) >= self.max_entries:
+            self.flush()
+
+    def write(self, observation: Observation) -> None:
+        """Write one Observation."""
+        resource = observation.__pydantic_serializer__.to_json(observation, by_alias=True, exclude_none=True)
+        self.write_json(observation.id_, resource)
+
+    def write_many(self, observations: Iterable[Observation]) -> int:
+        """Write Observations from an iterable, returning how many were written."""
+        start = self.count
+        for observation in observations:
+            self.write(observation)
+        return self.count - start
+
+    def flush(self) -> None:
+        """Send out the current Bundle, if it has any entries."""
+        if not self._entries:
+            return
+        bundle = b"".join((self._header, b",".join(self._entries), self._footer))
+        self._entries.clear()
+        self._size = len(self._header) + len(self._footer)
+        self.bundles += 1
+        if self._directory is not None:
+            path = self._directory / f"Bundle-{self.bundles:06d}.json"
+            path.write_bytes(bundle)
+            self.paths.append(path)
+        elif self._stream is not None:
+            self._stream.write(bundle + b"\n")
+        else:
+            self._send(bundle)  # type: ignore[misc]
+        self.bytes_written += len(bundle)
+
+    def close(self) -> None:
+        """Send out the last Bundle."""
+        if self.closed:
+            return
+        self.flush()
+        if self._stream is not None:
+            self._stream.flush()
+        self.closed = True
+
+    def __enter__(self) -> BundleWriter:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        if exc_type is not None:
+            self._entries.clear()
+            self.closed = True
+            return
+        self.close()
+
+
+class BundlePoster:
+    """Send Bundles to a FHIR server's base URL, reusing one HTTP connection (keep-alive) for all of them.
+
+    Pass one as the target of a `BundleWriter`. Each call posts a Bundle and returns the body of the
+    response (for a transaction, a `transaction-response` Bundle); a response other than 2xx raises
+    `ValueError`. A kept-alive connection the server has closed in between is noticed and reopened
+    before sending. If the connection fails anyway, the Bundle is only sent again when the server can't
+    have acted on it (the request couldn't be sent on a kept-alive connection), or when `idempotent` is
+    set because the Bundles only hold PUT entries (the `BundleWriter` default); a failure partway
+    through a POST transaction is raised, since resending it could create its Observations twice.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        /,
+        timeout: float = 60.0,
+        headers: Mapping[str, str] | None = None,
+        idempotent: bool = False,
+    ) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Not an http(s) URL: '{url}'")
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = parts.path or "/"
+        self.timeout = timeout
+        self.headers = {"Content-Type": FHIR_JSON, "Accept": FHIR_JSON, **(headers or {})}
+        self.idempotent = idempotent
+        self._connection: http.client.HTTPConnection | None = None
+        self._reused = False
+        self.connections = 0
+        self.requests = 0
+
+    def _connect(self) -> http.client.HTTPConnection:
+        sock = self._connection.sock if self._connection is not None else None
+        # An idle kept-alive connection should have nothing to read; if it does, the server has closed it
+        if sock is not None and select.select([sock], [], [], 0)[0]:
+            self.close()
+        if self._connection is None:
+            cls = http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+            self._connection = cls(self._host, self._port, timeout=self.timeout)
+            self._reused = False
+            self.connections += 1
+        return self._connection
+
+    def __call__(self, bundle: bytes, /) -> bytes:
+        for attempt in range(2):
+            connection = self._connect()
+            reused = self._reused
+            sent = False
+            try:
+                connection.request("POST", self._path, body=bundle, headers=self.headers)
+                sent = True
+                response = connection.getresponse()
+                body = response.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self.close()
+                if attempt or not (self.idempotent or (reused and not sent)):
+                    raise
+        self._reused = True
+        self.requests += 1
+        if response.will_close:
+            self.close()
+        if not 200 <= response.status < 300:
+            raise ValueError(f"FHIR server returned {response.status} {response.reason}: {body[:500]!r}")
+        return body
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+            self._reused = False
+
+    def __enter__(self) -> BundlePoster:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self.close()
+
+
+def write_observations_bundles(
+    target: str | os.PathLike[str] | IO[bytes] | Callable[[bytes], Any],
+    observations: Iterable[Observation],
+    /,
+    **kwargs: Any,
+) -> int:
+    """Write Observations as Bundles (see `BundleWriter`), returning how many were written."""
+    with BundleWriter(target, **kwargs) as writer:
+        return writer.write_many(observations)
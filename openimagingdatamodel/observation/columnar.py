@@ -0,0 +1,387 @@
+"""In-memory columnar store of Observations for cohort queries: filters, counts and group-bys with NumPy."""
+
+from __future__ import annotations
+
+import os
+from array import array
+from typing import TYPE_CHECKING, Any, Final, Iterable, Literal, Mapping, Sequence, Union
+
+from pydantic_core import from_json
+
+from openimagingdatamodel.quarantine import iter_ndjson_lines
+
+from .decoder import _import_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .observation import Observation
+
+ColumnKind = Literal["category", "number"]
+
+# A value to match: a code (or string), a number or boolean, a list of codes, or (low, high) for a range
+ValueFilter = Union[str, float, bool, Sequence[str], tuple[float, float]]
+
+_NO_CODE: Final[int] = -1
+
+
+class _Dictionary:
+    """Dictionary encoding of strings as small integers, in order of first appearance."""
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self.codes: dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class _Column:
+    """Values of one component code, kept sparse: the rows that have a value, and the value in each.
+
+    Category columns (codes from `valueCodeableConcept`, and strings that aren't numbers) hold
+    dictionary codes; number columns (integers, booleans as 0/1, and numeric strings) hold floats.
+    """
+
+    __slots__ = ("kind", "rows", "values", "dictionary", "_index")
+
+    def __init__(self, kind: ColumnKind) -> None:
+        self.kind = kind
+        self.rows = array("q")
+        self.values = array("i" if kind == "category" else "d")
+        self.dictionary = _Dictionary()
+        self._index: Any = None
+
+    def append(self, row: int, value: Any) -> None:
+        if self.kind == "category":
+            self.values.append(self.dictionary.encode(str(value)))
+        else:
+            self.values.append(float(value))
+        self.rows.append(row)
+        self._index = None
+
+    def index(self, np: Any) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get `(rows, values, order)` as arrays, with `order` sorting the values (stable, so rows stay
+        in order within a value); built on first use after a change."""
+        if self._index is None:
+            rows = np.frombuffer(self.rows, dtype=np.int64).copy()
+            values = np.frombuffer(self.values, dtype=np.int32 if self.kind == "category" else np.float64).copy()
+            self._index = (rows, values, np.argsort(values, kind="stable"))
+        return self._index
+
+    def nbytes(self) -> int:
+        return self.rows.itemsize * len(self.rows) + self.values.itemsize * len(self.values)
+
+
+def _scalar_value(value: Any) -> tuple[ColumnKind, Any]:
+    """Get the column kind and value of a boolean, integer or string component value."""
+    if isinstance(value, str):
+        try:
+            return "number", float(value)
+        except ValueError:
+            return "category", value
+    return "number", int(value) if isinstance(value, bool) else value
+
+
+_SCALAR_KEYS: Final[tuple[str, ...]] = ("valueBoolean", "valueInteger", "valueString")
+_SCALAR_FIELDS: Final[tuple[str, ...]] = ("value_boolean", "value_integer", "value_string")
+
+
+class ObservationStore:
+    """Observations held as columns, for fast filters, counts and group-bys over many of them.
+
+    Each Observation is a row. IDs are packed into one buffer; subject references, set codes and
+    statuses are dictionary-encoded into dense integer columns. Component values go into one sparse
+    column per component code (the element ID), with value set codes dictionary-encoded. Rows take a
+    small fraction of the memory of `Observation` objects.
+
+    Queries return sorted arrays of row numbers. Each filter is answered from a sorted index (built
+    on first use after new rows are added): subjects, sets and statuses by their dictionary codes,
+    component values by code, or by number for equality and ranges. Filters are combined by
+    intersecting the row arrays. Requires NumPy for queries.
+    """
+
+    def __init__(self, observations: Iterable[Observation] = (), /) -> None:
+        self._id_data = bytearray()
+        self._id_ends = array("q")
+        self._id_rows: dict[str, int] | None = None
+        self._subjects = _Dictionary()
+        self._sets = _Dictionary()
+        self._statuses = _Dictionary()
+        self._subject_codes = array("i")
+        self._set_codes = array("i")
+        self._status_codes = array("b")
+        self._columns: dict[str, _Column] = {}
+        self._indexes: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self.add_many(observations)
+
+    def __len__(self) -> int:
+        return len(self._id_ends)
+
+    # Loading
+
+    def _add_row(
+        self,
+        observation_id: str,
+        subject: str | None,
+        set_code: str | None,
+        status: str,
+        components: Iterable[tuple[str, ColumnKind, Any]],
+    ) -> None:
+        values: dict[str, tuple[ColumnKind, Any]] = {}
+        for code, kind, value in components:
+            column = self._columns.get(code)
+            if column is not None and column.kind == "number" and kind == "category":
+                raise ValueError(f"Observation '{observation_id}' has a code for number component '{code}'")
+            values.setdefault(code, (kind, value))
+        row = len(self._id_ends)
+        self._id_data += observation_id.encode()
+        self._id_ends.append(len(self._id_data))
+        if self._id_rows is not None:
+            self._id_rows[observation_id] = row
+        self._subject_codes.append(_NO_CODE if subject is None else self._subjects.encode(subject))
+        self._set_codes.append(_NO_CODE if set_code is None else self._sets.encode(set_code))
+        self._status_codes.append(self._statuses.encode(status))
+        self._indexes.clear()
+        for code, (kind, value) in values.items():
+            column = self._columns.get(code)
+            if column is None:
+                column = self._columns[code] = _Column(kind)
+            column.append(row, value)
+
+    def add(self, observation: Observation, /) -> None:
+        components = []
+        for component in observation.components:
+            code = component.code.codings[0].code
+            if (concept := getattr(component, "value_codeable_concept", None)) is not None:
+                components.append((code, "category", concept.codings[0].code))
+                continue
+            for field in _SCALAR_FIELDS:
+                if (value := getattr(component, field, None)) is not None:
+                    components.append((code, *_scalar_value(value)))
+                    break
+        self._add_row(
+            observation.id_,
+            observation.subject.reference if observation.subject is not None else None,
+            observation.code.codings[0].code if observation.code is not None else None,
+            observation.status,
+            components,
+        )
+
+    def add_many(self, observations: Iterable[Observation], /) -> int:
+        count = 0
+        for observation in observations:
+            self.add(observation)
+            count += 1
+        return count
+
+    def add_json(self, data: Mapping[str, Any], /) -> None:
+        """Add an Observation in its FHIR JSON form (as parsed), without building an `Observation`."""
+        subject = data.get("subject")
+        code = data.get("code")
+        self._add_row(
+            data["id"],
+            subject["reference"] if subject else None,
+            code["coding"][0]["code"] if code else None,
+            data["status"],
+            self._components(data.get("component", ())),
+        )
+
+    def add_ndjson(self, source: str | os.PathLike[str], /, byte_range: tuple[int, int] | None = None) -> int:
+        """Add the Observations in an NDJSON file (see `iter_observations`), reading their JSON directly."""
+        count = 0
+        for _, line in iter_ndjson_lines(os.fspath(source), byte_range):
+            self.add_json(from_json(line))
+            count += 1
+        return count
+
+    @staticmethod
+    def _components(components: Iterable[Mapping[str, Any]]) -> Iterable[tuple[str, ColumnKind, Any]]:
+        for component in components:
+            code = component["code"]["coding"][0]["code"]
+            if (concept := component.get("valueCodeableConcept")) is not None:
+                yield code, "category", concept["coding"][0]["code"]
+                continue
+            for key in _SCALAR_KEYS:
+                if (value := component.get(key)) is not None:
+                    yield code, *_scalar_value(value)
+                    break
+
+    # Rows
+
+    def id_of(self, row: int, /) -> str:
+        start = self._id_ends[row - 1] if row else 0
+        return self._id_data[start : self._id_ends[row]].decode()
+
+    def ids(self, rows: Iterable[int] | None = None, /) -> list[str]:
+        """Get the IDs of the given rows (all rows by default)."""
+        return [self.id_of(int(row)) for row in (range(len(self)) if rows is None else rows)]
+
+    def row_of(self, observation_id: str, /) -> int:
+        """Get the row of an Observation by ID. The first call builds a hash index of the IDs."""
+        if self._id_rows is None:
+            self._id_rows = {self.id_of(row): row for row in range(len(self))}
+        if (row := self._id_rows.get(observation_id)) is None:
+            raise ValueError(f"Observation '{observation_id}' not found in store")
+        return row
+
+    @property
+    def component_codes(self) -> list[str]:
+        return list(self._columns)
+
+    def column(self, code: str, /, rows: np.ndarray | None = None) -> np.ndarray:
+        """Get a component's values for the rows (all rows by default): category columns as strings
+        (None where missing), number columns as floats (NaN where missing)."""
+        np = _import_numpy()
+        column = self._get_column(code)
+        column_rows, values, _ = column.index(np)
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.int64)
+        positions = np.searchsorted(column_rows, rows)
+        found = positions < len(column_rows)
+        found[found] = column_rows[positions[found]] == rows[found]
+        if column.kind == "number":
+            result = np.full(len(rows), np.nan)
+            result[found] = values[positions[found]]
+            return result
+        result = np.full(len(rows), None, dtype=object)
+        result[found] = np.array(column.dictionary.values, dtype=object)[values[positions[found]]]
+        return result
+
+    def _get_column(self, code: str) -> _Column:
+        if (column := self._columns.get(code)) is None:
+            raise ValueError(f"No component with code '{code}' in store")
+        return column
+
+    # Queries
+
+    def _dense_index(self, name: str, codes: array) -> tuple[np.ndarray, np.ndarray]:
+        """Get `(order, starts)` for a dense dictionary-encoded column: rows sorted by code, and where
+        each code's rows start in `order` (code -1, for no value, is left out)."""
+        if (index := self._indexes.get(name)) is None:
+            np = _import_numpy()
+            values = np.frombuffer(codes, dtype=np.int32 if codes.typecode == "i" else np.int8).astype(np.int64)
+            order = np.argsort(values, kind="stable")
+            starts = np.searchsorted(values[order], np.arange(values.max(initial=-1) + 2))
+            index = self._indexes[name] = (order, starts)
+        return index
+
+    def _dense_rows(self, name: str, codes: array, dictionary: _Dictionary, wanted: str | Sequence[str]) -> np.ndarray:
+        np = _import_numpy()
+        order, starts = self._dense_index(name, codes)
+        parts = []
+        for value in [wanted] if isinstance(wanted, str) else wanted:
+            if (code := dictionary.codes.get(value)) is not None:
+                parts.append(order[starts[code] : starts[code + 1]])
+        return np.sort(np.concatenate(parts)) if len(parts) > 1 else (parts[0] if parts else np.empty(0, np.int64))
+
+    def _component_rows(self, code: str, wanted: ValueFilter) -> np.ndarray:
+        np = _import_numpy()
+        column = self._columns.get(code)
+        if column is None:
+            return np.empty(0, np.int64)
+        rows, values, order = column.index(np)
+        sorted_values = values[order]
+        if column.kind == "number":
+            if isinstance(wanted, tuple):
+                low, high = wanted
+            elif isinstance(wanted, (int, float)):
+                low = high = float(wanted)
+            else:
+                raise ValueError(f"Component '{code}' holds numbers; filter it by a number or (low, high) range")
+            start, end = np.searchsorted(sorted_values, low, "left"), np.searchsorted(sorted_values, high, "right")
+            return np.sort(rows[order[start:end]])
+        parts = []
+        for value in [wanted] if isinstance(wanted, str) else wanted:
+            if not isinstance(value, str):
+                raise ValueError(f"Component '{code}' holds codes; filter it by a code or list of codes")
+            if (value_code := column.dictionary.codes.get(value)) is not None:
+                start = np.searchsorted(sorted_values, value_code, "left")
+                end = np.searchsorted(sorted_values, value_code, "right")
+                parts.append(rows[order[start:end]])
+        return np.sort(np.concatenate(parts)) if len(parts) > 1 else (parts[0] if parts else np.empty(0, np.int64))
+
+    def filter(
+        self,
+        subject: str | Sequence[str] | None = None,
+        /,
+        set_code: str | Sequence[str] | None = None,
+        status: str | Sequence[str] | None = None,
+        values: Mapping[str, ValueFilter] | None = None,
+    ) -> np.ndarray:
+        """Get the sorted rows matching all the filters given; each filter can list several values to match any of.
+
+        `values` maps component codes (element IDs) to a value code (or list of them), a number, or a
+        `(low, high)` range (inclusive) for numbers.
+        """
+        np = _import_numpy()
+        selections = []
+        if subject is not None:
+            selections.append(self._dense_rows("subject", self._subject_codes, self._subjects, subject))
+        if set_code is not None:
+            selections.append(self._dense_rows("set", self._set_codes, self._sets, set_code))
+        if status is not None:
+            selections.append(self._dense_rows("status", self._status_codes, self._statuses, status))
+        for code, wanted in (values or {}).items():
+            selections.append(self._component_rows(code, wanted))
+        if not selections:
+            return np.arange(len(self), dtype=np.int64)
+        selections.sort(key=len)
+        rows = selections[0]
+        for other in selections[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def count(
+        self,
+        subject: str | Sequence[str] | None = None,
+        /,
+        set_code: str | Sequence[str] | None = None,
+        status: str | Sequence[str] | None = None,
+        values: Mapping[str, ValueFilter] | None = None,
+    ) -> int:
+        return len(self.filter(subject, set_code=set_code, status=status, values=values))
+
+    def group_by(self, key: str, /, rows: np.ndarray | None = None) -> dict[str, int]:
+        """Count rows (all rows by default) per subject, set code or status (`key` "subject", "set" or
+        "status"), or per value of a category component (`key` its code). Rows without one are left out."""
+        np = _import_numpy()
+        dense = {
+            "subject": (self._subject_codes, self._subjects),
+            "set": (self._set_codes, self._sets),
+            "status": (self._status_codes, self._statuses),
+        }
+        if key in dense:
+            codes, dictionary = dense[key]
+            values = np.frombuffer(codes, dtype=np.int32 if codes.typecode == "i" else np.int8)
+            if rows is not None:
+                values = values[rows]
+        else:
+            column = self._get_column(key)
+            if column.kind != "category":
+                raise ValueError(f"Component '{key}' holds numbers; only category components can be grouped by")
+            column_rows, values, _ = column.index(np)
+            if rows is not None:
+                values = values[np.isin(column_rows, rows, assume_unique=True)]
+            dictionary = column.dictionary
+        counts = np.bincount(values[values >= 0], minlength=len(dictionary.values))
+        return {dictionary.values[code]: int(count) for code, count in enumerate(counts) if count}
+
+    def info(self) -> dict[str, int]:
+        """Report the number of rows, columns and distinct values, and the bytes used by the columns."""
+        nbytes = len(self._id_data) + sum(
+            len(buffer) * buffer.itemsize
+            for buffer in (self._id_ends, self._subject_codes, self._set_codes, self._status_codes)
+        )
+        return {
+            "rows": len(self),
+            "columns": len(self._columns),
+            "subjects": len(self._subjects.values),
+            "sets": len(self._sets.values),
+            "column_bytes": nbytes + sum(column.nbytes() for column in self._columns.values()),
+        }
@@ -0,0 +1,185 @@
+"""Turn Observations back into CDE element values, one at a time or as columns for analytics."""
+
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Final, Iterable, Literal
+
+from openimagingdatamodel.cde_set.element import BooleanElement, FloatElement, IntegerElement, ValueSetElement
+
+from .observation import BooleanComponent, CodeableConceptComponent, IntegerComponent, StringComponent
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from openimagingdatamodel.cde_set.set import CDESet
+
+    from .observation import CodeableConcept, Observation
+    from .observation_factory import ComponentValue
+
+ElementKind = Literal["value_set", "boolean", "float", "integer"]
+
+# array.array typecodes used to collect each kind of column before handing it to NumPy
+_BUFFER_TYPECODES: Final[dict[ElementKind, str]] = {"value_set": "i", "boolean": "b", "float": "d", "integer": "q"}
+_MISSING: Final[dict[ElementKind, Any]] = {"value_set": -1, "boolean": 0, "float": float("nan"), "integer": 0}
+
+
+def _import_numpy() -> Any:
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("Columnar decoding requires NumPy (pip install openimagingdatamodel[columnar])") from e
+    return numpy
+
+
+class _DecodedElement:
+    """What the decoder needs to know about one element: its column and, for value sets, its categories."""
+
+    __slots__ = ("element", "column", "kind", "categories", "category_index")
+
+    def __init__(self, element: Any, column: str) -> None:
+        self.element = element
+        self.column = column
+        self.categories: list[str] = []
+        self.category_index: dict[str, int] = {}
+        self.kind: ElementKind
+        if isinstance(element, ValueSetElement):
+            self.kind = "value_set"
+            for i, value in enumerate(element.value_set.values):
+                self.categories.append(value.name)
+                self.category_index[value.code.casefold()] = i
+        elif isinstance(element, BooleanElement):
+            self.kind = "boolean"
+        elif isinstance(element, FloatElement):
+            self.kind = "float"
+        elif isinstance(element, IntegerElement):
+            self.kind = "integer"
+        else:
+            raise ValueError(f"Unsupported element type for element {element.id}")
+
+    def category(self, concept: CodeableConcept) -> int:
+        for coding in concept.codings:
+            if (index := self.category_index.get(coding.code.casefold())) is not None:
+                return index
+        codes = ", ".join(coding.code for coding in concept.codings)
+        raise ValueError(f"Value code(s) {codes} not found in ValueSet for element {self.element.id}")
+
+
+@dataclass
+class ObservationColumns:
+    """Element values from many Observations as one NumPy array per element.
+
+    Value set columns hold `int32` indexes into `categories[column]` (-1 where missing). Boolean, float
+    and integer columns are `bool`, `float64` (NaN where missing) and `int64`. `present[column]` is a
+    boolean mask of the rows where the Observation had a value for the element.
+    """
+
+    ids: list[str]
+    columns: dict[str, np.ndarray]
+    present: dict[str, np.ndarray]
+    categories: dict[str, list[str]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def to_arrow(self) -> Any:
+        """Convert to a `pyarrow.Table`, with value set columns as dictionary arrays."""
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError(
+                "Converting to Arrow requires pyarrow (pip install openimagingdatamodel[columnar])"
+            ) from e
+        arrays = {"id": pa.array(self.ids, type=pa.string())}
+        for name, values in self.columns.items():
+            mask = ~self.present[name]
+            if name in self.categories:
+                indices = pa.array(values, mask=mask, type=pa.int32())
+                arrays[name] = pa.DictionaryArray.from_arrays(indices, pa.array(self.categories[name]))
+            else:
+                arrays[name] = pa.array(values, mask=mask)
+        return pa.table(arrays)
+
+
+class ObservationDecoder:
+    """Resolves the components of Observations for one CDESet back into element values.
+
+    Components are matched to elements by the codes in their `code`, and value set values by the codes
+    in their `valueCodeableConcept`, so the result doesn't depend on display text. Results are keyed by
+    element name, or by element ID with `key="id"`.
+    """
+
+    def __init__(self, cde_set: CDESet, /, key: Literal["name", "id"] = "name") -> None:
+        self.cde_set = cde_set
+        self._elements: dict[str, _DecodedElement] = {}
+        self._decoded: list[_DecodedElement] = []
+        for element in cde_set.elements:
+            decoded = _DecodedElement(element, element.name if key == "name" else element.id)
+            self._decoded.append(decoded)
+            self._elements[element.id.casefold()] = decoded
+
+    def _element_for(self, code: CodeableConcept) -> _DecodedElement:
+        for coding in code.codings:
+            if (decoded := self._elements.get(coding.code.casefold())) is not None:
+                return decoded
+        codes = ", ".join(coding.code for coding in code.codings)
+        raise ValueError(f"Element code(s) {codes} not found in CDE Set '{self.cde_set.id}' ({self.cde_set.name})")
+
+    @staticmethod
+    def _raw_value(decoded: _DecodedElement, component: Any) -> Any:
+        """Get a component's value in the form stored in the columns (category index for value sets)."""
+        if decoded.kind == "value_set":
+            if not isinstance(component, CodeableConceptComponent):
+                raise ValueError(f"Expected a CodeableConcept value for element {decoded.element.id}")
+            return decoded.category(component.value_codeable_concept)
+        if decoded.kind == "boolean":
+            if not isinstance(component, BooleanComponent):
+                raise ValueError(f"Expected a boolean value for element {decoded.element.id}")
+            return component.value_boolean
+        if decoded.kind == "float":
+            if isinstance(component, StringComponent):
+                return float(component.value_string)
+            if isinstance(component, IntegerComponent):
+                return float(component.value_integer)
+            raise ValueError(f"Expected a numeric value for element {decoded.element.id}")
+        if not isinstance(component, IntegerComponent):
+            raise ValueError(f"Expected an integer value for element {decoded.element.id}")
+        return component.value_integer
+
+    def decode(self, observation: Observation) -> dict[str, ComponentValue]:
+        """Get `{element: value}` for an Observation; value set values are given by name."""
+        values: dict[str, ComponentValue] = {}
+        for component in observation.components:
+            decoded = self._element_for(component.code)
+            raw = self._raw_value(decoded, component)
+            values[decoded.column] = decoded.categories[raw] if decoded.kind == "value_set" else raw
+        return values
+
+    def decode_columns(self, observations: Iterable[Observation]) -> ObservationColumns:
+        """Decode many Observations into an `ObservationColumns` with one array per element.
+
+        Values are collected into typed buffers in a single pass and converted to NumPy arrays at the end,
+        so downstream filtering and aggregation can be vectorized.
+        """
+        np = _import_numpy()
+        ids: list[str] = []
+        buffers = {d.column: array(_BUFFER_TYPECODES[d.kind]) for d in self._decoded}
+        present = {d.column: array("b") for d in self._decoded}
+        missing = [(buffers[d.column], present[d.column], _MISSING[d.kind]) for d in self._decoded]
+        for row, observation in enumerate(observations):
+            ids.append(observation.id_)
+            for buffer, mask, fill in missing:
+                buffer.append(fill)
+                mask.append(0)
+            for component in observation.components:
+                decoded = self._element_for(component.code)
+                buffers[decoded.column][row] = self._raw_value(decoded, component)
+                present[decoded.column][row] = 1
+        dtypes = {"value_set": np.int32, "boolean": np.bool_, "float": np.float64, "integer": np.int64}
+        return ObservationColumns(
+            ids=ids,
+            columns={d.column: np.array(buffers[d.column], dtype=dtypes[d.kind]) for d in self._decoded},
+            present={column: np.array(mask, dtype=np.bool_) for column, mask in present.items()},
+            categories={d.column: list(d.categories) for d in self._decoded if d.kind == "value_set"},
+        )
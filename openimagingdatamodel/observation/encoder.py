@@ -0,0 +1,259 @@
+"""Precompiled per-CDESet encoder for building Observations and their FHIR JSON on the hot path."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Final, Literal, Mapping, get_args
+
+from caseswitcher import to_snake
+from pydantic import ConfigDict, TypeAdapter
+
+from openimagingdatamodel.cde_set.element import BooleanElement, FloatElement, IntegerElement, ValueSetElement
+from openimagingdatamodel.cde_set.set import CDESet  # noqa: TCH001
+
+from .observation import CodeableConcept, Component, Identifier, Observation, Reference, StatusValue
+from .observation_factory import ComponentValue, ComponentValueMap, ObservationFactory, SharedCodes
+
+ElementKind = Literal["value_set", "boolean", "float", "integer"]
+
+_json_str = json.encoder.encode_basestring  # type: ignore[attr-defined]
+_STATUS_VALUES: Final[frozenset[str]] = frozenset(get_args(StatusValue))
+_REFERENCE_ADAPTER: Final = TypeAdapter(Reference)
+# Built on first use, like the models, rather than at import
+_REFERENCE_LIST_ADAPTER: Final = TypeAdapter(list[Reference], config=ConfigDict(defer_build=True))
+_FOCUS_ADAPTER: Final = TypeAdapter(list[Mapping[str, Any]], config=ConfigDict(defer_build=True))
+_CODEABLE_CONCEPT_ADAPTER: Final = TypeAdapter(CodeableConcept)
+_COMPONENT_ADAPTER: Final = TypeAdapter(Component, config=ConfigDict(defer_build=True))
+_VALUE_KEYS: Final[dict[ElementKind, str]] = {
+    "value_set": "valueCodeableConcept",
+    "boolean": "valueBoolean",
+    "float": "valueString",
+    "integer": "valueInteger",
+}
+
+
+def _coding_dict(system: str, code: str, display: str) -> dict[str, Any]:
+    return {"coding": [{"system": system, "code": code, "display": display}]}
+
+
+def _coding_json(system: str, code: str, display: str) -> str:
+    return f'{{"coding":[{{"system":{_json_str(system)},"code":{_json_str(code)},"display":{_json_str(display)}}}]}}'
+
+
+class _CompiledElement:
+    """The precomputed codes (as shared concepts or dicts, and JSON fragments) for one element and its values."""
+
+    __slots__ = ("element", "kind", "value_key", "code", "code_json", "values")
+
+    def __init__(self, element: Any, system: str, shared: SharedCodes | None = None) -> None:
+        self.element = element
+        self.code = (
+            shared.element_code(element) if shared is not None else _coding_dict(system, element.id, element.name)
+        )
+        self.code_json = '{"code":' + _coding_json(system, element.id, element.name)
+        self.values: dict[str, tuple[CodeableConcept | dict[str, Any], str]] = {}
+        self.kind: ElementKind
+        if isinstance(element, ValueSetElement):
+            self.kind = "value_set"
+            for v in element.value_set.values:
+                compiled = (
+                    shared.value_code(v) if shared is not None else _coding_dict(system, v.code, v.name),
+                    _coding_json(system, v.code, v.name),
+                )
+                for key in (v.code, v.value, v.name):
+                    if key is not None:
+                        self.values[key] = self.values[key.casefold()] = compiled
+        elif isinstance(element, BooleanElement):
+            self.kind = "boolean"
+        elif isinstance(element, FloatElement):
+            self.kind = "float"
+        elif isinstance(element, IntegerElement):
+            self.kind = "integer"
+        else:
+            raise ValueError(f"Unsupported element type for element {element.id}")
+        self.value_key = _VALUE_KEYS[self.kind]
+
+    def check_value(self, value: ComponentValue) -> Any:
+        """Check a value against the element and return it in the form the component stores."""
+        if self.kind == "value_set":
+            if not isinstance(value, str):
+                raise ValueError(f"Value must be a string for ValueSetElement {self.element.id}")
+            if (compiled := self.values.get(value) or self.values.get(value.casefold())) is None:
+                raise ValueError(f"Value '{value}' not found in ValueSet")
+            return compiled
+        if self.kind == "boolean":
+            if not isinstance(value, (bool, float, int)):
+                raise ValueError(f"Value must be a boolean or number for BooleanElement {self.element.id}")
+            return bool(value)
+        if self.kind == "float":
+            return str(float(value))
+        return int(value)
+
+
+class ObservationEncoder:
+    """Builds Observations for one CDESet from component values, compiled once from the set.
+
+    Element and value codes are worked out when the encoder is created. Incoming values are checked
+    against the set here (value set membership, numeric type), the same way `ObservationFactory`
+    does, so `encode_json` can write FHIR JSON directly without building any models. Its output is
+    identical to `create_observation(...).model_dump_json(by_alias=True, exclude_none=True)`.
+    With `shared_codes=True`, `encode` uses the immutable codes shared by all Observations of the set.
+    """
+
+    def __init__(
+        self, cde_set: CDESet, /, system: str = ObservationFactory.RADELEMENT_URL, shared_codes: bool = False
+    ) -> None:
+        self.cde_set = cde_set
+        self.system = system
+        self.finding_name = to_snake(cde_set.name)
+        self._set_code_json = _coding_json(system, cde_set.id, cde_set.name)
+        shared = ObservationFactory.shared_codes(cde_set, system) if shared_codes else None
+        self.set_code = (
+            shared.set_code(cde_set) if shared is not None else _coding_dict(system, cde_set.id, cde_set.name)
+        )
+        self._elements: dict[str, _CompiledElement] = {}
+        for element in cde_set.elements:
+            compiled = _CompiledElement(element, system, shared)
+            for key in (element.id, element.name):
+                self._elements[key] = self._elements[key.casefold()] = compiled
+
+    def _element(self, el_name: str) -> _CompiledElement:
+        if (compiled := self._elements.get(el_name) or self._elements.get(el_name.casefold())) is None:
+            raise ValueError(f"Element '{el_name}' not found in CDE Set '{self.cde_set.id}' ({self.cde_set.name})")
+        return compiled
+
+    def generate_id(self, content: bytes | None = None) -> str:
+        return ObservationFactory.id_allocator.observation_id(self.finding_name, content)
+
+    @staticmethod
+    def _identifier(identifier: str | Identifier | None, content: bytes | None = None) -> Identifier:
+        if isinstance(identifier, Identifier):
+            return identifier
+        return ObservationFactory.generate_observation_identifier(identifier, content=content)
+
+    def _content(
+        self,
+        id: str | None,
+        identifier: str | Identifier | None,
+        component_values: ComponentValueMap | None,
+        subject: Reference | None,
+        focus: list[Mapping[str, Any]] | None,
+        derived_from: list[Reference] | None,
+        body_site: CodeableConcept | None,
+    ) -> bytes | None:
+        """Get the content key for a deterministic ID allocator, if one is in use and IDs are needed."""
+        if not ObservationFactory.id_allocator.deterministic or (id and identifier):
+            return None
+        return ObservationFactory.content_key(self.cde_set, component_values, subject, focus, derived_from, body_site)
+
+    @staticmethod
+    def _check_status(status: str) -> None:
+        if status not in _STATUS_VALUES:
+            raise ValueError(f"Invalid observation status '{status}'")
+
+    def _component_data(self, el_name: str, value: ComponentValue) -> dict[str, Any]:
+        """Put together the data of the Component for one element value from the precomputed codes."""
+        compiled = self._element(el_name)
+        checked = compiled.check_value(value)
+        # The value key first, so the Component type is picked from the first key
+        return {compiled.value_key: checked[0] if compiled.kind == "value_set" else checked, "code": compiled.code}
+
+    def component(self, el_name: str, value: ComponentValue) -> Component:
+        """Create the Component for one element value."""
+        return _COMPONENT_ADAPTER.validate_python(self._component_data(el_name, value))
+
+    def encode(
+        self,
+        component_values: ComponentValueMap | None = None,
+        /,
+        id: str | None = None,
+        identifier: str | Identifier | None = None,
+        status: StatusValue = ObservationFactory.DEFAULT_STATUS,
+        subject: Reference | None = None,
+        focus: list[Mapping[str, Any]] | None = None,
+        derived_from: list[Reference] | None = None,
+        body_site: CodeableConcept | None = None,
+    ) -> Observation:
+        """Create an Observation; takes the same arguments as `ObservationFactory.create_observation`.
+
+        The Observation is validated in one pass from the codes compiled in `__init__`: plain dicts, so
+        each Observation gets its own (changeable) codes, or the shared concepts, which are used as is.
+        """
+        content = self._content(id, identifier, component_values, subject, focus, derived_from, body_site)
+        data: dict[str, Any] = {
+            "id": id or self.generate_id(content),
+            "identifier": [self._identifier(identifier, content)],
+            "code": self.set_code,
+            "status": status,
+        }
+        if subject:
+            data["subject"] = subject
+        if focus:
+            data["focus"] = focus
+        if derived_from:
+            data["derivedFrom"] = derived_from
+        if body_site:
+            data["bodySite"] = body_site
+        if component_values:
+            data["component"] = [self._component_data(k, v) for k, v in component_values.items()]
+        return Observation.model_validate(data)
+
+    def encode_json(
+        self,
+        component_values: ComponentValueMap | None = None,
+        /,
+        id: str | None = None,
+        identifier: str | Identifier | None = None,
+        status: StatusValue = ObservationFactory.DEFAULT_STATUS,
+        subject: Reference | None = None,
+        focus: list[Mapping[str, Any]] | None = None,
+        derived_from: list[Reference] | None = None,
+        body_site: CodeableConcept | None = None,
+    ) -> bytes:
+        """Write an Observation straight to FHIR JSON without building the models.
+
+        Takes the same arguments as `ObservationFactory.create_observation`; the result equals
+        `create_observation(...).model_dump_json(by_alias=True, exclude_none=True).encode()`.
+        """
+        self._check_status(status)
+        components = []
+        if component_values:
+            for el_name, value in component_values.items():
+                compiled = self._element(el_name)
+                checked = compiled.check_value(value)
+                if compiled.kind == "value_set":
+                    components.append(f'{compiled.code_json},"valueCodeableConcept":{checked[1]}}}')
+                elif compiled.kind == "boolean":
+                    components.append(f'{compiled.code_json},"valueBoolean":{"true" if checked else "false"}}}')
+                elif compiled.kind == "float":
+                    components.append(f'{compiled.code_json},"valueString":{_json_str(checked)}}}')
+                else:
+                    components.append(f'{compiled.code_json},"valueInteger":{checked}}}')
+        content = self._content(id, identifier, component_values, subject, focus, derived_from, body_site)
+        ident = self._identifier(identifier, content)
+        parts = [
+            '{"resourceType":"Observation","id":',
+            _json_str(id or self.generate_id(content)),
+            ',"identifier":[{"system":',
+            _json_str(ident.system),
+            ',"value":',
+            _json_str(ident.value),
+            '}],"code":',
+            self._set_code_json,
+            ',"status":"',
+            status,
+            '"',
+        ]
+        if subject:
+            parts += (',"subject":', _REFERENCE_ADAPTER.dump_json(subject, exclude_none=True).decode())
+        if focus:
+            parts += (',"focus":', _FOCUS_ADAPTER.dump_json(focus, exclude_none=True).decode())
+        if body_site:
+            parts += (
+                ',"bodySite":',
+                _CODEABLE_CONCEPT_ADAPTER.dump_json(body_site, by_alias=True, exclude_none=True).decode(),
+            )
+        if derived_from:
+            parts += (',"derivedFrom":', _REFERENCE_LIST_ADAPTER.dump_json(derived_from, exclude_none=True).decode())
+        parts += (',"component":[', ",".join(components), "]}")
+        return "".join(parts).encode()
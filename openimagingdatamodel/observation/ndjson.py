@@ -0,0 +1,289 @@
+"""Streaming FHIR Bulk Data NDJSON export and import of Observations."""
+
+from __future__ import annotations
+
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, TYPE_CHECKING, Any, Callable, Collection, Final, Iterable, Iterator, TypeVar
+
+from pydantic import TypeAdapter
+from pydantic_core import from_json
+
+from openimagingdatamodel.quarantine import BulkLoader, QuarantineWriter, RawRecord, iter_ndjson_lines
+
+from .observation import Observation
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+    from openimagingdatamodel.cde_set.set import CDESet
+
+    from .encoder import ObservationEncoder
+    from .observation_factory import ComponentValueMap
+
+DEFAULT_BUFFER_SIZE: Final[int] = 1 << 20
+DEFAULT_COMPRESS_LEVEL: Final[int] = 6
+
+T = TypeVar("T")
+
+
+class NDJSONWriter:
+    """Write Observations as NDJSON (one FHIR JSON resource per line) to a file or binary stream.
+
+    Lines are collected in a buffer of at most `buffer_size` bytes and written in chunks, so memory use
+    stays bounded regardless of how many records are written. Output is gzip-compressed if `compress`
+    is set, or by default when writing to a path ending in `.gz`. A stream passed in is left open.
+    """
+
+    def __init__(
+        self,
+        target: str | os.PathLike[str] | IO[bytes],
+        /,
+        compress: bool | None = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        compress_level: int = DEFAULT_COMPRESS_LEVEL,
+    ) -> None:
+        if isinstance(target, (str, os.PathLike)):
+            if compress is None:
+                compress = os.fspath(target).endswith(".gz")
+            self._file: IO[bytes] = open(target, "wb")  # noqa: SIM115
+            self._owns_file = True
+        else:
+            self._file = target
+            self._owns_file = False
+        self._stream: IO[bytes] = (
+            gzip.GzipFile(fileobj=self._file, mode="wb", compresslevel=compress_level) if compress else self._file
+        )
+        self.buffer_size = buffer_size
+        self._buffer: list[bytes] = []
+        self._buffered = 0
+        self._encoders: dict[str, ObservationEncoder] = {}
+        self.count = 0
+        self.bytes_written = 0
+        self.closed = False
+
+    def _append(self, line: bytes) -> None:
+        self._buffer.append(line)
+        self._buffer.append(b"\n")
+        self._buffered += len(line) + 1
+        self.count += 1
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def write(self, observation: Observation) -> None:
+        """Write one Observation."""
+        self._append(observation.__pydantic_serializer__.to_json(observation, by_alias=True, exclude_none=True))
+
+    def write_many(self, observations: Iterable[Observation]) -> int:
+        """Write Observations from an iterable, returning how many were written."""
+        start = self.count
+        for observation in observations:
+            self.write(observation)
+        return self.count - start
+
+    def encoder_for(self, cde_set: CDESet) -> ObservationEncoder:
+        """Get the (cached) encoder for a CDESet."""
+        # Imported here so that reading NDJSON doesn't import the factories
+        from .encoder import ObservationEncoder
+
+        encoder = self._encoders.get(cde_set.id)
+        if encoder is None or encoder.cde_set is not cde_set:
+            encoder = self._encoders[cde_set.id] = ObservationEncoder(cde_set)
+        return encoder
+
+    def write_values(
+        self, cde_set: CDESet, /, component_values: ComponentValueMap | None = None, **kwargs: Any
+    ) -> None:
+        """Write an Observation given the same arguments as `ObservationFactory.create_observation`,
+        without building the model."""
+        self._append(self.encoder_for(cde_set).encode_json(component_values, **kwargs))
+
+    def flush(self) -> None:
+        """Write out any buffered lines."""
+        if self._buffer:
+            chunk = b"".join(self._buffer)
+            self._stream.write(chunk)
+            self.bytes_written += len(chunk)
+            self._buffer.clear()
+            self._buffered = 0
+
+    def close(self) -> None:
+        """Flush, finish any compression, and close the file if this writer opened it."""
+        if self.closed:
+            return
+        self.flush()
+        if self._stream is not self._file:
+            self._stream.close()
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+        self.closed = True
+
+    def __enter__(self) -> NDJSONWriter:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self.close()
+
+
+def write_observations_ndjson(
+    target: str | os.PathLike[str] | IO[bytes], observations: Iterable[Observation], /, **kwargs: Any
+) -> int:
+    """Write Observations to an NDJSON file or stream, returning how many were written."""
+    with NDJSONWriter(target, **kwargs) as writer:
+        return writer.write_many(observations)
+
+
+# Reading
+
+_FIELD_KEYS: Final[dict[str, tuple[str, ...]]] = {
+    name: (field.alias, name) if field.alias else (name,)
+    for name, field in Observation.model_fields.items()
+    if name != "resourceType"
+}
+_FIELD_NAMES: Final[dict[str, str]] = {key: name for name, keys in _FIELD_KEYS.items() for key in keys}
+_FIELD_ADAPTERS: dict[str, TypeAdapter[Any]] = {}
+
+
+def _field_adapter(name: str) -> TypeAdapter[Any]:
+    adapter = _FIELD_ADAPTERS.get(name)
+    if adapter is None:
+        adapter = _FIELD_ADAPTERS[name] = TypeAdapter(Observation.model_fields[name].annotation)
+    return adapter
+
+
+class ObservationRecord:
+    """One Observation read from NDJSON, validated a field at a time.
+
+    Attributes have the same names as on `Observation`. Fields requested when reading are validated
+    up front; any other field (including `components`) is validated the first time it is accessed.
+    Use `to_observation()` to validate the whole record into an `Observation`.
+    """
+
+    __slots__ = ("data", "offset", "_values")
+
+    def __init__(self, data: dict[str, Any], /, offset: int = 0, fields: Collection[str] = ()) -> None:
+        if data.get("resourceType", "Observation") != "Observation":
+            raise ValueError(f"Record at offset {offset} is a {data['resourceType']}, not an Observation")
+        self.data = data
+        self.offset = offset
+        self._values: dict[str, Any] = {}
+        for name in fields:
+            self._validate(name)
+
+    def _validate(self, name: str) -> Any:
+        for key in _FIELD_KEYS[name]:
+            if key in self.data:
+                value = _field_adapter(name).validate_python(self.data[key])
+                break
+        else:
+            field = Observation.model_fields[name]
+            if field.is_required():
+                raise ValueError(f"Observation at offset {self.offset} is missing required field '{name}'")
+            value = field.get_default(call_default_factory=True)
+        self._values[name] = value
+        return value
+
+    def __getattr__(self, name: str) -> Any:
+        if name not in _FIELD_KEYS:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        try:
+            return self._values[name]
+        except KeyError:
+            return self._validate(name)
+
+    def to_observation(self) -> Observation:
+        """Validate the complete record."""
+        return Observation.model_validate(self.data)
+
+
+def _resolve_fields(fields: Iterable[str] | None) -> tuple[str, ...]:
+    if fields is None:
+        return ()
+    resolved = []
+    for field in fields:
+        if field not in _FIELD_NAMES:
+            raise ValueError(f"Unknown Observation field '{field}'")
+        resolved.append(_FIELD_NAMES[field])
+    return tuple(resolved)
+
+
+def iter_observations(
+    source: str | os.PathLike[str],
+    /,
+    fields: Iterable[str] | None = ("id_", "code"),
+    byte_range: tuple[int, int] | None = None,
+) -> Iterator[ObservationRecord]:
+    """Read Observations from an NDJSON file (gzip-compressed if the name ends in `.gz`) one line at a time.
+
+    Args:
+        source: The NDJSON file to read.
+        fields: Observation fields (by name or JSON alias) to validate as each record is read; others are
+            validated when first accessed.
+        byte_range: Only read the lines that start within `[start, end)`; used to split a file into
+            shards (see `shard_byte_ranges`). Not supported for compressed files.
+    """
+    resolved = _resolve_fields(fields)
+    for offset, line in iter_ndjson_lines(os.fspath(source), byte_range):
+        yield ObservationRecord(from_json(line), offset=offset, fields=resolved)
+
+
+def load_observations(
+    source: str | os.PathLike[str],
+    /,
+    quarantine: str | os.PathLike[str] | QuarantineWriter | None = None,
+    check: Callable[[Observation], Any] | None = None,
+    byte_range: tuple[int, int] | None = None,
+    max_errors: int = 1000,
+) -> BulkLoader[Observation]:
+    """Get a loader that yields the valid Observations in an NDJSON file, fully validated.
+
+    Unlike `iter_observations`, a bad line doesn't stop the load: lines that aren't valid Observations,
+    or for which `check` raises a `ValueError` (e.g. `ObservationDecoder(cde_set).decode`, to make sure
+    the components belong to a set), are skipped, recorded with their byte offset in the loader's
+    `report` and, if `quarantine` is given, written to that NDJSON file.
+    """
+    path = os.fspath(source)
+    records = (RawRecord(path, offset, line) for offset, line in iter_ndjson_lines(path, byte_range))
+    return BulkLoader(
+        records, Observation.model_validate_json, check=check, quarantine=quarantine, max_errors=max_errors
+    )
+
+
+def shard_byte_ranges(source: str | os.PathLike[str], shards: int, /) -> list[tuple[int, int]]:
+    """Split a file into `shards` byte ranges of about the same size for `iter_observations`."""
+    if shards < 1:
+        raise ValueError("Number of shards must be at least 1")
+    size = os.path.getsize(source)
+    bounds = [size * i // shards for i in range(shards + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(shards) if bounds[i] < bounds[i + 1]]
+
+
+def _scan_shard(
+    func: Callable[[Iterator[ObservationRecord]], T], path: str, fields: tuple[str, ...], byte_range: tuple[int, int]
+) -> T:
+    return func(iter_observations(path, fields=fields, byte_range=byte_range))
+
+
+def scan_observations_parallel(
+    source: str | os.PathLike[str],
+    func: Callable[[Iterator[ObservationRecord]], T],
+    /,
+    workers: int | None = None,
+    fields: Iterable[str] | None = ("id_", "code"),
+) -> list[T]:
+    """Run `func` over shards of an NDJSON file in a process pool and return the result for each shard.
+
+    `func` receives an iterator of the shard's records and must be picklable (e.g. a module-level function).
+    """
+    workers = workers or os.cpu_count() or 1
+    path = os.fspath(source)
+    resolved = _resolve_fields(fields)
+    ranges = shard_byte_ranges(path, workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_scan_shard, func, path, resolved, byte_range) for byte_range in ranges]
+        return [future.result() for future in futures]
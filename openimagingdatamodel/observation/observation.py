@@ -1,9 +1,10 @@
-from typing import Any, Literal, Mapping, TypeAlias
+from typing import Annotated, Any, Literal, Mapping, TypeAlias
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Discriminator, Field, Tag, model_validator
 
 
 class Identifier(BaseModel):
+    model_config = ConfigDict(defer_build=True)
     system: str  # TODO: Use URI type
     value: str
     # Can add type (CodeableConcept), use (Code), period (Period), assigner (Reference)
@@ -13,7 +14,7 @@ class Coding(BaseModel):
     """Coding with system and code.
     Note that the FHIR spec has all fields optional, but we require system and code."""
 
-    model_config = ConfigDict(populate_by_name=True)
+    model_config = ConfigDict(defer_build=True, populate_by_name=True)
     system: str  # TODO: Use URI type
     code: str
     version: str | None = None
@@ -22,18 +23,103 @@ class Coding(BaseModel):
 
 
 class CodeableConcept(BaseModel):
-    model_config = ConfigDict(populate_by_name=True)
+    model_config = ConfigDict(defer_build=True, populate_by_name=True)
     codings: list[Coding] = Field(alias="coding", min_length=1)
     text: str | None = None
 
 
+class _ImmutableList(list):
+    """A list that can't be changed, holding the codings of a shared CodeableConcept."""
+
+    def _immutable(self, *args: Any, **kwargs: Any) -> Any:
+        raise TypeError("Codings of a shared CodeableConcept can't be changed")
+
+    append = extend = insert = remove = pop = clear = sort = reverse = _immutable
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+
+    def __reduce_ex__(self, protocol: Any) -> tuple[Any, ...]:
+        return (type(self), (list(self),))
+
+    def __copy__(self) -> "_ImmutableList":
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "_ImmutableList":
+        return self
+
+
+class FrozenCoding(Coding):
+    """An immutable Coding that can be shared between Observations; equal to a Coding with the same fields."""
+
+    model_config = ConfigDict(populate_by_name=True, frozen=True)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Coding):
+            return self.__dict__ == other.__dict__
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(tuple(self.__dict__.values()))
+
+    def __copy__(self) -> "FrozenCoding":
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "FrozenCoding":
+        return self
+
+    def thaw(self) -> Coding:
+        """Get a mutable Coding with the same fields."""
+        return Coding(**self.__dict__)
+
+    def model_copy(self, *, update: Mapping[str, Any] | None = None, deep: bool = False) -> Coding:  # type: ignore[override]
+        """Copying returns this instance; copying with an `update` returns a new, mutable Coding."""
+        return self.thaw().model_copy(update=update) if update else self
+
+
+class FrozenCodeableConcept(CodeableConcept):
+    """An immutable CodeableConcept that can be shared between Observations.
+
+    Equal to a CodeableConcept with the same codings and text, and serialized the same way. Copying
+    (including deep copies of the Observations that hold it) returns the same instance, except that
+    `model_copy` with an `update` returns a new, mutable CodeableConcept.
+    """
+
+    model_config = ConfigDict(populate_by_name=True, frozen=True)
+    codings: list[FrozenCoding] = Field(alias="coding", min_length=1)  # type: ignore[assignment]
+
+    @model_validator(mode="after")
+    def _freeze_codings(self) -> "FrozenCodeableConcept":
+        object.__setattr__(self, "codings", _ImmutableList(self.codings))
+        return self
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CodeableConcept):
+            return self.text == other.text and list(self.codings) == list(other.codings)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((tuple(self.codings), self.text))
+
+    def __copy__(self) -> "FrozenCodeableConcept":
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "FrozenCodeableConcept":
+        return self
+
+    def thaw(self) -> CodeableConcept:
+        """Get a mutable CodeableConcept with mutable copies of the codings."""
+        return CodeableConcept(codings=[coding.thaw() for coding in self.codings], text=self.text)
+
+    def model_copy(self, *, update: Mapping[str, Any] | None = None, deep: bool = False) -> CodeableConcept:  # type: ignore[override]
+        return self.thaw().model_copy(update=update) if update else self
+
+
 StatusValue = Literal[
     "registered", "preliminary", "final", "amended", "corrected", "cancelled", "entered-in-error", "unknown"
 ]
 
 
 class Reference(BaseModel):
-    model_config = ConfigDict(populate_by_name=True)
+    model_config = ConfigDict(defer_build=True, populate_by_name=True)
     reference: str
     type: str | None = None  # TODO: Use URI type and limit to the FHIR reference types
     identifier: Identifier | None = None
@@ -41,31 +127,69 @@ class Reference(BaseModel):
 
 
 class CodeableConceptComponent(BaseModel):
-    model_config = ConfigDict(populate_by_name=True)
+    model_config = ConfigDict(defer_build=True, populate_by_name=True)
     code: CodeableConcept
     value_codeable_concept: CodeableConcept = Field(alias="valueCodeableConcept")
 
 
 class StringComponent(BaseModel):
-    model_config = ConfigDict(populate_by_name=True)
+    model_config = ConfigDict(defer_build=True, populate_by_name=True)
     code: CodeableConcept
     value_string: str = Field(alias="valueString")
 
 
 class IntegerComponent(BaseModel):
-    model_config = ConfigDict(populate_by_name=True)
+    model_config = ConfigDict(defer_build=True, populate_by_name=True)
     code: CodeableConcept
     value_integer: int = Field(alias="valueInteger")
 
 
 class BooleanComponent(BaseModel):
-    model_config = ConfigDict(populate_by_name=True)
+    model_config = ConfigDict(defer_build=True, populate_by_name=True)
     code: CodeableConcept
     value_boolean: bool = Field(alias="valueBoolean")
 
 
+_COMPONENT_TAGS: dict[str, str] = {
+    "valueCodeableConcept": "codeable_concept",
+    "value_codeable_concept": "codeable_concept",
+    "valueString": "string",
+    "value_string": "string",
+    "valueInteger": "integer",
+    "value_integer": "integer",
+    "valueBoolean": "boolean",
+    "value_boolean": "boolean",
+}
+_COMPONENT_CLASS_TAGS: dict[type[BaseModel], str] = {
+    CodeableConceptComponent: "codeable_concept",
+    StringComponent: "string",
+    IntegerComponent: "integer",
+    BooleanComponent: "boolean",
+}
+
+
+def component_tag(value: Any) -> str | None:
+    """Pick the Component type from its `value*` key (by alias or field name), so validation goes straight to
+    the right union member instead of trying them in turn."""
+    if isinstance(value, dict):
+        for key in value:
+            if (tag := _COMPONENT_TAGS.get(key)) is not None:
+                return tag
+        return None
+    for cls, tag in _COMPONENT_CLASS_TAGS.items():
+        if isinstance(value, cls):
+            return tag
+    return None
+
+
 # This is a union of all possible component types
-Component: TypeAlias = CodeableConceptComponent | StringComponent | IntegerComponent | BooleanComponent
+Component: TypeAlias = Annotated[
+    Annotated[CodeableConceptComponent, Tag("codeable_concept")]
+    | Annotated[StringComponent, Tag("string")]
+    | Annotated[IntegerComponent, Tag("integer")]
+    | Annotated[BooleanComponent, Tag("boolean")],
+    Discriminator(component_tag),
+]
 
 
 class Observation(BaseModel):
@@ -73,7 +197,7 @@ class Observation(BaseModel):
     The Observation class is the model for FHIR Observation objects
     """
 
-    model_config = ConfigDict(populate_by_name=True)
+    model_config = ConfigDict(defer_build=True, populate_by_name=True)
 
     resourceType: Literal["Observation"] = "Observation"
     id_: str = Field(alias="id")
@@ -93,5 +217,8 @@ class Observation(BaseModel):
     def add_coding(self, coding: Coding) -> None:
         if self.code is None:
             self.code = CodeableConcept(coding=[coding])
+        elif isinstance(self.code, FrozenCodeableConcept):
+            # The code is shared with other Observations, so give this one its own copy to change
+            self.code = CodeableConcept(coding=[*self.code.codings, coding], text=self.code.text)
         else:
             self.code.codings.append(coding)
@@ -1,10 +1,10 @@
-import uuid
-from typing import Any, Final, Mapping, TypeAlias
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Final, Iterable, Iterator, Mapping, TypeAlias
 
 from caseswitcher import to_snake
-from nanoid import generate as generate_nanoid
 
-from openimagingdatamodel import CDESet
 from openimagingdatamodel.cde_set.element import (
     BooleanElement,
     CDEElement,  # noqa: TCH001
@@ -13,6 +13,8 @@ from openimagingdatamodel.cde_set.element import (
     ValueSetElement,
     ValueSetValue,
 )
+from openimagingdatamodel.cde_set.set import CDESet
+from openimagingdatamodel.id_allocator import EntropyIdAllocator, IdAllocator
 
 from .observation import (
     BooleanComponent,
@@ -20,6 +22,8 @@ from .observation import (
     CodeableConceptComponent,
     Coding,
     Component,
+    FrozenCodeableConcept,
+    FrozenCoding,
     Identifier,
     IntegerComponent,
     Observation,
@@ -32,18 +36,58 @@ ComponentValue: TypeAlias = str | int | float | bool
 ComponentValueMap: TypeAlias = Mapping[str, ComponentValue]
 
 
+class SharedCodes:
+    """Immutable CodeableConcepts for the set, element and value codes of one CDESet, created once and
+    shared by every Observation built from the set with `shared_codes=True`.
+
+    Concepts are keyed by code and display, so edits to the set are picked up rather than served stale.
+    """
+
+    __slots__ = ("system", "_concepts")
+
+    def __init__(self, system: str) -> None:
+        self.system = system
+        self._concepts: dict[tuple[str, str], FrozenCodeableConcept] = {}
+
+    def __len__(self) -> int:
+        return len(self._concepts)
+
+    def concept(self, code: str, display: str) -> FrozenCodeableConcept:
+        concept = self._concepts.get((code, display))
+        if concept is None:
+            coding = FrozenCoding(system=self.system, code=code, display=display)
+            concept = self._concepts.setdefault((code, display), FrozenCodeableConcept(coding=[coding]))
+        return concept
+
+    def set_code(self, cde_set: CDESet) -> FrozenCodeableConcept:
+        return self.concept(cde_set.id, cde_set.name)
+
+    def element_code(self, element: CDEElement) -> FrozenCodeableConcept:
+        return self.concept(element.id, element.name)
+
+    def value_code(self, value: ValueSetValue) -> FrozenCodeableConcept:
+        return self.concept(value.code, value.name)
+
+
+_shared_codes: OrderedDict[tuple[str, str], SharedCodes] = OrderedDict()
+_shared_codes_lock = threading.Lock()
+
+
 class ObservationFactory:
+    # Makes Observation IDs and identifier UIDs; see `openimagingdatamodel.id_allocator`
+    id_allocator: IdAllocator = EntropyIdAllocator()
+
     @classmethod
-    def generate_observation_id(cls, cde_set: CDESet) -> str:
-        """Create a unique observation ID."""
+    def generate_observation_id(cls, cde_set: CDESet, content: bytes | None = None) -> str:
+        """Create a unique observation ID (from `content`, if the ID allocator is deterministic)."""
         finding_name = to_snake(cde_set.name)
-        return f"{finding_name}_{generate_nanoid(size=10)}"
+        return cls.id_allocator.observation_id(finding_name, content)
 
     DEFAULT_IDENTIFIER_SYSTEM: Final[str] = "urn:dicom:uid"
 
     @classmethod
     def generate_observation_identifier(
-        cls, identifier: str | None = None, system: str = DEFAULT_IDENTIFIER_SYSTEM
+        cls, identifier: str | None = None, system: str = DEFAULT_IDENTIFIER_SYSTEM, content: bytes | None = None
     ) -> Identifier:
         """Create a unique observation identifier.
 
@@ -57,27 +101,91 @@ class ObservationFactory:
         UUID as an integer, and may thus be up to 39 digits long (leading zeros must be suppressed).
         """
 
-        identifier = identifier or "urn:oid:2.25." + str(uuid.uuid4().int)
+        identifier = identifier or "urn:oid:" + cls.id_allocator.dicom_uid(content)
         return Identifier(system=system, value=identifier)
 
+    @classmethod
+    def content_key(
+        cls,
+        cde_set: CDESet,
+        /,
+        component_values: ComponentValueMap | None = None,
+        subject: Reference | None = None,
+        focus: list[Mapping[str, Any]] | None = None,
+        derived_from: list[Reference] | None = None,
+        body_site: CodeableConcept | None = None,
+    ) -> bytes:
+        """Encode what an Observation says, canonically, for deterministic ID allocators to hash.
+
+        Elements are keyed by ID whether they were given by name or ID, so the same finding gives the
+        same key however it was written.
+        """
+        content = {
+            "set": cde_set.id,
+            "components": {cde_set.get_element(k).id: v for k, v in (component_values or {}).items()},
+            "subject": subject.model_dump(mode="json", exclude_none=True) if subject else None,
+            "focus": focus or None,
+            "derived_from": [r.model_dump(mode="json", exclude_none=True) for r in derived_from or ()] or None,
+            "body_site": body_site.model_dump(mode="json", exclude_none=True) if body_site else None,
+        }
+        return json.dumps(content, sort_keys=True, separators=(",", ":"), default=str).encode()
+
     RADELEMENT_URL: Final[str] = "https://www.radelement.org"
 
+    SHARED_CODES_CACHE_SIZE: Final[int] = 256
+
+    @classmethod
+    def shared_codes(cls, cde_set: CDESet, /, system: str | None = None) -> SharedCodes:
+        """Get the SharedCodes for a CDESet (and code system, by default `RADELEMENT_URL`) from a cache
+        holding the most recently used `SHARED_CODES_CACHE_SIZE` sets."""
+        system = system or cls.RADELEMENT_URL
+        key = (cde_set.id, system)
+        with _shared_codes_lock:
+            codes = _shared_codes.get(key)
+            if codes is None:
+                codes = _shared_codes[key] = SharedCodes(system)
+                while len(_shared_codes) > cls.SHARED_CODES_CACHE_SIZE:
+                    _shared_codes.popitem(last=False)
+            else:
+                _shared_codes.move_to_end(key)
+        return codes
+
+    @classmethod
+    def shared_codes_info(cls) -> dict[str, int]:
+        """Report how many sets have shared codes cached, and how many concepts they hold."""
+        with _shared_codes_lock:
+            concepts = sum(len(codes) for codes in _shared_codes.values())
+            return {"sets": len(_shared_codes), "concepts": concepts, "maxsize": cls.SHARED_CODES_CACHE_SIZE}
+
     @classmethod
-    def create_cde_set_code(cls, cde_set: CDESet) -> CodeableConcept:
+    def clear_shared_codes(cls) -> None:
+        with _shared_codes_lock:
+            _shared_codes.clear()
+
+    @classmethod
+    def create_cde_set_code(cls, cde_set: CDESet, codes: SharedCodes | None = None) -> CodeableConcept:
         """Use a CDESet to create a Code for the `code` element of an Observation."""
+        if codes is not None:
+            return codes.set_code(cde_set)
         coding = Coding(system=cls.RADELEMENT_URL, code=cde_set.id, display=cde_set.name)
         return CodeableConcept(coding=[coding])
 
     @classmethod
-    def element_to_code(cls, element) -> CodeableConcept:
+    def element_to_code(cls, element, codes: SharedCodes | None = None) -> CodeableConcept:
         """Convert a CDEElement to a CodeableConceptComponent."""
+        if codes is not None:
+            return codes.element_code(element)
         coding = Coding(system=cls.RADELEMENT_URL, code=element.id, display=element.name)
         return CodeableConcept(coding=[coding])
 
     @classmethod
-    def wrap_value_set_value(cls, element: ValueSetElement, value: str) -> CodeableConcept:
+    def wrap_value_set_value(
+        cls, element: ValueSetElement, value: str, codes: SharedCodes | None = None
+    ) -> CodeableConcept:
         """Wrap a ValueSetElement value in a CodeableConceptComponent."""
         el_value: ValueSetValue = element.get_value(value)
+        if codes is not None:
+            return codes.value_code(el_value)
         out_value = CodeableConcept.model_validate({
             "codings": [
                 {
@@ -90,13 +198,15 @@ class ObservationFactory:
         return out_value
 
     @classmethod
-    def create_component(cls, element: CDEElement, value: ComponentValue) -> Component:
+    def create_component(
+        cls, element: CDEElement, value: ComponentValue, codes: SharedCodes | None = None
+    ) -> Component:
         """Create an appropriate Component object from a CDEElement and a value."""
-        code = cls.element_to_code(element)
+        code = cls.element_to_code(element, codes)
         if isinstance(element, ValueSetElement):
             if not isinstance(value, str):
                 raise ValueError(f"Value must be a string for ValueSetElement {element.id}")
-            value_codeable_concept: CodeableConcept = cls.wrap_value_set_value(element, value)
+            value_codeable_concept: CodeableConcept = cls.wrap_value_set_value(element, value, codes)
             return CodeableConceptComponent(code=code, value_codeable_concept=value_codeable_concept)  # type: ignore
         if isinstance(element, BooleanElement):
             if not isinstance(value, (bool, float, int)):
@@ -128,6 +238,7 @@ class ObservationFactory:
         derived_from: list[Reference] | None = None,
         body_site: CodeableConcept | None = None,
         component_values: ComponentValueMap | None = None,
+        shared_codes: bool = False,
     ) -> Observation:
         """Create an Observation object from a CDESet and other parameters.
 
@@ -141,11 +252,17 @@ class ObservationFactory:
             derived_from: The derived_from of the observation.
             body_site: The body_site of the observation.
             component_values: A mapping of CDE names or IDs to values.
+            shared_codes: Use the immutable set, element and value codes shared by all Observations of the
+                set (see `SharedCodes`) instead of new ones; saves memory when many Observations are kept.
         """
-        id = id or cls.generate_observation_id(cde_set)
+        content = None
+        if cls.id_allocator.deterministic and not (id and identifier):
+            content = cls.content_key(cde_set, component_values, subject, focus, derived_from, body_site)
+        id = id or cls.generate_observation_id(cde_set, content)
         if not isinstance(identifier, Identifier):
-            identifier = cls.generate_observation_identifier(identifier)
-        code: CodeableConcept = cls.create_cde_set_code(cde_set)
+            identifier = cls.generate_observation_identifier(identifier, content=content)
+        codes = cls.shared_codes(cde_set) if shared_codes else None
+        code: CodeableConcept = cls.create_cde_set_code(cde_set, codes)
         other_kwargs: dict[str, Any] = {}
         if subject:
             other_kwargs["subject"] = subject
@@ -157,7 +274,50 @@ class ObservationFactory:
             other_kwargs["body_site"] = body_site
         if component_values:
             components = [
-                cls.create_component(cde_set.get_element(el_name), value) for el_name, value in component_values.items()
+                cls.create_component(cde_set.get_element(el_name), value, codes)
+                for el_name, value in component_values.items()
             ]
             other_kwargs["components"] = components
         return Observation(id=id, identifiers=[identifier], code=code, status=status, **other_kwargs)  # type: ignore
+
+    @classmethod
+    def create_observations(
+        cls,
+        cde_set: CDESet,
+        rows: Iterable[ComponentValueMap],
+        /,
+        status: StatusValue = DEFAULT_STATUS,
+        subject: Reference | None = None,
+        focus: list[Mapping[str, Any]] | None = None,
+        derived_from: list[Reference] | None = None,
+        body_site: CodeableConcept | None = None,
+        shared_codes: bool = False,
+    ) -> Iterator[Observation]:
+        """Lazily create one Observation per row of component values, all for the same CDESet.
+
+        Equivalent to calling `create_observation` for each row with the same keyword arguments (IDs and
+        identifiers are always generated), but element lookups and the codes for elements and values are
+        worked out once per batch by an `ObservationEncoder` instead of once per observation.
+
+        Args:
+            cde_set: The CDESet object to use for the code element.
+            rows: An iterable of mappings of CDE names or IDs to values; consumed as the result is iterated.
+            status: The status of the observations (defaults to "preliminary").
+            subject: The subject of the observations.
+            focus: The focus of the observations.
+            derived_from: The derived_from of the observations.
+            body_site: The body_site of the observations.
+            shared_codes: Use the immutable codes shared by all Observations of the set (see `SharedCodes`).
+        """
+        from .encoder import ObservationEncoder
+
+        encoder = ObservationEncoder(cde_set, system=cls.RADELEMENT_URL, shared_codes=shared_codes)
+        for component_values in rows:
+            yield encoder.encode(
+                component_values,
+                status=status,
+                subject=subject,
+                focus=focus,
+                derived_from=derived_from,
+                body_site=body_site,
+            )
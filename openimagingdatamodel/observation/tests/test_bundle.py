@@ -0,0 +1,128 @@
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from openimagingdatamodel.cde_set.set_factory import SetFactory
+from openimagingdatamodel.observation.bundle import BundlePoster, BundleWriter, write_observations_bundles
+from openimagingdatamodel.observation.observation import Observation
+from openimagingdatamodel.observation.observation_factory import ObservationFactory
+
+
+@pytest.fixture
+def observations() -> list[Observation]:
+    cde_set = SetFactory.create_set("example finding", add_presence_element=True)
+    cde_set.elements.append(SetFactory.create_float_element("size", unit="mm"))
+    rows = [{"Presence of example finding": "present", "size": float(i)} for i in range(25)]
+    return list(ObservationFactory.create_observations(cde_set, rows))
+
+
+def resources(bundle: dict) -> list[Observation]:
+    return [Observation.model_validate(entry["resource"]) for entry in bundle["entry"]]
+
+
+def test_chunks_by_entries(tmp_path: Path, observations: list[Observation]):
+    assert write_observations_bundles(tmp_path / "out", observations, max_entries=10) == 25
+    bundles = [json.loads(path.read_bytes()) for path in sorted((tmp_path / "out").iterdir())]
+    assert [len(bundle["entry"]) for bundle in bundles] == [10, 10, 5]
+    assert [o for bundle in bundles for o in resources(bundle)] == observations
+    entry = bundles[0]["entry"][0]
+    assert bundles[0]["resourceType"] == "Bundle" and bundles[0]["type"] == "transaction"
+    assert entry["request"] == {"method": "PUT", "url": f"Observation/{observations[0].id_}"}
+    assert entry["fullUrl"].startswith("urn:uuid:")
+
+
+def test_chunks_by_bytes(observations: list[Observation]):
+    stream = io.BytesIO()
+    with BundleWriter(stream, bundle_type="batch", method="POST", max_bytes=4000, base_url="http://fhir/") as writer:
+        writer.write_many(observations)
+    lines = stream.getvalue().splitlines()
+    assert writer.bundles == len(lines) > 1 and writer.count == 25
+    assert all(len(line) <= 4000 for line in lines)
+    bundles = [json.loads(line) for line in lines]
+    assert [o for bundle in bundles for o in resources(bundle)] == observations
+    entry = bundles[0]["entry"][0]
+    assert entry["request"] == {"method": "POST", "url": "Observation"}
+    assert entry["fullUrl"] == f"http://fhir/Observation/{observations[0].id_}"
+
+
+def test_error_drops_unsent_entries(observations: list[Observation]):
+    stream = io.BytesIO()
+    with pytest.raises(KeyError), BundleWriter(stream, max_entries=10) as writer:
+        writer.write_many(observations[:15])
+        raise KeyError("stop")
+    assert stream.getvalue().count(b"\n") == 1 and writer.bundles == 1
+    assert writer.closed
+
+
+class FHIRHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.received.append((self.client_address, json.loads(body)))  # type: ignore[attr-defined]
+        if self.path == "/drop":
+            # Hang up without answering, as if the server died partway through
+            self.close_connection = True
+            return
+        # Answer, then close the connection without telling the client, as after a keep-alive timeout
+        self.close_connection = self.path == "/close"
+        status = 400 if self.path == "/bad" else 200
+        response = b'{"resourceType":"Bundle","type":"transaction-response"}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/fhir+json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FHIRHandler)
+    server.received = []  # type: ignore[attr-defined]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_post_reuses_connection(server: ThreadingHTTPServer, observations: list[Observation]):
+    url = f"http://127.0.0.1:{server.server_port}/fhir"
+    with BundlePoster(url) as poster:
+        write_observations_bundles(poster, observations, max_entries=5)
+        assert poster.requests == 5 and poster.connections == 1
+    received = server.received  # type: ignore[attr-defined]
+    assert len({address for address, _ in received}) == 1
+    assert [o for _, bundle in received for o in resources(bundle)] == observations
+
+    poster = BundlePoster(f"http://127.0.0.1:{server.server_port}/bad")
+    with poster, pytest.raises(ValueError, match="returned 400"):
+        poster(b"{}")
+
+
+def test_post_reconnects_after_server_closes(server: ThreadingHTTPServer):
+    with BundlePoster(f"http://127.0.0.1:{server.server_port}/close") as poster:
+        for _ in range(3):
+            poster(b"{}")
+            time.sleep(0.1)  # Give the server time to close its end
+        assert poster.requests == 3 and poster.connections == 3
+    assert len(server.received) == 3  # type: ignore[attr-defined]
+
+
+@pytest.mark.parametrize("idempotent", [False, True])
+def test_post_is_only_resent_when_safe(server: ThreadingHTTPServer, idempotent: bool):
+    with (
+        BundlePoster(f"http://127.0.0.1:{server.server_port}/drop", idempotent=idempotent) as poster,
+        pytest.raises(ConnectionError),
+    ):
+        poster(b"{}")
+    # A transaction the server may have acted on is only sent again if doing so is harmless
+    assert len(server.received) == (2 if idempotent else 1)  # type: ignore[attr-defined]
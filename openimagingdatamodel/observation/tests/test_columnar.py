@@ -0,0 +1,87 @@
+from pathlib import Path
+
+import pytest
+from openimagingdatamodel.cde_set.set import CDESet
+from openimagingdatamodel.observation.columnar import ObservationStore
+from openimagingdatamodel.observation.ndjson import write_observations_ndjson
+from openimagingdatamodel.observation.observation import Observation, Reference
+from openimagingdatamodel.observation.observation_factory import ObservationFactory
+
+ROWS = [
+    ("Patient/1", {"Location": "left upper lobe", "Size": 12.5, "Composition": "solid"}),
+    ("Patient/1", {"Location": "left lower lobe", "Size": 4.0, "Composition": "part-solid"}),
+    ("Patient/2", {"Location": "left upper lobe", "Size": 8.0, "Composition": "solid"}),
+    ("Patient/2", {"Location": "right upper lobe", "Composition": "ground glass"}),
+    (None, {"Size": 20.0}),
+]
+
+
+@pytest.fixture
+def observations(pulmonary_nodule: CDESet) -> list[Observation]:
+    return [
+        ObservationFactory.create_observation(
+            pulmonary_nodule,
+            id=f"obs{i}",
+            subject=Reference(reference=subject) if subject else None,
+            status="final" if i % 2 else "preliminary",
+            component_values=values,
+        )
+        for i, (subject, values) in enumerate(ROWS)
+    ]
+
+
+@pytest.fixture
+def store(observations: list[Observation]) -> ObservationStore:
+    return ObservationStore(observations)
+
+
+def test_filter(store: ObservationStore):
+    assert store.filter("Patient/1", values={"RDE1304": "RDE1304.2"}).tolist() == [0]
+    assert store.filter(values={"RDE1304": ["RDE1304.2", "RDE1304.6"]}).tolist() == [0, 2, 3]
+    assert store.filter(values={"RDE1302": (5, 20)}).tolist() == [0, 2, 4]
+    assert store.filter(values={"RDE1302": 4}).tolist() == [1]
+    assert store.count(["Patient/2", "Patient/9"], status="final") == 1
+    assert store.count(set_code="RDES195") == 5
+    assert store.count(values={"RDE1304": "RDE1304.99"}) == 0
+    assert store.count(values={"RDE9999": "anything"}) == 0
+    assert store.count() == 5
+    with pytest.raises(ValueError, match="holds numbers"):
+        store.filter(values={"RDE1302": "RDE1302.0"})
+
+
+def test_group_by(store: ObservationStore):
+    assert store.group_by("subject") == {"Patient/1": 2, "Patient/2": 2}
+    assert store.group_by("status") == {"preliminary": 3, "final": 2}
+    assert store.group_by("RDE1301") == {"RDE1301.0": 2, "RDE1301.2": 1, "RDE1301.1": 1}
+    solid = store.filter(values={"RDE1301": "RDE1301.0"})
+    assert store.group_by("RDE1304", rows=solid) == {"RDE1304.2": 2}
+    with pytest.raises(ValueError, match="only category components"):
+        store.group_by("RDE1302")
+
+
+def test_rows_and_columns(store: ObservationStore):
+    assert store.ids(store.filter("Patient/2")) == ["obs2", "obs3"]
+    assert store.row_of("obs3") == 3
+    with pytest.raises(ValueError, match="not found in store"):
+        store.row_of("missing")
+    assert store.column("RDE1302", rows=[0, 3]).tolist()[0] == 12.5
+    assert store.column("RDE1304").tolist() == ["RDE1304.2", "RDE1304.4", "RDE1304.2", "RDE1304.6", None]
+
+
+def test_indexes_follow_new_rows(store: ObservationStore, observations: list[Observation]):
+    assert store.count("Patient/1") == 2
+    observation = observations[0].model_copy(update={"id_": "obs5"})
+    store.add(observation)
+    assert store.count("Patient/1") == 3
+    assert store.row_of("obs5") == 5
+    assert store.filter(values={"RDE1302": (12, 13)}).tolist() == [0, 5]
+
+
+def test_add_ndjson(tmp_path: Path, store: ObservationStore, observations: list[Observation]):
+    path = tmp_path / "Observation.ndjson"
+    write_observations_ndjson(path, observations)
+    loaded = ObservationStore()
+    assert loaded.add_ndjson(path) == len(observations)
+    assert loaded.info() == store.info()
+    assert loaded.group_by("RDE1304") == store.group_by("RDE1304")
+    assert loaded.filter(values={"RDE1302": (5, 20)}).tolist() == [0, 2, 4]
@@ -0,0 +1,77 @@
+import pytest
+from openimagingdatamodel import CDESet
+from openimagingdatamodel.cde_set.set_factory import SetFactory
+from openimagingdatamodel.observation.decoder import ObservationDecoder
+from openimagingdatamodel.observation.observation import Observation
+from openimagingdatamodel.observation.observation_factory import ComponentValueMap, ObservationFactory
+
+
+@pytest.fixture
+def cde_set() -> CDESet:
+    cde_set = SetFactory.create_set("example finding")
+    cde_set.elements.extend([
+        SetFactory.create_boolean_element("has feature"),
+        SetFactory.create_float_element("density", unit="HU"),
+        SetFactory.create_integer_element("count"),
+        SetFactory.create_value_set_element("severity", ["mild", "moderate", "severe"]),
+    ])
+    return cde_set
+
+
+ROWS: list[ComponentValueMap] = [
+    {"has feature": True, "density": 12.5, "count": 3, "severity": "moderate"},
+    {"severity": "mild"},
+    {"density": -4, "has feature": False},
+]
+
+
+@pytest.fixture
+def observations(cde_set: CDESet) -> list[Observation]:
+    return list(ObservationFactory.create_observations(cde_set, ROWS))
+
+
+def test_decode(cde_set: CDESet, observations: list[Observation]):
+    decoder = ObservationDecoder(cde_set)
+    assert [decoder.decode(observation) for observation in observations] == [
+        {"has feature": True, "density": 12.5, "count": 3, "severity": "moderate"},
+        {"severity": "mild"},
+        {"density": -4.0, "has feature": False},
+    ]
+    by_id = ObservationDecoder(cde_set, key="id").decode(observations[1])
+    assert by_id == {cde_set.get_element("severity").id: "mild"}
+
+
+def test_decode_unknown_element(cde_set: CDESet, observations: list[Observation]):
+    other_set = SetFactory.create_set("other finding", add_presence_element=True)
+    with pytest.raises(ValueError):
+        ObservationDecoder(other_set).decode(observations[0])
+
+
+def test_decode_columns(cde_set: CDESet, observations: list[Observation]):
+    np = pytest.importorskip("numpy")
+    columns = ObservationDecoder(cde_set).decode_columns(iter(observations))
+    assert len(columns) == 3
+    assert columns.ids == [observation.id_ for observation in observations]
+    assert columns.categories == {"severity": ["mild", "moderate", "severe"]}
+    assert columns.columns["severity"].tolist() == [1, 0, -1]
+    assert columns.present["severity"].tolist() == [True, True, False]
+    assert columns.columns["severity"].dtype == np.int32
+    np.testing.assert_array_equal(columns.columns["density"], [12.5, np.nan, -4.0])
+    assert columns.columns["count"].tolist() == [3, 0, 0]
+    assert columns.present["count"].tolist() == [True, False, False]
+    assert columns.columns["has feature"].tolist() == [True, False, False]
+    assert columns.present["has feature"].tolist() == [True, False, True]
+
+
+def test_decode_columns_to_arrow(cde_set: CDESet, observations: list[Observation]):
+    pa = pytest.importorskip("pyarrow")
+    table = ObservationDecoder(cde_set).decode_columns(iter(observations)).to_arrow()
+    assert table.num_rows == 3
+    assert table.column_names[0] == "id"
+    assert set(table.column_names[1:]) == {"has feature", "density", "count", "severity"}
+    assert pa.types.is_dictionary(table.schema.field("severity").type)
+    assert table.column("severity").to_pylist() == ["moderate", "mild", None]
+    assert table.column("density").to_pylist() == [12.5, None, -4.0]
+    assert table.column("count").to_pylist() == [3, None, None]
+    assert table.column("has feature").to_pylist() == [True, None, False]
+    assert table.column("id").to_pylist() == [observation.id_ for observation in observations]
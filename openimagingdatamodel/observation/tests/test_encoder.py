@@ -0,0 +1,100 @@
+import pytest
+from openimagingdatamodel import CDESet
+from openimagingdatamodel.cde_set.set_factory import SetFactory
+from openimagingdatamodel.id_allocator import DeterministicIdAllocator
+from openimagingdatamodel.observation.encoder import ObservationEncoder
+from openimagingdatamodel.observation.observation import CodeableConcept, Identifier, Observation, Reference
+from openimagingdatamodel.observation.observation_factory import ComponentValueMap, ObservationFactory
+
+
+@pytest.fixture
+def cde_set() -> CDESet:
+    cde_set = SetFactory.create_set('example "quoted" finding', add_presence_element=True)
+    cde_set.elements.extend([
+        SetFactory.create_boolean_element("has feature"),
+        SetFactory.create_float_element("density", min=-1000, max=1000, unit="HU"),
+        SetFactory.create_integer_element("count", min=0),
+        SetFactory.create_value_set_element("severity", ["mild", "moderate", "sévère"]),
+    ])
+    return cde_set
+
+
+COMPONENT_VALUES: ComponentValueMap = {
+    "has feature": 0,
+    "density": 123,
+    "count": 3.0,
+    "severity": "SÉVÈRE",
+    'Presence of example "quoted" finding': "present",
+}
+
+
+def test_encode_json_matches_model_dump(cde_set: CDESet):
+    encoder = ObservationEncoder(cde_set)
+    kwargs = {
+        "id": "obs_1",
+        "identifier": "urn:oid:2.25.1",
+        "status": "final",
+        "subject": Reference(reference="Patient/1"),
+        "focus": [{"bodyStructure": [{"identifier": {"value": "x", "type": None}}]}],
+        "derived_from": [Reference(reference="ImagingStudy/1", display="CT chest")],
+        "body_site": CodeableConcept.model_validate({"coding": [{"system": "s", "code": "c", "userSelected": True}]}),
+    }
+    expected = ObservationFactory.create_observation(cde_set, component_values=COMPONENT_VALUES, **kwargs)
+    assert (
+        encoder.encode_json(COMPONENT_VALUES, **kwargs)
+        == expected.model_dump_json(by_alias=True, exclude_none=True).encode()
+    )
+    assert encoder.encode(COMPONENT_VALUES, **kwargs) == expected
+
+
+def test_encode_json_without_components(cde_set: CDESet):
+    identifier = Identifier(system="urn:dicom:uid", value="urn:oid:2.25.2")
+    expected = ObservationFactory.create_observation(cde_set, id="obs_2", identifier=identifier)
+    encoded = ObservationEncoder(cde_set).encode_json(id="obs_2", identifier=identifier)
+    assert encoded == expected.model_dump_json(by_alias=True, exclude_none=True).encode()
+    assert Observation.model_validate_json(encoded) == expected
+
+
+def test_generated_ids(cde_set: CDESet):
+    observation = Observation.model_validate_json(ObservationEncoder(cde_set).encode_json())
+    assert observation.id_.startswith("example_quoted_finding_")
+    assert observation.identifiers[0].value.startswith("urn:oid:2.25.")
+
+
+@pytest.mark.parametrize(
+    "component_values",
+    [{"severity": "extreme"}, {"severity": 1}, {"has feature": "yes"}, {"count": "many"}, {"unknown": 1}],
+)
+def test_invalid_values_are_rejected(cde_set: CDESet, component_values: ComponentValueMap):
+    encoder = ObservationEncoder(cde_set)
+    with pytest.raises(ValueError):
+        encoder.encode_json(component_values)
+    with pytest.raises(ValueError):
+        ObservationFactory.create_observation(cde_set, component_values=component_values)
+
+
+def test_invalid_status(cde_set: CDESet):
+    with pytest.raises(ValueError):
+        ObservationEncoder(cde_set).encode_json(status="done")  # type: ignore
+
+
+def test_deterministic_ids(cde_set: CDESet, monkeypatch):
+    monkeypatch.setattr(ObservationFactory, "id_allocator", DeterministicIdAllocator())
+    encoder = ObservationEncoder(cde_set)
+    expected = ObservationFactory.create_observation(cde_set, component_values=COMPONENT_VALUES)
+    assert encoder.encode(COMPONENT_VALUES).id_ == expected.id_
+    observation = Observation.model_validate_json(encoder.encode_json(COMPONENT_VALUES))
+    assert observation.id_ == expected.id_
+    assert observation.identifiers == expected.identifiers
+
+
+def test_encoded_codes_are_not_shared(cde_set: CDESet):
+    encoder = ObservationEncoder(cde_set)
+    first, second = encoder.encode(COMPONENT_VALUES), encoder.encode(COMPONENT_VALUES)
+    first.add_code_str("other", "s")
+    first.components[0].code.codings[0].display = "changed"
+    assert len(second.code.codings) == 1
+    assert second.components == encoder.encode(COMPONENT_VALUES).components
+    shared = ObservationEncoder(cde_set, shared_codes=True)
+    assert shared.encode(COMPONENT_VALUES).code is shared.encode().code
+    assert shared.component("severity", "mild") == encoder.component("severity", "mild")
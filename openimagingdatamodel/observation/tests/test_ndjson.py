@@ -0,0 +1,139 @@
+import gzip
+import io
+import json
+from pathlib import Path
+
+import pytest
+from openimagingdatamodel import CDESet
+from openimagingdatamodel.cde_set.set_factory import SetFactory
+from openimagingdatamodel.observation.decoder import ObservationDecoder
+from openimagingdatamodel.observation.ndjson import (
+    NDJSONWriter,
+    iter_observations,
+    load_observations,
+    scan_observations_parallel,
+    shard_byte_ranges,
+    write_observations_ndjson,
+)
+from openimagingdatamodel.observation.observation import Observation
+from openimagingdatamodel.observation.observation_factory import ObservationFactory
+
+
+@pytest.fixture
+def cde_set() -> CDESet:
+    cde_set = SetFactory.create_set("example finding", add_presence_element=True)
+    cde_set.elements.append(SetFactory.create_float_element("size", unit="mm"))
+    return cde_set
+
+
+@pytest.fixture
+def observations(cde_set: CDESet) -> list[Observation]:
+    rows = [{"Presence of example finding": "present", "size": float(i)} for i in range(25)]
+    return list(ObservationFactory.create_observations(cde_set, rows))
+
+
+def read_lines(data: bytes) -> list[Observation]:
+    return [Observation.model_validate_json(line) for line in data.splitlines()]
+
+
+def test_write_observations_to_stream(observations: list[Observation]):
+    stream = io.BytesIO()
+    count = write_observations_ndjson(stream, observations, buffer_size=256)
+    assert count == len(observations)
+    assert not stream.closed
+    assert read_lines(stream.getvalue()) == observations
+
+
+def test_gzip_by_suffix(tmp_path: Path, observations: list[Observation]):
+    path = tmp_path / "Observation.ndjson.gz"
+    write_observations_ndjson(path, observations)
+    assert read_lines(gzip.decompress(path.read_bytes())) == observations
+
+
+def test_write_values(tmp_path: Path, cde_set: CDESet):
+    path = tmp_path / "Observation.ndjson"
+    with NDJSONWriter(path) as writer:
+        writer.write_values(cde_set, {"size": 3}, id="obs_1", identifier="urn:oid:2.25.1", status="final")
+        writer.write_values(cde_set, id="obs_2", identifier="urn:oid:2.25.2")
+        assert writer.count == 2
+    expected = [
+        ObservationFactory.create_observation(
+            cde_set, id="obs_1", identifier="urn:oid:2.25.1", status="final", component_values={"size": 3}
+        ),
+        ObservationFactory.create_observation(cde_set, id="obs_2", identifier="urn:oid:2.25.2"),
+    ]
+    assert read_lines(path.read_bytes()) == expected
+    assert writer.bytes_written == path.stat().st_size
+
+
+def count_presence(records) -> int:
+    return sum(1 for record in records if record.components)
+
+
+@pytest.fixture
+def ndjson_file(tmp_path: Path, observations: list[Observation]) -> Path:
+    path = tmp_path / "Observation.ndjson"
+    write_observations_ndjson(path, observations)
+    return path
+
+
+def test_iter_observations_validates_lazily(ndjson_file: Path, observations: list[Observation]):
+    records = list(iter_observations(ndjson_file, fields=["id", "status"]))
+    assert [record.id_ for record in records] == [observation.id_ for observation in observations]
+    first = records[0]
+    assert set(first._values) == {"id_", "status"}
+    assert first.components == observations[0].components
+    assert "components" in first._values
+    assert first.subject is None
+    assert first.to_observation() == observations[0]
+
+
+def test_iter_observations_gzip(tmp_path: Path, observations: list[Observation]):
+    path = tmp_path / "Observation.ndjson.gz"
+    write_observations_ndjson(path, observations)
+    assert [record.code for record in iter_observations(path)] == [observation.code for observation in observations]
+
+
+def test_iter_observations_unknown_field(ndjson_file: Path):
+    with pytest.raises(ValueError):
+        next(iter_observations(ndjson_file, fields=["nonsense"]))
+
+
+@pytest.mark.parametrize("shards", [1, 2, 3, 7, 100])
+def test_byte_range_shards_cover_file_once(ndjson_file: Path, observations: list[Observation], shards: int):
+    ids = [
+        record.id_
+        for byte_range in shard_byte_ranges(ndjson_file, shards)
+        for record in iter_observations(ndjson_file, byte_range=byte_range)
+    ]
+    assert ids == [observation.id_ for observation in observations]
+
+
+def test_scan_observations_parallel(ndjson_file: Path, observations: list[Observation]):
+    counts = scan_observations_parallel(ndjson_file, count_presence, workers=2)
+    assert sum(counts) == len(observations)
+
+
+def test_load_observations_quarantines_bad_lines(tmp_path: Path, cde_set: CDESet, observations: list[Observation]):
+    lines = [obs.model_dump_json(by_alias=True, exclude_none=True).encode() for obs in observations[:4]]
+    other_set = SetFactory.create_set("other finding", add_presence_element=True)
+    foreign = ObservationFactory.create_observation(other_set, component_values={"Presence of other finding": "absent"})
+    lines[1] = b'{"resourceType": "Observation", "id": "bad", "status": "unheard-of"}'
+    lines.insert(3, b"{not json")
+    lines.append(foreign.model_dump_json(by_alias=True, exclude_none=True).encode())
+    path = tmp_path / "Observation.ndjson"
+    path.write_bytes(b"\n".join(lines) + b"\n")
+    quarantine = tmp_path / "quarantine.ndjson"
+
+    loader = load_observations(path, quarantine=quarantine, check=ObservationDecoder(cde_set).decode)
+    assert loader.load() == [observations[0], observations[2], observations[3]]
+    assert (loader.report.records, loader.report.loaded, loader.report.failed) == (6, 3, 3)
+    assert [(e.offset, e.path) for e in loader.report.errors] == [
+        (len(lines[0]) + 1, "status"),
+        (sum(len(line) + 1 for line in lines[:3]), ""),
+        (sum(len(line) + 1 for line in lines[:5]), ""),
+    ]
+    assert loader.report.errors[2].type == "ValueError"
+    entries = [json.loads(line) for line in quarantine.read_text().splitlines()]
+    assert [entry["record"] for entry in entries] == [lines[1].decode(), lines[3].decode(), lines[5].decode()]
+    assert entries[1]["errors"][0]["type"] == "json_invalid"
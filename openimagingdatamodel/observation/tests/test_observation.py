@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import pytest
+from openimagingdatamodel.observation.observation import (
+    BooleanComponent,
+    CodeableConceptComponent,
+    IntegerComponent,
+    Observation,
+    StringComponent,
+)
+from pydantic import ValidationError
+
+SAMPLE_OBSERVATION_FILE = Path(__file__).parents[1] / "data" / "sample_observation.json"
+CODE = {"coding": [{"system": "https://www.radelement.org", "code": "RDE1", "display": "Thing"}]}
+
+
+def test_sample_observation_round_trip():
+    observation = Observation.model_validate_json(SAMPLE_OBSERVATION_FILE.read_text())
+    assert len(observation.components) == 4
+    assert all(isinstance(component, CodeableConceptComponent) for component in observation.components)
+    dumped = observation.model_dump_json(by_alias=True, exclude_none=True)
+    assert Observation.model_validate_json(dumped) == observation
+
+
+@pytest.mark.parametrize(
+    ("component", "component_class"),
+    [
+        ({"code": CODE, "valueCodeableConcept": CODE}, CodeableConceptComponent),
+        ({"code": CODE, "value_codeable_concept": CODE}, CodeableConceptComponent),
+        ({"code": CODE, "valueString": "1.5"}, StringComponent),
+        ({"code": CODE, "value_string": "1.5"}, StringComponent),
+        ({"code": CODE, "valueInteger": 3}, IntegerComponent),
+        ({"code": CODE, "valueBoolean": False}, BooleanComponent),
+        ({"code": CODE, "value_boolean": True}, BooleanComponent),
+    ],
+)
+def test_component_discriminator(component: dict, component_class: type):
+    observation = Observation.model_validate({"id": "obs", "status": "final", "component": [component]})
+    assert type(observation.components[0]) is component_class
+    assert Observation.model_validate(observation.model_dump(by_alias=True)) == observation
+    assert Observation.model_validate(observation.model_dump()) == observation
+
+
+def test_component_instances():
+    component = IntegerComponent.model_validate({"code": CODE, "valueInteger": 3})
+    observation = Observation(id="obs", status="final", components=[component])  # type: ignore
+    assert observation.components[0] is component
+
+
+def test_component_without_value():
+    with pytest.raises(ValidationError):
+        Observation.model_validate({"id": "obs", "status": "final", "component": [{"code": CODE}]})
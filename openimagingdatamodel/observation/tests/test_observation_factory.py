@@ -7,10 +7,12 @@ from openimagingdatamodel.cde_set.element import (
     ValueSetElement,
 )
 from openimagingdatamodel.cde_set.set_factory import SetFactory
+from openimagingdatamodel.id_allocator import DeterministicIdAllocator
 from openimagingdatamodel.observation.observation import (
     BooleanComponent,
     CodeableConcept,
     CodeableConceptComponent,
+    Coding,
     Identifier,
     Observation,
 )
@@ -18,6 +20,7 @@ from openimagingdatamodel.observation.observation_factory import (
     ComponentValueMap,
     ObservationFactory,
 )
+from pydantic import ValidationError
 
 
 @pytest.fixture
@@ -112,3 +115,87 @@ class TestObservationFactory:
         assert observation.id_
         assert observation.status
         assert len(observation.components) == len(component_values)
+
+    def test_create_observations_matches_single_path(self, cde_set) -> None:
+        rows: list[ComponentValueMap] = [
+            {"has feature": True, "density": 12, "count": 3, "severity": "mild"},
+            {"severity": "Severe", "count": 1},
+        ]
+        observations = ObservationFactory.create_observations(cde_set, iter(rows), status="final")
+        for row, observation in zip(rows, observations, strict=True):
+            expected = ObservationFactory.create_observation(cde_set, status="final", component_values=row)
+            exclude = {"id_", "identifiers"}
+            assert observation.model_dump(exclude=exclude) == expected.model_dump(exclude=exclude)
+            assert observation.id_.startswith("example_finding_")
+
+    def test_create_observations_rejects_bad_value(self, cde_set) -> None:
+        observations = ObservationFactory.create_observations(cde_set, [{"severity": "extreme"}])
+        with pytest.raises(ValueError):
+            next(observations)
+
+    def test_shared_codes(self, cde_set) -> None:
+        row: ComponentValueMap = {"has feature": True, "density": 12, "severity": "mild"}
+        first, second = (
+            ObservationFactory.create_observation(
+                cde_set, id="obs", identifier="1", component_values=row, shared_codes=True
+            )
+            for _ in range(2)
+        )
+        assert first.code is second.code
+        for a, b in zip(first.components, second.components, strict=True):
+            assert a.code is b.code
+        assert first.components[2].value_codeable_concept is second.components[2].value_codeable_concept
+        plain = ObservationFactory.create_observation(cde_set, id="obs", identifier="1", component_values=row)
+        assert first == plain
+        assert first.model_dump_json() == plain.model_dump_json()
+
+        batch = list(ObservationFactory.create_observations(cde_set, [row, row], shared_codes=True))
+        assert batch[0].code is batch[1].code is first.code
+        assert batch[0].components[0].code is first.components[0].code
+
+    def test_shared_codes_are_immutable(self, cde_set) -> None:
+        observation = ObservationFactory.create_observation(cde_set, shared_codes=True)
+        shared = observation.code
+        with pytest.raises(TypeError):
+            shared.codings.append(shared.codings[0])
+        with pytest.raises(ValidationError):
+            shared.text = "changed"
+        observation.add_code_str("123", "http://snomed.info/sct")
+        assert len(observation.code.codings) == 2
+        assert len(shared.codings) == 1
+        assert ObservationFactory.create_observation(cde_set, shared_codes=True).code is shared
+
+    def test_copy_with_update_leaves_shared_codes_alone(self, cde_set) -> None:
+        first, second = (ObservationFactory.create_observation(cde_set, shared_codes=True) for _ in range(2))
+        changed = first.code.model_copy(update={"text": "changed"})
+        assert changed.text == "changed" and type(changed) is CodeableConcept
+        assert first.code.text is None and second.code.text is None
+        changed.codings.append(changed.codings[0].model_copy())
+        assert len(second.code.codings) == 1
+        coding = first.code.codings[0].model_copy(update={"display": "changed"})
+        assert coding.display == "changed" and type(coding) is Coding
+        assert second.code.codings[0].display != "changed"
+        assert first.code.model_copy() is first.code
+        assert first.model_copy(deep=True).code is first.code
+
+    def test_shared_codes_cache_is_bounded(self, cde_set, monkeypatch) -> None:
+        monkeypatch.setattr(ObservationFactory, "SHARED_CODES_CACHE_SIZE", 2)
+        ObservationFactory.clear_shared_codes()
+        codes = ObservationFactory.shared_codes(cde_set)
+        for i in range(3):
+            ObservationFactory.shared_codes(cde_set.model_copy(update={"id": f"RDES{i}"}))
+        assert ObservationFactory.shared_codes_info()["sets"] == 2
+        assert ObservationFactory.shared_codes(cde_set) is not codes
+
+    def test_deterministic_ids(self, cde_set, monkeypatch) -> None:
+        monkeypatch.setattr(ObservationFactory, "id_allocator", DeterministicIdAllocator())
+        by_name = ObservationFactory.create_observation(cde_set, component_values={"severity": "mild", "count": 2})
+        by_id = ObservationFactory.create_observation(
+            cde_set, component_values={cde_set.elements[3].id: 2, cde_set.elements[4].id: "mild"}
+        )
+        other = ObservationFactory.create_observation(cde_set, component_values={"severity": "mild", "count": 3})
+        assert by_name.id_ == by_id.id_ != other.id_
+        assert by_name.identifiers == by_id.identifiers != other.identifiers
+        assert by_name.id_.startswith("example_finding_")
+        given = ObservationFactory.create_observation(cde_set, id="obs", component_values={"count": 2})
+        assert given.id_ == "obs"
@@ -0,0 +1,88 @@
+import pytest
+from openimagingdatamodel import CDESet
+from openimagingdatamodel.cde_set.set_factory import SetFactory
+from openimagingdatamodel.observation.observation_factory import ObservationFactory
+from openimagingdatamodel.observation.validator import ComponentError, ComponentValidator
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def cde_set() -> CDESet:
+    cde_set = SetFactory.create_set("example finding", add_presence_element=True)
+    cde_set.elements.extend([
+        SetFactory.create_boolean_element("has feature"),
+        SetFactory.create_float_element("density", min=-1000, max=1000, step=0.5, unit="HU"),
+        SetFactory.create_integer_element("count", min=0, max=20),
+        SetFactory.create_value_set_element("severity", ["mild", "moderate", "severe"]),
+    ])
+    return cde_set
+
+
+ROWS = [
+    {"density": 12.5, "count": 3, "severity": "mild", "has feature": True},
+    {"density": 1200, "count": 2.5, "severity": "MODERATE"},
+    {"density": "12.25", "count": -1, "severity": "extreme", "has feature": "yes"},
+    {"density": "dense", "count": None, "severity": 3},
+    {"Presence of example finding": "present", "nonexistent": 1},
+]
+
+
+def test_validate_rows(cde_set: CDESet):
+    result = ComponentValidator(cde_set).validate(ROWS)
+    assert len(result) == 5
+    assert result.errors.tolist() == [False, True, True, True, True]
+    assert result.valid.tolist() == [True, False, False, False, False]
+    assert result.row_errors(1) == {"density": ComponentError.ABOVE_MAX, "count": ComponentError.OFF_STEP}
+    assert result.row_errors(2) == {
+        "density": ComponentError.OFF_STEP,
+        "count": ComponentError.BELOW_MIN,
+        "severity": ComponentError.NOT_IN_VALUE_SET,
+        "has feature": ComponentError.WRONG_TYPE,
+    }
+    assert result.row_errors(3) == {"density": ComponentError.WRONG_TYPE, "severity": ComponentError.WRONG_TYPE}
+    assert result.row_errors(4) == {"nonexistent": ComponentError.UNKNOWN_ELEMENT}
+    assert result.error_counts()["density"] == 3
+    assert result.codes["count"].dtype == np.uint8
+
+
+def test_valid_rows_go_through_the_factory(cde_set: CDESet):
+    result = ComponentValidator(cde_set).validate(ROWS)
+    for row, valid in zip(ROWS, result.valid, strict=True):
+        if valid:
+            ObservationFactory.create_observation(cde_set, component_values=row)
+
+
+def test_validate_columns(cde_set: CDESet):
+    validator = ComponentValidator(cde_set, key="id")
+    density_id, count_id = cde_set.elements[2].id, cde_set.elements[3].id
+    columns = {
+        "density": np.array([0.0, 0.5, 0.75, np.nan, -1000.5]),
+        count_id: np.array([0, 20, 21, 4, 5]),
+        "has feature": np.array([True, False, True, False, True]),
+    }
+    result = validator.validate(columns)
+    assert result.codes[density_id].tolist() == [0, 0, ComponentError.OFF_STEP, 0, ComponentError.BELOW_MIN]
+    assert result.codes[count_id].tolist() == [0, 0, ComponentError.ABOVE_MAX, 0, 0]
+    assert result.errors.tolist() == [False, False, True, False, True]
+    with pytest.raises(ValueError, match="same length"):
+        validator.validate({"density": [1.0], "count": [1, 2]})
+
+
+def test_required_values(cde_set: CDESet):
+    validator = ComponentValidator(cde_set)
+    rows = [{"severity": "mild", "Presence of example finding": "absent"}, {"severity": None}]
+    assert not validator.validate(rows).errors.any()
+    result = validator.validate(rows, required=True)
+    assert result.errors.tolist() == [False, True]
+    assert result.row_errors(1) == {
+        "severity": ComponentError.MISSING,
+        "Presence of example finding": ComponentError.MISSING,
+    }
+
+
+def test_element_given_by_name_and_id(cde_set: CDESet):
+    count_id = cde_set.elements[3].id
+    result = ComponentValidator(cde_set).validate([{"count": 1}, {count_id: 50}])
+    assert list(result.codes) == ["count"]
+    assert result.codes["count"].tolist() == [0, ComponentError.ABOVE_MAX]
@@ -0,0 +1,269 @@
+"""Check batches of component values against the constraints of a CDE Set's elements, with NumPy."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import TYPE_CHECKING, Any, Iterable, Literal, Mapping, Sequence
+
+from openimagingdatamodel.cde_set.element import BooleanElement, FloatElement, IntegerElement, ValueSetElement
+
+from .decoder import ElementKind, _import_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from openimagingdatamodel.cde_set.set import CDESet
+
+    from .observation_factory import ComponentValueMap
+
+# Relative tolerance for a value to count as a whole number of steps (or a whole number, for integers)
+STEP_TOLERANCE = 1e-9
+
+
+class ComponentError(IntEnum):
+    """Why a component value failed validation, as stored in `ComponentValidation.codes`."""
+
+    OK = 0
+    # No value for a value set element with a minimum cardinality of at least one (only with `required=True`)
+    MISSING = 1
+    # Not a number, for numeric elements; not a boolean or number, for boolean elements; not a string,
+    # for value set elements
+    WRONG_TYPE = 2
+    BELOW_MIN = 3
+    ABOVE_MAX = 4
+    # Not `min` (or 0) plus a whole number of `step`s; for integer elements, also not a whole number
+    OFF_STEP = 5
+    NOT_IN_VALUE_SET = 6
+    UNKNOWN_ELEMENT = 7
+
+
+@dataclass
+class ComponentValidation:
+    """The result of validating a batch: per-row error codes for each column, and a per-row error mask.
+
+    `codes[column]` is a `uint8` array of `ComponentError`s, one per row. Columns are keyed by element
+    name (or ID, with `key="id"`); keys that aren't elements of the set keep the key they were given.
+    """
+
+    errors: np.ndarray
+    codes: dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.errors)
+
+    @property
+    def valid(self) -> np.ndarray:
+        """Boolean mask of the rows without errors."""
+        return ~self.errors
+
+    def row_errors(self, row: int) -> dict[str, ComponentError]:
+        """Get `{column: error}` for the columns with an error in one row."""
+        return {column: ComponentError(int(codes[row])) for column, codes in self.codes.items() if codes[row]}
+
+    def error_counts(self) -> dict[str, int]:
+        """Count the rows with an error in each column."""
+        return {column: int(codes.astype(bool).sum()) for column, codes in self.codes.items()}
+
+
+class _ElementConstraint:
+    """The constraints of one element, in the form the array checks need."""
+
+    __slots__ = ("element", "column", "kind", "minimum", "maximum", "step", "members", "folded", "required")
+
+    def __init__(self, element: Any, column: str) -> None:
+        self.element = element
+        self.column = column
+        self.minimum: float | None = None
+        self.maximum: float | None = None
+        self.step: float | None = None
+        self.members: frozenset[str] = frozenset()
+        self.folded: frozenset[str] = frozenset()
+        self.required = False
+        self.kind: ElementKind
+        if isinstance(element, ValueSetElement):
+            self.kind = "value_set"
+            keys = [k for v in element.value_set.values for k in (v.code, v.value, v.name) if k is not None]
+            self.members = frozenset(keys)
+            self.folded = frozenset(k.casefold() for k in keys)
+            self.required = element.value_set.min_cardinality >= 1
+        elif isinstance(element, BooleanElement):
+            self.kind = "boolean"
+        elif isinstance(element, (FloatElement, IntegerElement)):
+            self.kind = "float" if isinstance(element, FloatElement) else "integer"
+            limits = element.float_value if isinstance(element, FloatElement) else element.integer_value
+            self.minimum, self.maximum, self.step = limits.min, limits.max, limits.step or None
+        else:
+            raise ValueError(f"Unsupported element type for element {element.id}")
+
+    def check(self, np: Any, values: Sequence[Any], required: bool) -> np.ndarray:
+        """Get the `ComponentError` code of each value in a column."""
+        if self.kind == "value_set":
+            codes = self._check_members(np, values)
+        elif self.kind == "boolean":
+            codes = self._check_booleans(np, values)
+        else:
+            codes = self._check_numbers(np, values)
+        if not (required and self.required):
+            codes[codes == ComponentError.MISSING] = ComponentError.OK
+        return codes
+
+    def _check_members(self, np: Any, values: Sequence[Any]) -> np.ndarray:
+        n = len(values)
+        codes = np.zeros(n, dtype=np.uint8)
+        try:
+            found = np.fromiter(map(self.members.__contains__, values), dtype=np.bool_, count=n)
+        except TypeError:  # An unhashable value; sort them out one at a time
+            found = np.zeros(n, dtype=np.bool_)
+        # Only the values not found by exact match are looked at in Python
+        for i in np.flatnonzero(~found).tolist():
+            value = values[i]
+            if value is None:
+                codes[i] = ComponentError.MISSING
+            elif not isinstance(value, str):
+                codes[i] = ComponentError.WRONG_TYPE
+            elif value.casefold() not in self.folded:
+                codes[i] = ComponentError.NOT_IN_VALUE_SET
+        return codes
+
+    @staticmethod
+    def _check_booleans(np: Any, values: Sequence[Any]) -> np.ndarray:
+        n = len(values)
+        codes = np.zeros(n, dtype=np.uint8)
+        try:
+            array = np.asarray(values)
+        except ValueError:  # Ragged, so not all scalars; checked one at a time below
+            array = None
+        if array is not None and array.dtype.kind in "biuf":
+            if array.dtype.kind == "f":
+                codes[np.isnan(array)] = ComponentError.MISSING
+            return codes
+        for i, value in enumerate(values):
+            if value is None:
+                codes[i] = ComponentError.MISSING
+            elif not isinstance(value, (bool, int, float, np.bool_, np.number)):
+                codes[i] = ComponentError.WRONG_TYPE
+        return codes
+
+    def _check_numbers(self, np: Any, values: Sequence[Any]) -> np.ndarray:
+        n = len(values)
+        wrong_type = np.zeros(n, dtype=np.bool_)
+        try:
+            # Converts None to NaN and parses numeric strings, as float() does for the factory
+            x = np.asarray(values, dtype=np.float64)
+            if x.shape != (n,):
+                raise ValueError("Not one value per row")
+        except (TypeError, ValueError):
+            x = np.empty(n, dtype=np.float64)
+            for i, value in enumerate(values):
+                try:
+                    x[i] = float("nan") if value is None else float(value)
+                except (TypeError, ValueError):
+                    x[i] = float("nan")
+                    wrong_type[i] = True
+        codes = np.zeros(n, dtype=np.uint8)
+        codes[np.isnan(x)] = ComponentError.MISSING
+        if self.step is not None or self.kind == "integer":
+            step = self.step or 1.0
+            steps = (x - (self.minimum or 0.0)) / step
+            off_step = np.abs(steps - np.rint(steps)) > STEP_TOLERANCE * np.maximum(1.0, np.abs(steps))
+            if self.kind == "integer":
+                off_step |= (x != np.rint(x)) & ~np.isnan(x)
+            codes[off_step] = ComponentError.OFF_STEP
+        # Comparisons with NaN are False, so missing values are left alone
+        if self.minimum is not None:
+            codes[x < self.minimum] = ComponentError.BELOW_MIN
+        if self.maximum is not None:
+            codes[x > self.maximum] = ComponentError.ABOVE_MAX
+        codes[wrong_type] = ComponentError.WRONG_TYPE
+        return codes
+
+
+class ComponentValidator:
+    """Checks batches of component values against the elements of one CDESet, compiled once from the set.
+
+    Numeric values are checked against their element's `min`, `max` and `step` with NumPy array
+    operations, boolean values for type, and value set values for membership (by code, value or name,
+    ignoring case, like `ValueSetElement.get_value`) against a precomputed set. Rather than raising on the
+    first bad value, `validate` returns a `ComponentValidation` with an error code per row and column, so
+    a batch can be filtered before it's given to `ObservationFactory` or `ObservationEncoder`.
+
+    Values are checked the way the factory reads them (e.g. numeric strings are numbers), but more
+    strictly: integer elements need whole numbers. Value set elements take a single value, so their
+    cardinality comes down to whether a value is required; missing values are only errors with
+    `required=True`, for value sets with a `min_cardinality` of at least one.
+    """
+
+    def __init__(self, cde_set: CDESet, /, key: Literal["name", "id"] = "name") -> None:
+        self.cde_set = cde_set
+        self._constraints: dict[str, _ElementConstraint] = {}
+        for element in cde_set.elements:
+            self._constraints[element.id] = _ElementConstraint(element, element.name if key == "name" else element.id)
+        self._resolved: dict[str, _ElementConstraint | None] = {}
+
+    def _resolve(self, key: str) -> _ElementConstraint | None:
+        """Get the constraint for an element by name or ID, or None if it isn't in the set."""
+        if key not in self._resolved:
+            try:
+                element = self.cde_set.get_element(key)
+            except ValueError:
+                self._resolved[key] = None
+            else:
+                self._resolved[key] = self._constraints.get(element.id) or _ElementConstraint(element, key)
+        return self._resolved[key]
+
+    def validate(
+        self,
+        batch: Iterable[ComponentValueMap] | Mapping[str, Sequence[Any]],
+        /,
+        required: bool = False,
+    ) -> ComponentValidation:
+        """Validate a batch, given as rows of `{element name or ID: value}` or as `{element name or ID: column}`.
+
+        Columns may be lists or NumPy arrays, all the same length, with None (or NaN) for missing values.
+        With `required=True`, value set elements that need at least one value are errors where missing.
+        """
+        np = _import_numpy()
+        columns = batch if isinstance(batch, Mapping) else self._columns_from_rows(list(batch))
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        n = lengths.pop() if lengths else 0
+
+        by_element: dict[str, tuple[_ElementConstraint, Sequence[Any]]] = {}
+        codes: dict[str, np.ndarray] = {}
+        for key, column in columns.items():
+            constraint = self._resolve(key)
+            if constraint is None:
+                codes[key] = np.where(self._present(np, column), ComponentError.UNKNOWN_ELEMENT, 0).astype(np.uint8)
+            elif constraint.column in by_element:
+                # The same element under its name and its ID; the first value given wins
+                merged = list(by_element[constraint.column][1])
+                for i, value in enumerate(column):
+                    if merged[i] is None:
+                        merged[i] = value
+                by_element[constraint.column] = (constraint, merged)
+            else:
+                by_element[constraint.column] = (constraint, column)
+        for column_key, (constraint, column) in by_element.items():
+            codes[column_key] = constraint.check(np, column, required)
+        if required:
+            for constraint in self._constraints.values():
+                if constraint.required and constraint.column not in codes:
+                    codes[constraint.column] = np.full(n, ComponentError.MISSING, dtype=np.uint8)
+
+        errors = np.zeros(n, dtype=np.bool_)
+        for column_codes in codes.values():
+            errors |= column_codes != 0
+        return ComponentValidation(errors=errors, codes=codes)
+
+    @staticmethod
+    def _columns_from_rows(rows: list[ComponentValueMap]) -> dict[str, list[Any]]:
+        keys = dict.fromkeys(key for row in rows for key in row)
+        return {key: [row.get(key) for row in rows] for key in keys}
+
+    @staticmethod
+    def _present(np: Any, column: Sequence[Any]) -> np.ndarray:
+        if isinstance(column, np.ndarray) and column.dtype.kind == "f":
+            return ~np.isnan(column)
+        return np.fromiter((value is not None for value in column), dtype=np.bool_, count=len(column))
@@ -0,0 +1,252 @@
+"""Error-tolerant bulk loading: bad records are collected and quarantined instead of stopping the load.
+
+`BulkLoader` turns raw records into models, yielding the good ones and writing each bad one, with
+its errors, to a quarantine NDJSON file (see `QuarantineWriter`). `LoadReport` counts records,
+failures and throughput as the load goes. `iter_ndjson_lines` reads the lines of an NDJSON file
+with their offsets, to make records from. `openimagingdatamodel.cde_set.bulk_load.load_sets` and
+`openimagingdatamodel.observation.ndjson.load_observations` build loaders for CDE Set JSON and
+Observation NDJSON.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import IO, TYPE_CHECKING, Any, Callable, Generic, Iterable, Iterator, NamedTuple, TypeVar
+
+from pydantic import ValidationError
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class RawRecord(NamedTuple):
+    """A record as read, before parsing: where it came from and its bytes."""
+
+    source: str
+    offset: int
+    data: bytes
+
+
+@dataclass(frozen=True, slots=True)
+class RecordError:
+    """One problem with one record.
+
+    `offset` is the byte offset of the record in `source` (0 for a record that is a whole file), and
+    `path` the location of the problem within the record, e.g. `component.2.valueInteger` (empty for
+    problems with the record as a whole).
+    """
+
+    source: str
+    offset: int
+    path: str
+    message: str
+    type: str
+
+    @classmethod
+    def from_exception(cls, record: RawRecord, exc: Exception) -> list[RecordError]:
+        """Get the errors behind an exception raised while parsing or checking a record."""
+        if isinstance(exc, ValidationError):
+            return [
+                cls(
+                    record.source,
+                    record.offset,
+                    ".".join(str(loc) for loc in error["loc"]),
+                    error["msg"],
+                    error["type"],
+                )
+                for error in exc.errors(include_url=False, include_input=False)
+            ]
+        return [cls(record.source, record.offset, "", str(exc), type(exc).__name__)]
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class LoadReport:
+    """Counts and throughput of a bulk load, kept up to date as it runs.
+
+    Only the first `max_errors` errors are kept in `errors`; `error_count` counts all of them.
+    """
+
+    records: int = 0
+    loaded: int = 0
+    failed: int = 0
+    bytes_read: int = 0
+    error_count: int = 0
+    seconds: float = 0.0
+    max_errors: int = 1000
+    errors: list[RecordError] = field(default_factory=list)
+
+    @property
+    def error_rate(self) -> float:
+        """Fraction of records that failed."""
+        return self.failed / self.records if self.records else 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+    def add_errors(self, errors: list[RecordError]) -> None:
+        self.failed += 1
+        self.error_count += len(errors)
+        self.errors.extend(errors[: self.max_errors - len(self.errors)])
+
+    def summary(self) -> dict[str, Any]:
+        """The counts and rates, without the errors themselves."""
+        return {
+            "records": self.records,
+            "loaded": self.loaded,
+            "failed": self.failed,
+            "errors": self.error_count,
+            "error_rate": self.error_rate,
+            "bytes_read": self.bytes_read,
+            "seconds": self.seconds,
+            "records_per_second": self.records_per_second,
+        }
+
+    def __str__(self) -> str:
+        return (
+            f"{self.loaded:,} of {self.records:,} records loaded, {self.failed:,} failed "
+            f"({self.error_rate:.3%}) in {self.seconds:.2f} s ({self.records_per_second:,.0f} records/s)"
+        )
+
+
+def iter_ndjson_lines(path: str, byte_range: tuple[int, int] | None = None) -> Iterator[tuple[int, bytes]]:
+    """Yield `(offset, line)` for the non-blank lines of a file (gzip-compressed if the name ends in `.gz`)
+    that start within `byte_range`."""
+    if path.endswith(".gz"):
+        if byte_range is not None:
+            raise ValueError("Byte ranges can't be used with compressed files")
+        with gzip.open(path, "rb") as f:
+            offset = 0
+            for line in f:
+                if line.strip():
+                    yield offset, line
+                offset += len(line)
+        return
+    with open(path, "rb") as f:
+        start, end = byte_range if byte_range is not None else (0, None)
+        offset = start
+        if start > 0:
+            # A line belongs to the range it starts in, so skip the rest of any line we land inside
+            f.seek(start - 1)
+            offset = start - 1 + len(f.readline())
+        while end is None or offset < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                yield offset, line
+            offset += len(line)
+
+
+class QuarantineWriter:
+    """Append bad records, one JSON object per line, to a quarantine NDJSON file.
+
+    Each line has the record's `source` and `offset`, its `errors` (as `RecordError.to_dict()`), and the
+    `record` itself as text, so it can be fixed and loaded again. The file is only created once
+    there's something to write; after that the writer appends to it, even if closed in between, so
+    one writer can be shared by several loads.
+    """
+
+    def __init__(self, path: str | os.PathLike[str], /, append: bool = False) -> None:
+        self.path = os.fspath(path)
+        self.mode = "a" if append else "w"
+        self.count = 0
+        self._file: IO[str] | None = None
+
+    def write(self, record: RawRecord, errors: list[RecordError]) -> None:
+        if self._file is None:
+            self._file = open(self.path, self.mode, encoding="utf-8")  # noqa: SIM115
+            self.mode = "a"
+        entry = {
+            "source": record.source,
+            "offset": record.offset,
+            "errors": [{"path": e.path, "message": e.message, "type": e.type} for e in errors],
+            "record": record.data.decode("utf-8", errors="replace").rstrip("\r\n"),
+        }
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> QuarantineWriter:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None
+    ) -> None:
+        self.close()
+
+
+class BulkLoader(Generic[T]):
+    """Parse raw records into models, yielding the good ones and quarantining the bad.
+
+    A record fails when `parse` (or `check`, given the parsed model) raises a `ValidationError` or
+    `ValueError`; its errors go into `report` and, if given, the `quarantine` file, and loading goes
+    on. Other exceptions are not caught. The report is logged when iteration finishes. A quarantine
+    file given as a path is closed then too; a `QuarantineWriter` passed in is left for the caller to close.
+
+    A loader makes a single pass over its records; make a new one to load them again.
+    """
+
+    def __init__(
+        self,
+        records: Iterable[RawRecord],
+        parse: Callable[[bytes], T],
+        /,
+        check: Callable[[T], Any] | None = None,
+        quarantine: str | os.PathLike[str] | QuarantineWriter | None = None,
+        max_errors: int = 1000,
+    ) -> None:
+        self.records = records
+        self.parse = parse
+        self.check = check
+        self._owns_quarantine = quarantine is not None and not isinstance(quarantine, QuarantineWriter)
+        if self._owns_quarantine:
+            quarantine = QuarantineWriter(quarantine)  # type: ignore[arg-type]
+        self.quarantine = quarantine
+        self.report = LoadReport(max_errors=max_errors)
+
+    def __iter__(self) -> Iterator[T]:
+        report = self.report
+        start = time.perf_counter()
+        try:
+            for record in self.records:
+                report.records += 1
+                report.bytes_read += len(record.data)
+                try:
+                    model = self.parse(record.data)
+                    if self.check is not None:
+                        self.check(model)
+                except (ValidationError, ValueError) as e:
+                    errors = RecordError.from_exception(record, e)
+                    report.add_errors(errors)
+                    if self.quarantine is not None:
+                        self.quarantine.write(record, errors)
+                    continue
+                report.loaded += 1
+                report.seconds = time.perf_counter() - start
+                yield model
+        finally:
+            report.seconds = time.perf_counter() - start
+            if self._owns_quarantine:
+                self.quarantine.close()  # type: ignore[union-attr]
+            logger.log(logging.WARNING if report.failed else logging.INFO, "Bulk load: %s", report)
+
+    def load(self) -> list[T]:
+        """Load everything, returning the good records."""
+        return list(self)
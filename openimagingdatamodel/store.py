@@ -0,0 +1,426 @@
+"""Persistent store for CDE Sets and Observations in a local SQLite database.
+
+Each set and Observation is kept as its JSON, alongside indexed columns extracted from it: set,
+element and value IDs for sets; ID, set, subject, status, identifiers and component values for
+Observations. Queries such as "every Observation of subject X with RDE1304 = upper lobe" are answered
+from the indexes and only the matching JSON is parsed.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from typing import TYPE_CHECKING, Any, Final, Iterable, Iterator, Mapping, Union
+
+from openimagingdatamodel.cde_set.element import ValueSetElement
+from openimagingdatamodel.cde_set.set import CDESet
+from openimagingdatamodel.observation.observation import (
+    BooleanComponent,
+    CodeableConceptComponent,
+    Identifier,
+    IntegerComponent,
+    Observation,
+    StringComponent,
+)
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+SCHEMA_VERSION: Final[int] = 1
+DEFAULT_BATCH_SIZE: Final[int] = 10_000
+
+# A value to match: a value code, name or `value` slug, a string, a number or boolean, or (low, high) for a range
+ValueFilter = Union[str, int, float, bool, tuple[float, float]]
+
+# `observation_values.value` has no type affinity, so numbers stay numbers and text stays text in
+# one index; both child tables are clustered by Observation, and their second index covers lookups
+_SCHEMA: Final[str] = """
+CREATE TABLE IF NOT EXISTS cde_sets (id TEXT PRIMARY KEY, name TEXT NOT NULL, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS cde_elements (id TEXT PRIMARY KEY, set_id TEXT NOT NULL, name TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS ix_cde_elements_set ON cde_elements (set_id);
+CREATE TABLE IF NOT EXISTS cde_values (
+    code TEXT PRIMARY KEY, element_id TEXT NOT NULL, set_id TEXT NOT NULL, name TEXT NOT NULL, value TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_cde_values_element ON cde_values (element_id);
+CREATE TABLE IF NOT EXISTS observations (
+    rowid INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, set_id TEXT, subject TEXT, status TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_observations_subject ON observations (subject);
+CREATE INDEX IF NOT EXISTS ix_observations_set ON observations (set_id, status);
+CREATE TABLE IF NOT EXISTS observation_identifiers (
+    observation INTEGER NOT NULL, system TEXT NOT NULL, value TEXT NOT NULL,
+    PRIMARY KEY (observation, system, value)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_observation_identifiers_value ON observation_identifiers (value, system);
+CREATE TABLE IF NOT EXISTS observation_values (
+    observation INTEGER NOT NULL, element_id TEXT NOT NULL, value NOT NULL,
+    PRIMARY KEY (observation, element_id, value)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_observation_values_element ON observation_values (element_id, value);
+"""
+
+
+def _text_value(text: str) -> str | float:
+    """Get how text is indexed: as a number if it reads as one (float element values are sent as
+    strings), so ranges and numeric filters work, otherwise as is."""
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def _component_values(component: Any) -> list[Any]:
+    """Get what a component is indexed under: its value codes, number (booleans as 0/1) or string."""
+    if isinstance(component, CodeableConceptComponent):
+        return [coding.code for coding in component.value_codeable_concept.codings]
+    if isinstance(component, BooleanComponent):
+        return [int(component.value_boolean)]
+    if isinstance(component, IntegerComponent):
+        return [component.value_integer]
+    if isinstance(component, StringComponent):
+        return [_text_value(component.value_string)]
+    return []
+
+
+class SQLiteStore:
+    """CDE Sets and Observations in a SQLite database file, in WAL mode so readers don't block the writer.
+
+    `add_observations` inserts in batches of `batch_size`, each in one transaction with `executemany`.
+    `find_observations` and `count_observations` filter by subject, set, status, identifier and
+    component values (by element ID), all through indexes. A value set value can be given by code,
+    name or `value` slug if its set is in the store. Use one store per thread.
+    """
+
+    def __init__(self, path: str | os.PathLike[str], /, timeout: float = 30.0, cache_size_mb: int = 64) -> None:
+        self.path = os.fspath(path)
+        self._connection = sqlite3.connect(self.path, timeout=timeout, isolation_level=None)
+        execute = self._connection.execute
+        execute("PRAGMA journal_mode = WAL")
+        execute("PRAGMA synchronous = NORMAL")
+        execute(f"PRAGMA cache_size = {-1024 * cache_size_mb}")
+        version = execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            self._connection.close()
+            raise ValueError(f"'{self.path}' has store schema version {version}, expected {SCHEMA_VERSION}")
+        self._connection.executescript(_SCHEMA)
+        execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> SQLiteStore:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None
+    ) -> None:
+        self.close()
+
+    def _transaction(self) -> _Transaction:
+        return _Transaction(self._connection)
+
+    # CDE Sets
+
+    def add_sets(self, sets: Iterable[CDESet], /) -> int:
+        """Store sets, replacing any already stored under the same ID. Returns how many were stored."""
+        count = 0
+        with self._transaction() as cursor:
+            for cde_set in sets:
+                cursor.execute("DELETE FROM cde_elements WHERE set_id = ?", (cde_set.id,))
+                cursor.execute("DELETE FROM cde_values WHERE set_id = ?", (cde_set.id,))
+                cursor.execute(
+                    "INSERT OR REPLACE INTO cde_sets (id, name, data) VALUES (?, ?, ?)",
+                    (cde_set.id, cde_set.name, cde_set.model_dump_json(exclude_none=True)),
+                )
+                cursor.executemany(
+                    "INSERT OR REPLACE INTO cde_elements (id, set_id, name) VALUES (?, ?, ?)",
+                    [(element.id, cde_set.id, element.name) for element in cde_set.elements],
+                )
+                cursor.executemany(
+                    "INSERT OR REPLACE INTO cde_values (code, element_id, set_id, name, value) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (value.code, element.id, cde_set.id, value.name, value.value)
+                        for element in cde_set.elements
+                        if isinstance(element, ValueSetElement)
+                        for value in element.value_set.values
+                    ],
+                )
+                count += 1
+        return count
+
+    def add_set(self, cde_set: CDESet, /) -> None:
+        self.add_sets([cde_set])
+
+    def get_set(self, set_id: str, /) -> CDESet:
+        row = self._connection.execute("SELECT data FROM cde_sets WHERE id = ?", (set_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"CDE Set '{set_id}' not found in store")
+        return CDESet.model_validate_json(row[0])
+
+    def set_ids(self) -> list[str]:
+        return [row[0] for row in self._connection.execute("SELECT id FROM cde_sets ORDER BY id")]
+
+    def find_set_for_element(self, element_id: str, /) -> CDESet:
+        """Get the set an element (by ID) belongs to."""
+        row = self._connection.execute(
+            "SELECT s.data FROM cde_elements e JOIN cde_sets s ON s.id = e.set_id WHERE e.id = ?", (element_id,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Element '{element_id}' not found in store")
+        return CDESet.model_validate_json(row[0])
+
+    def remove_set(self, set_id: str, /) -> None:
+        with self._transaction() as cursor:
+            if cursor.execute("DELETE FROM cde_sets WHERE id = ?", (set_id,)).rowcount == 0:
+                raise ValueError(f"CDE Set '{set_id}' not found in store")
+            cursor.execute("DELETE FROM cde_elements WHERE set_id = ?", (set_id,))
+            cursor.execute("DELETE FROM cde_values WHERE set_id = ?", (set_id,))
+
+    # Observations
+
+    def add_observations(
+        self, observations: Iterable[Observation], /, batch_size: int = DEFAULT_BATCH_SIZE, replace: bool = False
+    ) -> int:
+        """Store Observations, `batch_size` to a transaction. Returns how many were stored.
+
+        An Observation whose ID is already stored is an error (and its batch is rolled back), unless
+        `replace` is set, in which case it replaces the stored one (and of several with the same ID in
+        one call, the last is kept).
+        """
+        count = 0
+        batch = _ObservationBatch()
+        for observation in observations:
+            # Extract the rows as each Observation arrives, so the caller may reuse the object
+            batch.add(observation)
+            if len(batch.rows) == batch_size:
+                count += self._insert(batch, replace)
+                batch = _ObservationBatch()
+        if batch.rows:
+            count += self._insert(batch, replace)
+        return count
+
+    def _insert(self, batch: _ObservationBatch, replace: bool) -> int:
+        if replace:
+            batch = batch.latest()
+        with self._transaction() as cursor:
+            if replace:
+                self._delete_observations(cursor, [row[0] for row in batch.rows])
+            first = cursor.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM observations").fetchone()[0]
+            try:
+                cursor.executemany(
+                    "INSERT INTO observations (rowid, id, set_id, subject, status, data) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(first + i, *row) for i, row in enumerate(batch.rows)],
+                )
+            except sqlite3.IntegrityError as e:
+                raise ValueError(f"Observation already in store: {e}") from e
+            cursor.executemany(
+                "INSERT OR IGNORE INTO observation_identifiers (observation, system, value) VALUES (?, ?, ?)",
+                [(first + i, system, value) for i, system, value in batch.identifiers],
+            )
+            cursor.executemany(
+                "INSERT OR IGNORE INTO observation_values (observation, element_id, value) VALUES (?, ?, ?)",
+                [(first + i, element_id, value) for i, element_id, value in batch.values],
+            )
+        return len(batch.rows)
+
+    @staticmethod
+    def _delete_observations(cursor: sqlite3.Cursor, ids: list[str]) -> int:
+        rowids = []
+        for i in range(0, len(ids), 500):
+            chunk = ids[i : i + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            rowids += cursor.execute(f"SELECT rowid FROM observations WHERE id IN ({placeholders})", chunk).fetchall()
+        cursor.executemany("DELETE FROM observation_values WHERE observation = ?", rowids)
+        cursor.executemany("DELETE FROM observation_identifiers WHERE observation = ?", rowids)
+        cursor.executemany("DELETE FROM observations WHERE rowid = ?", rowids)
+        return len(rowids)
+
+    def remove_observations(self, ids: Iterable[str], /) -> int:
+        """Remove Observations by ID. Returns how many were found and removed."""
+        with self._transaction() as cursor:
+            return self._delete_observations(cursor, list(ids))
+
+    def get_observation(self, observation_id: str, /) -> Observation:
+        row = self._connection.execute("SELECT data FROM observations WHERE id = ?", (observation_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Observation '{observation_id}' not found in store")
+        return Observation.model_validate_json(row[0])
+
+    def _value_code(self, element_id: str, value: str) -> str:
+        """Resolve a value set value given by name or `value` slug to its code, if its set is stored."""
+        key = value.casefold()
+        for code, name, slug in self._connection.execute(
+            "SELECT code, name, value FROM cde_values WHERE element_id = ?", (element_id,)
+        ):
+            if key in (code.casefold(), name.casefold(), (slug or "").casefold()):
+                return code
+        return value
+
+    def _query(
+        self,
+        columns: str,
+        subject: str | None,
+        set_id: str | None,
+        status: str | None,
+        identifier: str | Identifier | None,
+        values: Mapping[str, ValueFilter] | None,
+    ) -> tuple[str, list[Any]]:
+        clauses: list[str] = []
+        params: list[Any] = []
+        if subject is not None:
+            clauses.append("o.subject = ?")
+            params.append(subject)
+        if set_id is not None:
+            clauses.append("o.set_id = ?")
+            params.append(set_id)
+        if status is not None:
+            clauses.append("o.status = ?")
+            params.append(status)
+        if identifier is not None:
+            if isinstance(identifier, Identifier):
+                clauses.append(
+                    "o.rowid IN (SELECT observation FROM observation_identifiers WHERE value = ? AND system = ?)"
+                )
+                params += [identifier.value, identifier.system]
+            else:
+                clauses.append("o.rowid IN (SELECT observation FROM observation_identifiers WHERE value = ?)")
+                params.append(identifier)
+        # Without a more selective filter, the first value filter drives the query through the value
+        # index; otherwise each Observation found is checked through the primary key
+        drive = not clauses
+        for element_id, value in (values or {}).items():
+            if isinstance(value, tuple):
+                condition = "element_id = ? AND value BETWEEN ? AND ?"
+                params += [element_id, *value]
+            else:
+                if isinstance(value, bool):
+                    value = int(value)
+                elif isinstance(value, str):
+                    # Matched the way component values are indexed: "12.5" finds the number 12.5
+                    value = _text_value(self._value_code(element_id, value))
+                condition = "element_id = ? AND value = ?"
+                params += [element_id, value]
+            if drive:
+                clauses.append(f"o.rowid IN (SELECT observation FROM observation_values WHERE {condition})")
+                drive = False
+            else:
+                clauses.append(f"EXISTS (SELECT 1 FROM observation_values WHERE observation = o.rowid AND {condition})")
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return f"SELECT {columns} FROM observations o{where}", params
+
+    def find_observations(
+        self,
+        subject: str | None = None,
+        /,
+        set_id: str | None = None,
+        status: str | None = None,
+        identifier: str | Identifier | None = None,
+        values: Mapping[str, ValueFilter] | None = None,
+        limit: int | None = None,
+    ) -> Iterator[Observation]:
+        """Get the Observations matching all the filters given.
+
+        `subject` is a reference such as `Patient/123`; `identifier` is an identifier value (in any
+        system) or an `Identifier`; `values` maps element IDs to the value each must have, or a
+        `(low, high)` range for numbers.
+        """
+        sql, params = self._query("o.data", subject, set_id, status, identifier, values)
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        for (data,) in self._connection.execute(sql, params):
+            yield Observation.model_validate_json(data)
+
+    def count_observations(
+        self,
+        subject: str | None = None,
+        /,
+        set_id: str | None = None,
+        status: str | None = None,
+        identifier: str | Identifier | None = None,
+        values: Mapping[str, ValueFilter] | None = None,
+    ) -> int:
+        """Count the Observations matching the filters (as for `find_observations`) without reading them."""
+        sql, params = self._query("COUNT(*)", subject, set_id, status, identifier, values)
+        return self._connection.execute(sql, params).fetchone()[0]
+
+    def query_plan(
+        self,
+        subject: str | None = None,
+        /,
+        set_id: str | None = None,
+        status: str | None = None,
+        identifier: str | Identifier | None = None,
+        values: Mapping[str, ValueFilter] | None = None,
+    ) -> list[str]:
+        """Get SQLite's plan for `find_observations` with these filters, to check which indexes it uses."""
+        sql, params = self._query("o.data", subject, set_id, status, identifier, values)
+        return [row[-1] for row in self._connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+    def optimize(self) -> None:
+        """Update the statistics SQLite plans queries with; worth running after large loads."""
+        self._connection.execute("PRAGMA optimize")
+
+    def info(self) -> dict[str, int]:
+        """Report how many sets, Observations and indexed values are stored."""
+        execute = self._connection.execute
+        return {
+            "sets": execute("SELECT COUNT(*) FROM cde_sets").fetchone()[0],
+            "observations": execute("SELECT COUNT(*) FROM observations").fetchone()[0],
+            "observation_values": execute("SELECT COUNT(*) FROM observation_values").fetchone()[0],
+        }
+
+
+class _ObservationBatch:
+    """Rows for a batch of Observations, referring to each other by position in the batch."""
+
+    __slots__ = ("rows", "identifiers", "values")
+
+    def __init__(self) -> None:
+        self.rows: list[tuple[str, str | None, str | None, str, str]] = []
+        self.identifiers: list[tuple[int, str, str]] = []
+        self.values: list[tuple[int, str, Any]] = []
+
+    def add(self, observation: Observation) -> None:
+        position = len(self.rows)
+        set_id = observation.code.codings[0].code if observation.code is not None else None
+        subject = observation.subject.reference if observation.subject is not None else None
+        data = observation.__pydantic_serializer__.to_json(observation, by_alias=True, exclude_none=True).decode()
+        self.rows.append((observation.id_, set_id, subject, observation.status, data))
+        for identifier in observation.identifiers or ():
+            self.identifiers.append((position, identifier.system, identifier.value))
+        for component in observation.components:
+            element_id = component.code.codings[0].code
+            self.values.extend((position, element_id, value) for value in _component_values(component))
+
+    def latest(self) -> _ObservationBatch:
+        """Get the batch with only the last Observation given for each ID."""
+        last = {row[0]: position for position, row in enumerate(self.rows)}
+        if len(last) == len(self.rows):
+            return self
+        positions = {old: new for new, old in enumerate(sorted(last.values()))}
+        batch = _ObservationBatch()
+        batch.rows = [self.rows[old] for old in positions]
+        batch.identifiers = [(positions[i], system, value) for i, system, value in self.identifiers if i in positions]
+        batch.values = [(positions[i], element_id, value) for i, element_id, value in self.values if i in positions]
+        return batch
+
+
+class _Transaction:
+    """`BEGIN IMMEDIATE` ... `COMMIT` (or `ROLLBACK` on error) on a connection in autocommit mode."""
+
+    __slots__ = ("connection", "cursor")
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Cursor:
+        self.cursor = self.connection.cursor()
+        self.cursor.execute("BEGIN IMMEDIATE")
+        return self.cursor
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None
+    ) -> None:
+        self.cursor.execute("ROLLBACK" if exc_type is not None else "COMMIT")
+        self.cursor.close()
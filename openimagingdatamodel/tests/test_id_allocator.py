@@ -0,0 +1,84 @@
+import pickle
+import re
+import uuid
+
+import pytest  # type: ignore
+from openimagingdatamodel.id_allocator import (
+    DeterministicIdAllocator,
+    EntropyIdAllocator,
+    IdAllocator,
+    SequenceIdAllocator,
+)
+
+NANOID_REGEX = r"finding_[A-Za-z0-9_-]{10}"
+UID_REGEX = r"2\.25\.[1-9][0-9]{0,38}"
+
+
+def uid_version(uid: str) -> int:
+    return uuid.UUID(int=int(uid.removeprefix("2.25."))).version
+
+
+@pytest.mark.parametrize("allocator", [IdAllocator(), EntropyIdAllocator(batch_size=64)])
+def test_random_allocators(allocator: IdAllocator):
+    assert re.fullmatch(r"TO_BE_DETERMINED\d{4,}", allocator.provisional_id("set"))
+    observation_ids = {allocator.observation_id("finding") for _ in range(1000)}
+    assert len(observation_ids) == 1000
+    assert all(re.fullmatch(NANOID_REGEX, id) for id in observation_ids)
+    uids = {allocator.dicom_uid() for _ in range(1000)}
+    assert len(uids) == 1000
+    assert all(re.fullmatch(UID_REGEX, uid) and uid_version(uid) == 4 for uid in uids)
+    assert allocator.for_batch(10) is allocator
+
+
+def test_entropy_allocator():
+    allocator = EntropyIdAllocator(provisional_digits=12)
+    assert re.fullmatch(r"TO_BE_DETERMINED\d{12}", allocator.provisional_id("element"))
+    ids = allocator.observation_ids("finding", 500)
+    assert len(set(ids)) == 500
+    assert all(re.fullmatch(NANOID_REGEX, id) for id in ids)
+    assert all(uid_version(uid) == 4 for uid in allocator.dicom_uids(100))
+    allocator.random_bytes(10)
+    copy = pickle.loads(pickle.dumps(allocator))
+    assert copy.provisional_digits == 12
+    assert copy.random_bytes(16) != allocator.random_bytes(16)
+
+
+def test_sequence_allocator():
+    allocator = SequenceIdAllocator()
+    assert [allocator.provisional_id("set") for _ in range(2)] == ["TO_BE_DETERMINED0001", "TO_BE_DETERMINED0002"]
+    assert allocator.provisional_id("element") == "TO_BE_DETERMINED0001"
+    assert allocator.observation_id("finding") == "finding_0000000001"
+    assert allocator.observation_ids("finding", 2) == ["finding_0000000002", "finding_0000000003"]
+    assert allocator.reserve("set", 3) == range(3, 6)
+    assert re.fullmatch(UID_REGEX, allocator.dicom_uid())
+
+
+def test_sequence_allocator_batches():
+    allocator = SequenceIdAllocator()
+    batches = [pickle.loads(pickle.dumps(allocator.for_batch(2))) for _ in range(3)]
+    set_ids = [batch.provisional_id("set") for batch in batches for _ in range(2)]
+    element_ids = [batch.provisional_id("element") for batch in batches for _ in range(5)]
+    set_ids.append(allocator.provisional_id("set"))
+    element_ids.append(allocator.provisional_id("element"))
+    assert len(set(set_ids)) == len(set_ids)
+    assert len(set(element_ids)) == len(element_ids)
+    with pytest.raises(ValueError, match="used up"):
+        batches[0].provisional_id("set")
+
+
+def test_deterministic_allocator():
+    allocator = DeterministicIdAllocator()
+    assert allocator.provisional_id("set", "Pulmonary nodule") == allocator.provisional_id("set", "Pulmonary nodule")
+    assert allocator.provisional_id("set", "Pulmonary nodule") != allocator.provisional_id(
+        "element", "Pulmonary nodule"
+    )
+    assert re.fullmatch(r"TO_BE_DETERMINED\d{12}", allocator.provisional_id("set", "Pulmonary nodule"))
+    observation_id = allocator.observation_id("finding", b"content")
+    assert re.fullmatch(NANOID_REGEX, observation_id)
+    assert observation_id == DeterministicIdAllocator().observation_id("finding", b"content")
+    assert observation_id != DeterministicIdAllocator("other").observation_id("finding", b"content")
+    uid = allocator.dicom_uid(b"content")
+    assert re.fullmatch(UID_REGEX, uid) and uid_version(uid) == 5
+    assert uid == allocator.dicom_uid(b"content") != allocator.dicom_uid(b"other content")
+    with pytest.raises(ValueError, match="need content"):
+        allocator.observation_id("finding")
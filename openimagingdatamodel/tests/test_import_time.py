@@ -0,0 +1,85 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest  # type: ignore
+
+# Budgets for the time spent in this package's own modules (not pydantic's) when importing each entry
+# point, in ms. Building every model at import took over 130 ms for each of these. Wall-clock timings
+# depend on the machine, so they are only checked with OIDM_IMPORT_BUDGETS=1;
+# OIDM_IMPORT_BUDGET_SCALE stretches them on slow machines.
+IMPORT_BUDGETS_MS = {
+    "openimagingdatamodel": 20,
+    "openimagingdatamodel.observation.observation": 80,
+    "openimagingdatamodel.observation.ndjson": 90,
+    "openimagingdatamodel.cde_set.set": 80,
+    "openimagingdatamodel.cde_set.snapshot": 100,
+    "openimagingdatamodel.observation.encoder": 120,
+}
+CHECK_BUDGETS = os.environ.get("OIDM_IMPORT_BUDGETS", "") not in ("", "0")
+BUDGET_SCALE = float(os.environ.get("OIDM_IMPORT_BUDGET_SCALE", "1"))
+# Modules that processes only reading Observations shouldn't pay for
+READER_EXCLUDED = ["caseswitcher", "nanoid", "openimagingdatamodel.observation.observation_factory"]
+
+IMPORT_TIME_REGEX = re.compile(r"^import time:\s+(\d+) \|\s+\d+ \| (\s*)(\S+)$", re.MULTILINE)
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Import `module` in a new interpreter with `-X importtime`; get the self time of each module imported, in us."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+    )
+    return {name: int(us) for us, _, name in IMPORT_TIME_REGEX.findall(result.stderr)}
+
+
+def run(code: str) -> str:
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip()
+
+
+@pytest.mark.skipif(not CHECK_BUDGETS, reason="set OIDM_IMPORT_BUDGETS=1 to check import time budgets")
+@pytest.mark.parametrize("module", IMPORT_BUDGETS_MS)
+def test_import_time_budget(module: str):
+    # Best of three, as a single run can be held up by the machine
+    own_ms = min(
+        sum(us for name, us in import_times(module).items() if name.startswith("openimagingdatamodel")) / 1000
+        for _ in range(3)
+    )
+    assert own_ms <= IMPORT_BUDGETS_MS[module] * BUDGET_SCALE
+
+
+def test_package_import_is_lazy():
+    times = import_times("openimagingdatamodel")
+    assert "pydantic" not in times
+    assert not any(name.startswith("openimagingdatamodel.") for name in times)
+    assert run("import openimagingdatamodel as o; print(o.CDESet.__module__, 'CDESet' in dir(o))") == (
+        "openimagingdatamodel.cde_set.set True"
+    )
+    assert run("from openimagingdatamodel.cde_set import SetFactory; print(SetFactory.__name__)") == "SetFactory"
+    assert (
+        run("import openimagingdatamodel.observation as o; print('Observation' in dir(o), o.Observation.__name__)")
+        == "True Observation"
+    )
+    with pytest.raises(AttributeError):
+        import openimagingdatamodel
+
+        openimagingdatamodel.Nonexistent  # noqa: B018
+
+
+@pytest.mark.parametrize(
+    "module", ["openimagingdatamodel.observation.observation", "openimagingdatamodel.observation.ndjson"]
+)
+def test_readers_skip_factories(module: str):
+    times = import_times(module)
+    assert not [name for name in READER_EXCLUDED if name in times]
+
+
+def test_models_are_built_on_first_use():
+    code = (
+        "from openimagingdatamodel.observation.observation import Observation;"
+        "from openimagingdatamodel.cde_set.set import CDESet;"
+        "print(Observation.__pydantic_complete__, CDESet.__pydantic_complete__);"
+        "Observation.model_validate({'id': 'obs', 'status': 'final'});"
+        "print(Observation.__pydantic_complete__, CDESet.__pydantic_complete__)"
+    )
+    assert run(code).split() == ["False", "False", "True", "False"]
@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+from openimagingdatamodel.quarantine import BulkLoader, QuarantineWriter, RawRecord
+from pydantic import TypeAdapter
+
+INT_LIST = TypeAdapter(list[int])
+
+
+def records(*lines: bytes) -> list[RawRecord]:
+    return [RawRecord("input", i * 10, line) for i, line in enumerate(lines)]
+
+
+def test_errors_are_collected_up_to_max_errors():
+    loader = BulkLoader(records(b"[1]", b'["a", "b"]', b"[2, 3]", b"[[]]"), INT_LIST.validate_json, max_errors=2)
+    assert list(loader) == [[1], [2, 3]]
+    report = loader.report
+    assert (report.records, report.loaded, report.failed, report.error_count) == (4, 2, 2, 3)
+    assert [(e.offset, e.path, e.type) for e in report.errors] == [(10, "0", "int_parsing"), (10, "1", "int_parsing")]
+    assert str(report).startswith("2 of 4 records loaded, 2 failed (50.000%)")
+
+
+def test_quarantine_writer_appends(tmp_path: Path):
+    path = tmp_path / "quarantine.ndjson"
+    BulkLoader(records(b"[1]"), INT_LIST.validate_json, quarantine=path).load()
+    assert not path.exists()
+    BulkLoader(records(b"x"), INT_LIST.validate_json, quarantine=path).load()
+    with QuarantineWriter(path, append=True) as writer:
+        BulkLoader(records(b"[1]", b"y"), INT_LIST.validate_json, quarantine=writer).load()
+        BulkLoader(records(b"z"), INT_LIST.validate_json, quarantine=writer).load()
+        assert writer.count == 2
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(entry["record"], entry["offset"]) for entry in entries] == [("x", 0), ("y", 10), ("z", 0)]
+    assert entries[0]["errors"][0]["type"] == "json_invalid"
+
+
+def test_quarantine_writer_reopened_after_close_appends(tmp_path: Path):
+    path = tmp_path / "quarantine.ndjson"
+    path.write_text("old\n")
+    writer = QuarantineWriter(path)
+    writer.write(RawRecord("input", 0, b"a"), [])
+    writer.close()
+    writer.write(RawRecord("input", 10, b"b"), [])
+    writer.close()
+    assert [json.loads(line)["record"] for line in path.read_text().splitlines()] == ["a", "b"]
@@ -0,0 +1,97 @@
+from pathlib import Path
+
+import pytest  # type: ignore
+from openimagingdatamodel.cde_set.set import CDESet
+from openimagingdatamodel.observation.observation import Identifier, Reference
+from openimagingdatamodel.observation.observation_factory import ObservationFactory
+from openimagingdatamodel.store import SQLiteStore
+
+ROWS = [
+    ("Patient/1", {"Location": "left upper lobe", "Size": 12.5, "Composition": "solid"}),
+    ("Patient/1", {"Location": "left lower lobe", "Size": 4.0, "Composition": "part-solid"}),
+    ("Patient/2", {"Location": "left upper lobe", "Size": 8.0, "Composition": "solid"}),
+    ("Patient/2", {"Location": "right upper lobe", "Composition": "ground glass"}),
+]
+
+
+@pytest.fixture
+def store(tmp_path: Path, pulmonary_nodule: CDESet):
+    with SQLiteStore(tmp_path / "oidm.sqlite") as store:
+        store.add_set(pulmonary_nodule)
+        observations = [
+            ObservationFactory.create_observation(
+                pulmonary_nodule,
+                id=f"obs{i}",
+                identifier=Identifier(system="urn:example", value=f"acc{i}"),
+                subject=Reference(reference=subject),
+                status="final" if i % 2 else "preliminary",
+                component_values=values,
+            )
+            for i, (subject, values) in enumerate(ROWS)
+        ]
+        assert store.add_observations(observations, batch_size=3) == 4
+        yield store
+
+
+def test_sets(store: SQLiteStore, pulmonary_nodule: CDESet):
+    assert store.set_ids() == [pulmonary_nodule.id]
+    assert store.get_set(pulmonary_nodule.id) == pulmonary_nodule
+    assert store.find_set_for_element("RDE1304").id == pulmonary_nodule.id
+    store.remove_set(pulmonary_nodule.id)
+    assert store.info()["sets"] == 0
+    with pytest.raises(ValueError, match="not found in store"):
+        store.get_set(pulmonary_nodule.id)
+
+
+def test_find_observations(store: SQLiteStore):
+    found = store.find_observations("Patient/1", values={"RDE1304": "left upper lobe"})
+    assert [observation.id_ for observation in found] == ["obs0"]
+    # Value codes and slugs work too, and values alone drive the query
+    assert store.count_observations(values={"RDE1304": "RDE1304.2"}) == 2
+    assert store.count_observations(values={"RDE1304": "left_upper_lobe", "RDE1301": "solid"}) == 2
+    assert store.count_observations(values={"RDE1302": (5, 20)}) == 2
+    assert store.count_observations(values={"RDE1302": 4}) == 1
+    # Numbers given as text match the numeric values they are stored as
+    assert store.count_observations(values={"RDE1302": "12.5"}) == 1
+    assert store.count_observations(values={"RDE1302": "12.5", "RDE1304": "left upper lobe"}) == 1
+    assert store.count_observations("Patient/2", status="final") == 1
+    assert store.count_observations(set_id="RDES195") == 4
+    assert [o.id_ for o in store.find_observations(identifier="acc3")] == ["obs3"]
+    assert store.count_observations(identifier=Identifier(system="urn:other", value="acc3")) == 0
+    assert len(list(store.find_observations(set_id="RDES195", limit=2))) == 2
+
+
+def test_queries_use_indexes(store: SQLiteStore):
+    plan = " ".join(store.query_plan("Patient/1", values={"RDE1304": "left upper lobe"}))
+    assert "ix_observations_subject" in plan and "SCAN" not in plan
+    plan = " ".join(store.query_plan(values={"RDE1304": "left upper lobe", "RDE1301": "solid"}))
+    assert "ix_observation_values_element" in plan and "SCAN o" not in plan
+    plan = " ".join(store.query_plan(identifier="acc1"))
+    assert "ix_observation_identifiers_value" in plan
+
+
+def test_duplicates_and_replace(store: SQLiteStore, pulmonary_nodule: CDESet):
+    observation = store.get_observation("obs0")
+    with pytest.raises(ValueError, match="already in store"):
+        store.add_observations([observation])
+    assert store.info()["observations"] == 4
+
+    observation.components = [c for c in observation.components if c.code.codings[0].code != "RDE1304"]
+    store.add_observations([observation], replace=True)
+    assert store.info()["observations"] == 4
+    assert store.count_observations(values={"RDE1304": "left upper lobe"}) == 1
+    # Of several Observations with the same ID in one call, the last one replaces the stored one
+    second = observation.model_copy(update={"status": "amended"})
+    assert store.add_observations([observation, second], replace=True) == 1
+    assert store.get_observation("obs0").status == "amended"
+    assert store.count_observations(values={"RDE1302": 12.5}) == 1
+    assert store.remove_observations(["obs0", "missing"]) == 1
+    with pytest.raises(ValueError, match="not found in store"):
+        store.get_observation("obs0")
+
+
+def test_reopen(store: SQLiteStore):
+    store.close()
+    with SQLiteStore(store.path) as reopened:
+        assert reopened.info()["observations"] == 4
+        assert reopened.get_observation("obs2").subject.reference == "Patient/2"